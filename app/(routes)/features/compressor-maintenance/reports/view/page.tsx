@@ -174,6 +174,10 @@ const maintenanceFieldsMap: { [key: string]: string } = {
   limpieza_general: "Limpieza general del equipo",
 };
 
+// Grid previews use the server-generated thumbnail; the modal opens the original
+const thumbnailUrl = (fotoUrl: string) =>
+  fotoUrl.includes("/reporte_mtto/foto?") ? `${fotoUrl}&size=md` : fotoUrl;
+
 function ViewReportContent() {
   const router = useRouter();
   const searchParams = useSearchParams();
@@ -670,7 +674,7 @@ function ViewReportContent() {
                 >
                   {/* eslint-disable-next-line @next/next/no-img-element */}
                   <img
-                    src={fotoUrl}
+                    src={thumbnailUrl(fotoUrl)}
                     alt={`${group.label} - Foto ${index + 1}`}
                     className="rounded-lg shadow-md w-full h-56 md:h-64 object-cover"
                     loading="eager"
@@ -2106,7 +2110,7 @@ function ViewReportContent() {
                     >
                       {/* eslint-disable-next-line @next/next/no-img-element */}
                       <img
-                        src={fotoUrl}
+                        src={thumbnailUrl(fotoUrl)}
                         alt={`${cat} - Foto ${index + 1}`}
                         className="rounded-lg shadow-md w-full h-56 md:h-64 object-cover"
                         loading="eager"
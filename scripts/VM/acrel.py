@@ -1,12 +1,15 @@
+import atexit
 import json
 import os
-from datetime import datetime, timedelta
-import pytz
 import mysql.connector
 from mysql.connector import Error
 import paho.mqtt.client as mqtt
 from dotenv import load_dotenv
 
+from decoders import decode_acrel
+from hot_window import escribir_hoy
+from intraday import aggregator
+
 print("Antes de load_dotenv()")
 load_dotenv()
 print("Después de load_dotenv()")
@@ -20,68 +23,38 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_DATABASE = os.getenv("DB_DATABASE")
 
-def find_val(points, id):
-    return next((p["val"] for p in points if p["id"] == id), 0)
-
-def redondear_a_30s(timestamp_ms):
-    # Convertir timestamp UTC a datetime UTC
-    dt_utc = datetime.utcfromtimestamp(timestamp_ms / 1000.0).replace(tzinfo=pytz.UTC)
-
-    # Convertir a hora de Monterrey
-    monterrey_tz = pytz.timezone("America/Monterrey")
-    dt_mty = dt_utc.astimezone(monterrey_tz)
-
-    # Redondear segundos a 0 o 30
-    segundos = dt_mty.second
-    if segundos < 15:
-        nuevos_segundos = 0
-    elif segundos < 45:
-        nuevos_segundos = 30
-    else:
-        nuevos_segundos = 0
-        dt_mty += timedelta(minutes=1)
-
-    return dt_mty.replace(second=nuevos_segundos, microsecond=0)
-
+def conectar_db():
+    return mysql.connector.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_DATABASE
+    )
 
 def insert_data(payload):
     try:
         # Conexión a MySQL
-        connection = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        connection = conectar_db()
 
         if connection.is_connected():
             cursor = connection.cursor(dictionary=True)
 
-            # Paso 1: Extraer id_kpm
-            id_kpm = next((p["val"] for p in payload["data"][0]["point"] if p["id"] == 0), None)
-            if not id_kpm:
-                print("ID_KPM no encontrado en el mensaje.")
+            # Paso 1: id_kpm, timestamp redondeado a :00 o :30 (Monterrey) y valores eléctricos
+            try:
+                lectura = decode_acrel(payload)
+            except ValueError as e:
+                print(e)
                 return
 
             # Paso 2: Buscar id_cliente
-            select_query = f"SELECT id_cliente FROM dispositivo WHERE id_kpm = '{id_kpm}'"
-            cursor.execute(select_query)
+            cursor.execute("SELECT id_cliente FROM dispositivo WHERE id_kpm = %s", (lectura.id_kpm,))
             result = cursor.fetchone()
             if not result:
-                print(f"No se encontró id_cliente para id_kpm={id_kpm}")
+                print(f"No se encontró id_cliente para id_kpm={lectura.id_kpm}")
                 return
             id_cliente = result["id_cliente"]
 
-            # Paso 3: Obtener y redondear timestamp `tp` del payload
-            tp_raw = payload["data"][0].get("tp")
-            if tp_raw is None:
-                print("Timestamp 'tp' no encontrado en el payload.")
-                return
-
-            # Convertir y redondear a :00 o :30
-            formatted_time = redondear_a_30s(tp_raw).strftime("%Y-%m-%d %H:%M:%S")
-
-            # Paso 3.5: Verificar si el compresor requiere multiplicar corrientes x2
+            # Paso 3: Verificar si el compresor requiere multiplicar corrientes x2
             cursor.execute(
                 "SELECT multiplicar_por_dos FROM compresores WHERE id_cliente = %s LIMIT 1",
                 (id_cliente,)
@@ -89,19 +62,8 @@ def insert_data(payload):
             comp_result = cursor.fetchone()
             multiplicar_por_dos = bool(comp_result and comp_result.get('multiplicar_por_dos') == 1)
 
-            # Paso 4: Valores eléctricos
-            points = payload["data"][0].get("point", [])
-            ua = find_val(points, 1)
-            ub = find_val(points, 2)
-            uc = find_val(points, 3)
-            ia = find_val(points, 7)
-            ib = find_val(points, 8)
-            ic = find_val(points, 9)
-
             if multiplicar_por_dos:
-                ia *= 2
-                ib *= 2
-                ic *= 2
+                lectura = lectura.duplicar_corrientes()
                 print(f"⚡ Corrientes multiplicadas x2 para id_cliente {id_cliente}")
 
             insert_electrico = """
@@ -109,18 +71,22 @@ def insert_data(payload):
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
             """
 
-            insert_hoy = """
-                INSERT INTO hoy (device_id, ua, ub, uc, ia, ib, ic, time)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
-            """
-            
+            values = lectura.values(id_cliente)
+            ua, ub, uc, ia, ib, ic, formatted_time = values[1:]
+
             # Insertar en tabla pruebas
-            cursor.execute(insert_electrico, (id_cliente, ua, ub, uc, ia, ib, ic, formatted_time))
+            cursor.execute(insert_electrico, values)
             print(f"  ✓ Insertado en tabla 'pruebas' - id_cliente {id_cliente}")
-            
-            # Insertar en tabla hoy
-            cursor.execute(insert_hoy, (id_cliente, ua, ub, uc, ia, ib, ic, formatted_time))
-            print(f"  ✓ Insertado en tabla 'hoy' - id_cliente {id_cliente}")
+
+            # Insertar en tabla hoy (solo mientras no sea la vista de hot_window.py)
+            if escribir_hoy(cursor, values):
+                print(f"  ✓ Insertado en tabla 'hoy' - id_cliente {id_cliente}")
+
+            # Acumulado del día para /report/today-so-far
+            try:
+                aggregator.registrar(cursor, id_cliente, formatted_time, ia, ib, ic)
+            except Error as e:
+                print("❌ Error en acumulado del día:", e)
 
             # Confirmar cambios
             connection.commit()
@@ -142,6 +108,10 @@ def on_message(client, userdata, msg):
     except Exception as e:
         print("❌ Error procesando mensaje MQTT:", e)
 
+# Acumulado del día: crea hoy_resumen, guarda cada HOY_RESUMEN_FLUSH s y al salir
+aggregator.start(conectar_db)
+atexit.register(aggregator.stop)
+
 # Configurar cliente MQTT
 client = mqtt.Client(protocol=mqtt.MQTTv311)
 client.on_message = on_message
@@ -0,0 +1,242 @@
+"""
+Reimportación masiva de lecturas a `pruebas` desde payloads MQTT guardados.
+
+Sirve cuando un listener estuvo caído (se reinyectan los mensajes guardados por
+el broker o un spool) o cuando un compresor estaba mal configurado (p. ej.
+multiplicar_por_dos se activó tarde: --reemplazar vuelve a escribir esas
+lecturas con la configuración actual).
+
+El archivo tiene un JSON por línea: el payload tal cual llegó, o un registro
+de spool {"topic": ..., "payload": <objeto o texto JSON>}. Cada payload pasa por
+los mismos decodificadores que los listeners (decoders.py; el formato acrel /
+mqtt se detecta solo) y la misma búsqueda de id_cliente y multiplicar_por_dos.
+
+Las lecturas se insertan por lotes con INSERT de varias filas, sin duplicar
+(device_id, time): se descartan las repetidas dentro del lote y las que ya
+están en `pruebas` (o se reemplazan con --reemplazar). Una repetida en otro
+lote ya está en `pruebas` cuando llega, así que se cuenta como existente; el
+conjunto de vistas se vacía en cada lote para que la memoria no crezca con el
+archivo (con --dry-run no se escribe nada y esas repetidas no se detectan).
+
+Uso (desde este directorio, con el mismo .env de los listeners):
+    python backfill.py mensajes.jsonl [otro.jsonl ...] [--formato auto|acrel|mqtt]
+        [--lote 5000] [--reemplazar] [--dry-run]
+
+Al terminar muestra, por cliente, los comandos para recalcular daily_rollup y
+para volver a exportar el archivo Parquet de esos días (los días archivados se
+leen del Parquet, no de `pruebas`, así que sin reexportar no se ven las
+lecturas reimportadas).
+
+Environment:
+    DB_HOST, DB_USER, DB_PASSWORD, DB_DATABASE
+"""
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import mysql.connector
+from dotenv import load_dotenv
+
+from decoders import DECODERS, decode
+
+LOTE = 5000
+
+INSERT_PRUEBAS = """
+    INSERT INTO pruebas (device_id, ua, ub, uc, ia, ib, ic, time)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def _connect():
+    load_dotenv()
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        database=os.getenv("DB_DATABASE"),
+    )
+
+
+def leer_payloads(rutas: List[str]) -> Iterator[Tuple[str, int, Optional[dict]]]:
+    """(archivo, línea, payload) de cada línea no vacía; payload None si no es JSON válido"""
+    for ruta in rutas:
+        with open(ruta, encoding="utf-8") as f:
+            for numero, linea in enumerate(f, start=1):
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    registro = json.loads(linea)
+                    if isinstance(registro, dict) and "payload" in registro:
+                        registro = registro["payload"]
+                        if isinstance(registro, str):
+                            registro = json.loads(registro)
+                    yield ruta, numero, registro if isinstance(registro, dict) else None
+                except json.JSONDecodeError:
+                    yield ruta, numero, None
+
+
+class Backfill:
+    """Decodifica, resuelve dispositivos, quita duplicados e inserta por lotes"""
+
+    def __init__(self, conn, formato: str = "auto", lote: int = LOTE,
+                 reemplazar: bool = False, dry_run: bool = False):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.formato = formato
+        self.lote = lote
+        self.reemplazar = reemplazar
+        self.dry_run = dry_run
+
+        self._clientes: Dict[object, Optional[int]] = {}
+        self._multiplicar: Dict[int, bool] = {}
+        self._vistas = set()
+        self._pendientes: List[tuple] = []
+        self.dias = defaultdict(set)
+        self.stats = dict(lineas=0, invalidas=0, sin_dispositivo=0, repetidas_archivo=0,
+                          existentes=0, reemplazadas=0, insertadas=0)
+        self._inicio = time.perf_counter()
+
+    def _id_cliente(self, id_kpm) -> Optional[int]:
+        if id_kpm not in self._clientes:
+            self.cursor.execute("SELECT id_cliente FROM dispositivo WHERE id_kpm = %s", (id_kpm,))
+            row = self.cursor.fetchone()
+            self._clientes[id_kpm] = row[0] if row else None
+            if row is None:
+                print(f"⚠️ Dispositivo no encontrado: {id_kpm}")
+        return self._clientes[id_kpm]
+
+    def _multiplicar_por_dos(self, id_cliente: int) -> bool:
+        if id_cliente not in self._multiplicar:
+            self.cursor.execute(
+                "SELECT multiplicar_por_dos FROM compresores WHERE id_cliente = %s LIMIT 1",
+                (id_cliente,)
+            )
+            row = self.cursor.fetchone()
+            self._multiplicar[id_cliente] = bool(row and row[0] == 1)
+        return self._multiplicar[id_cliente]
+
+    def agregar(self, ruta: str, numero: int, payload: Optional[dict]) -> None:
+        self.stats["lineas"] += 1
+        try:
+            if payload is None:
+                raise ValueError("JSON inválido")
+            lectura = decode(payload, self.formato)
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            self.stats["invalidas"] += 1
+            if self.stats["invalidas"] <= 20:
+                print(f"⚠️ {ruta}:{numero}: {e}")
+            return
+
+        id_cliente = self._id_cliente(lectura.id_kpm)
+        if id_cliente is None:
+            self.stats["sin_dispositivo"] += 1
+            return
+        if self._multiplicar_por_dos(id_cliente):
+            lectura = lectura.duplicar_corrientes()
+
+        clave = (id_cliente, lectura.time)
+        if clave in self._vistas:
+            self.stats["repetidas_archivo"] += 1
+            return
+        self._vistas.add(clave)
+        self._pendientes.append(lectura.values(id_cliente))
+        if len(self._pendientes) >= self.lote:
+            self.flush()
+
+    def _existentes(self, filas: List[tuple]) -> set:
+        """(device_id, time) del lote que ya están en pruebas (un rango por dispositivo)"""
+        por_device = defaultdict(list)
+        for fila in filas:
+            por_device[fila[0]].append(fila[7])
+        existentes = set()
+        for device_id, tiempos in por_device.items():
+            self.cursor.execute(
+                "SELECT time FROM pruebas WHERE device_id = %s AND time >= %s AND time <= %s",
+                (device_id, min(tiempos), max(tiempos)),
+            )
+            existentes.update((device_id, t.strftime("%Y-%m-%d %H:%M:%S")) for (t,) in self.cursor.fetchall())
+        return existentes
+
+    def flush(self) -> None:
+        filas, self._pendientes = self._pendientes, []
+        self._vistas.clear()
+        if not filas:
+            return
+        existentes = self._existentes(filas)
+        if self.reemplazar:
+            borrar = [f for f in filas if (f[0], f[7]) in existentes]
+            nuevas = filas
+            self.stats["reemplazadas"] += len(borrar)
+        else:
+            borrar = []
+            nuevas = [f for f in filas if (f[0], f[7]) not in existentes]
+            self.stats["existentes"] += len(filas) - len(nuevas)
+
+        if not self.dry_run:
+            por_device = defaultdict(list)
+            for fila in borrar:
+                por_device[fila[0]].append(fila[7])
+            for device_id, tiempos in por_device.items():
+                self.cursor.execute(
+                    f"DELETE FROM pruebas WHERE device_id = %s AND time IN ({', '.join(['%s'] * len(tiempos))})",
+                    (device_id, *tiempos),
+                )
+            if nuevas:
+                # mysql.connector reescribe executemany de INSERT como un solo INSERT de varias filas
+                self.cursor.executemany(INSERT_PRUEBAS, nuevas)
+            self.conn.commit()
+
+        self.stats["insertadas"] += len(nuevas)
+        for fila in nuevas:
+            self.dias[fila[0]].add(fila[7][:10])
+        print(f"📦 Lote: {len(nuevas)} lecturas{' (dry-run)' if self.dry_run else ''} | "
+              f"{self.stats['lineas'] / (time.perf_counter() - self._inicio):,.0f} mensajes/s acumulado")
+
+    def resumen(self) -> None:
+        segundos = time.perf_counter() - self._inicio
+        s = self.stats
+        verbo = "se insertarían" if self.dry_run else "insertadas"
+        print(f"\n{'🔎 [dry-run]' if self.dry_run else '✅'} {s['lineas']} mensajes en {segundos:.1f} s "
+              f"({s['lineas'] / segundos if segundos else 0:,.0f} mensajes/s, "
+              f"{s['insertadas'] / segundos if segundos else 0:,.0f} lecturas/s)")
+        print(f"   {s['insertadas']} lecturas {verbo}"
+              + (f", {s['reemplazadas']} reemplazadas" if self.reemplazar else f", {s['existentes']} ya existían")
+              + f", {s['repetidas_archivo']} repetidas en el lote, {s['invalidas']} inválidas, "
+              f"{s['sin_dispositivo']} sin dispositivo")
+        for id_cliente, dias in sorted(self.dias.items()):
+            desde, hasta = min(dias), max(dias)
+            print(f"   Cliente {id_cliente}: {len(dias)} día(s) entre {desde} y {hasta} →\n"
+                  f"      python -m scripts.api.daily_rollup --desde {desde} --hasta {hasta} --cliente {id_cliente}\n"
+                  f"      python -m scripts.api.telemetry_archive --desde {desde} --hasta {hasta} "
+                  f"--tabla pruebas --device {id_cliente}")
+
+    def close(self) -> None:
+        self.cursor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reimporta payloads MQTT guardados a la tabla pruebas")
+    parser.add_argument("archivos", nargs="+", help="Archivos JSONL con un payload (o registro de spool) por línea")
+    parser.add_argument("--formato", choices=["auto", *DECODERS], default="auto", help="Formato del payload")
+    parser.add_argument("--lote", type=int, default=LOTE, help=f"Lecturas por INSERT (default: {LOTE})")
+    parser.add_argument("--reemplazar", action="store_true",
+                        help="Reescribe las lecturas que ya existen (corrige datos mal decodificados)")
+    parser.add_argument("--dry-run", action="store_true", help="Decodifica y cuenta, no escribe en la base de datos")
+    args = parser.parse_args()
+
+    print(f"🚀 Backfill iniciado {datetime.now():%Y-%m-%d %H:%M:%S}")
+    conn = _connect()
+    backfill = Backfill(conn, args.formato, args.lote, args.reemplazar, args.dry_run)
+    try:
+        for ruta, numero, payload in leer_payloads(args.archivos):
+            backfill.agregar(ruta, numero, payload)
+        backfill.flush()
+        backfill.resumen()
+    finally:
+        backfill.close()
+        conn.close()
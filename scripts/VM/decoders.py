@@ -0,0 +1,121 @@
+"""
+Decodificación de los payloads MQTT de los medidores eléctricos.
+
+La usan los listeners (acrel.py, mqtt_to_mysql.py) y backfill.py, así que una
+lectura reimportada desde archivo queda igual que si hubiera llegado en vivo.
+
+    acrel           {"data": [{"tp": <ms UTC>, "point": [{"id": 0, "val": <id_kpm>}, ...]}]}
+    mqtt_to_mysql   {"id": <id_kpm>, "time": "YYYYMMDDHHMMSS", "ua": ..., "ic": ...}
+
+Los decodificadores lanzan ValueError con el mismo mensaje que imprimía cada
+listener cuando falta un campo obligatorio.
+"""
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import pytz
+
+MONTERREY_TZ = pytz.timezone("America/Monterrey")
+
+
+class Lectura(NamedTuple):
+    id_kpm: object
+    time: str  # 'YYYY-MM-DD HH:MM:SS', hora de Monterrey
+    ua: float
+    ub: float
+    uc: float
+    ia: float
+    ib: float
+    ic: float
+
+    def duplicar_corrientes(self) -> "Lectura":
+        """Corrientes x2 (compresores con multiplicar_por_dos)"""
+        return self._replace(ia=self.ia * 2, ib=self.ib * 2, ic=self.ic * 2)
+
+    def values(self, device_id: int) -> tuple:
+        """Fila para INSERT INTO pruebas (device_id, ua, ub, uc, ia, ib, ic, time)"""
+        return (device_id, self.ua, self.ub, self.uc, self.ia, self.ib, self.ic, self.time)
+
+
+def find_val(points, id):
+    return next((p["val"] for p in points if p["id"] == id), 0)
+
+
+def redondear_a_30s(timestamp_ms):
+    # Convertir timestamp UTC a datetime UTC
+    dt_utc = datetime.utcfromtimestamp(timestamp_ms / 1000.0).replace(tzinfo=pytz.UTC)
+
+    # Convertir a hora de Monterrey
+    dt_mty = dt_utc.astimezone(MONTERREY_TZ)
+
+    # Redondear segundos a 0 o 30
+    segundos = dt_mty.second
+    if segundos < 15:
+        nuevos_segundos = 0
+    elif segundos < 45:
+        nuevos_segundos = 30
+    else:
+        nuevos_segundos = 0
+        dt_mty += timedelta(minutes=1)
+
+    return dt_mty.replace(second=nuevos_segundos, microsecond=0)
+
+
+def decode_acrel(payload: dict) -> Lectura:
+    """Payload del medidor ADW300 (acrel.py)"""
+    data = payload["data"][0]
+    points = data.get("point", [])
+
+    id_kpm = next((p["val"] for p in points if p["id"] == 0), None)
+    if not id_kpm:
+        raise ValueError("ID_KPM no encontrado en el mensaje.")
+
+    tp_raw = data.get("tp")
+    if tp_raw is None:
+        raise ValueError("Timestamp 'tp' no encontrado en el payload.")
+
+    return Lectura(
+        id_kpm=id_kpm,
+        time=redondear_a_30s(tp_raw).strftime("%Y-%m-%d %H:%M:%S"),
+        ua=find_val(points, 1),
+        ub=find_val(points, 2),
+        uc=find_val(points, 3),
+        ia=find_val(points, 7),
+        ib=find_val(points, 8),
+        ic=find_val(points, 9),
+    )
+
+
+def decode_mqtt(payload: dict) -> Lectura:
+    """Payload con id / time / ua..ic planos (mqtt_to_mysql.py)"""
+    id_kpm = payload.get("id")
+    if not id_kpm:
+        raise ValueError("❌ No se encontró 'id' en payload")
+
+    time_str = payload.get("time")
+    if not time_str:
+        raise ValueError("❌ No se encontró 'time' en payload")
+
+    return Lectura(
+        id_kpm=id_kpm,
+        time=datetime.strptime(time_str, "%Y%m%d%H%M%S").strftime("%Y-%m-%d %H:%M:%S"),
+        ua=float(payload.get("ua", 0)),
+        ub=float(payload.get("ub", 0)),
+        uc=float(payload.get("uc", 0)),
+        ia=float(payload.get("ia", 0)),
+        ib=float(payload.get("ib", 0)),
+        ic=float(payload.get("ic", 0)),
+    )
+
+
+DECODERS = {"acrel": decode_acrel, "mqtt": decode_mqtt}
+
+
+def detectar_formato(payload: dict) -> str:
+    return "acrel" if "data" in payload else "mqtt"
+
+
+def decode(payload: dict, formato: str = "auto") -> Lectura:
+    if formato == "auto":
+        formato = detectar_formato(payload)
+    return DECODERS[formato](payload)
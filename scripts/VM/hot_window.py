@@ -0,0 +1,285 @@
+"""
+Ventana caliente `hoy`: las lecturas del día en curso (hora de Monterrey).
+
+Antes acrel.py y mqtt_to_mysql.py insertaban cada lectura dos veces (`pruebas`
+y `hoy`) y nada limpiaba `hoy`. Ahora `hoy` puede ser una vista sobre `pruebas`:
+
+    hoy = pruebas WHERE time >= inicio del día en Monterrey (- HOY_DIAS + 1 días)
+
+El inicio del día se calcula en cada consulta (UTC-6; Monterrey no tiene
+horario de verano desde 2022), así que la vista "rota" sola a medianoche sin
+ningún proceso y sin depender de las tablas de zonas horarias de MySQL. La
+condición es un rango sobre `time`, que usa el índice (device_id, time).
+
+Los listeners llaman escribir_hoy() después de insertar en `pruebas`: si `hoy`
+es vista no hacen nada (una sola inserción por lectura); si sigue siendo tabla
+insertan como antes. La vista no acepta INSERT (ua es una expresión), así que un
+listener que todavía no detectó el cambio falla en esa sentencia en lugar de
+duplicar la lectura en `pruebas`.
+
+Uso (desde este directorio, con el mismo .env de los listeners):
+    python hot_window.py --estado
+    python hot_window.py --migrar [--dias 1]    # tabla -> vista (RENAME atómico)
+    python hot_window.py --rotar                # modo tabla: deja solo el día en curso
+    python hot_window.py --rotar --daemon       # modo tabla: rota cada medianoche
+    python hot_window.py --benchmark 500        # costo de insertar en 1 vs 2 tablas
+
+Environment:
+    HOY_CHECK_TTL   Segundos antes de volver a revisar si `hoy` es vista (default: 60)
+    DB_HOST, DB_USER, DB_PASSWORD, DB_DATABASE
+"""
+import argparse
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+import pytz
+from dotenv import load_dotenv
+
+HOY_TABLE = "hoy"
+SOURCE_TABLE = "pruebas"
+COLUMNS = ["device_id", "ua", "ub", "uc", "ia", "ib", "ic", "time"]
+HOY_CHECK_TTL = int(os.getenv("HOY_CHECK_TTL", "60"))
+
+MONTERREY_TZ = pytz.timezone("America/Monterrey")
+MONTERREY_UTC_OFFSET = "-06:00"
+
+INSERT_HOY = f"""
+    INSERT INTO {HOY_TABLE} ({", ".join(COLUMNS)})
+    VALUES ({", ".join(["%s"] * len(COLUMNS))})
+"""
+
+
+def view_sql(dias: int = 1) -> str:
+    """SELECT de la vista `hoy` con los últimos `dias` días de Monterrey"""
+    inicio = f"DATE(CONVERT_TZ(UTC_TIMESTAMP(), '+00:00', '{MONTERREY_UTC_OFFSET}'))"
+    if dias > 1:
+        inicio = f"{inicio} - INTERVAL {dias - 1} DAY"
+    return f"""
+        SELECT p.device_id, p.ua + 0 AS ua, p.ub, p.uc, p.ia, p.ib, p.ic, p.time
+        FROM {SOURCE_TABLE} p
+        WHERE p.time >= {inicio}
+    """
+
+
+def inicio_dia_monterrey(ahora: datetime = None) -> datetime:
+    """Medianoche (naive, hora de Monterrey) del día en curso"""
+    ahora = ahora or datetime.now(MONTERREY_TZ)
+    return ahora.astimezone(MONTERREY_TZ).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def tipo_hoy(cursor) -> str:
+    """'VIEW', 'BASE TABLE' o None si `hoy` no existe"""
+    cursor.execute("""
+        SELECT TABLE_TYPE AS tipo FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (HOY_TABLE,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return row["tipo"] if isinstance(row, dict) else row[0]
+
+
+class HotWindowWriter:
+    """Decide si una lectura también se inserta en `hoy` (solo mientras sea tabla)"""
+
+    def __init__(self, check_ttl: int = HOY_CHECK_TTL):
+        self.check_ttl = check_ttl
+        self._es_vista = None
+        self._expira = 0.0
+
+    def es_vista(self, cursor) -> bool:
+        if self._es_vista is None or time.monotonic() >= self._expira:
+            self._es_vista = tipo_hoy(cursor) == "VIEW"
+            self._expira = time.monotonic() + self.check_ttl
+        return self._es_vista
+
+    def escribir(self, cursor, values: tuple) -> bool:
+        """
+        Inserta `values` (en el orden de COLUMNS) en `hoy` si sigue siendo tabla.
+
+        Un error aquí no deshace la inserción en `pruebas` (MySQL solo revierte
+        la sentencia); se registra y se vuelve a revisar el tipo de `hoy`.
+        """
+        try:
+            if self.es_vista(cursor):
+                return False
+            cursor.execute(INSERT_HOY, values)
+            return True
+        except mysql.connector.Error as e:
+            logging.error(f"❌ Error insertando en {HOY_TABLE}: {e}")
+            self._es_vista = None
+            return False
+
+
+writer = HotWindowWriter()
+
+
+def escribir_hoy(cursor, values: tuple) -> bool:
+    return writer.escribir(cursor, values)
+
+
+def _connect():
+    load_dotenv()
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        database=os.getenv("DB_DATABASE"),
+    )
+
+
+def estado(cursor) -> None:
+    tipo = tipo_hoy(cursor)
+    if tipo is None:
+        print(f"⚠️ `{HOY_TABLE}` no existe")
+        return
+    cursor.execute(f"SELECT COUNT(*) AS n, MIN(time) AS desde, MAX(time) AS hasta FROM {HOY_TABLE}")
+    row = cursor.fetchone()
+    modo = "vista sobre pruebas" if tipo == "VIEW" else "tabla"
+    print(f"📊 `{HOY_TABLE}` es {modo}: {row['n']} lecturas entre {row['desde']} y {row['hasta']}")
+
+
+def migrar(conn, dias: int = 1) -> None:
+    """Reemplaza la tabla `hoy` por la vista; la tabla queda como hoy_tabla_<fecha>"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        tipo = tipo_hoy(cursor)
+        if tipo == "VIEW":
+            cursor.execute(f"CREATE OR REPLACE VIEW {HOY_TABLE} AS {view_sql(dias)}")
+            print(f"✅ Vista `{HOY_TABLE}` actualizada ({dias} día(s))")
+            return
+        cursor.execute(f"CREATE OR REPLACE VIEW {HOY_TABLE}_vista AS {view_sql(dias)}")
+        if tipo is None:
+            cursor.execute(f"RENAME TABLE {HOY_TABLE}_vista TO {HOY_TABLE}")
+            print(f"✅ Vista `{HOY_TABLE}` creada ({dias} día(s))")
+            return
+        respaldo = f"{HOY_TABLE}_tabla_{datetime.now():%Y%m%d}"
+        # Las dos renombradas son una sola operación: nunca hay un momento sin `hoy`
+        cursor.execute(f"RENAME TABLE {HOY_TABLE} TO {respaldo}, {HOY_TABLE}_vista TO {HOY_TABLE}")
+        print(f"✅ `{HOY_TABLE}` ahora es vista sobre {SOURCE_TABLE}; la tabla anterior quedó en `{respaldo}`")
+        print(f"   Los listeners dejan de insertar en `{HOY_TABLE}` en a lo más {HOY_CHECK_TTL} s")
+    finally:
+        cursor.close()
+
+
+def rotar(conn) -> int:
+    """
+    Modo tabla: deja en `hoy` solo las lecturas del día en curso.
+
+    Copia el día a una tabla nueva y la intercambia con RENAME (atómico); las
+    lecturas que llegaron durante la copia se pasan después del intercambio.
+    Devuelve cuántas lecturas quedaron en `hoy`.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        tipo = tipo_hoy(cursor)
+        if tipo != "BASE TABLE":
+            print(f"ℹ️ `{HOY_TABLE}` es {tipo or 'inexistente'}: no hay nada que rotar")
+            return 0
+        corte = inicio_dia_monterrey()
+        nueva, vieja = f"{HOY_TABLE}_nueva", f"{HOY_TABLE}_vieja"
+
+        cursor.execute(f"DROP TABLE IF EXISTS {nueva}, {vieja}")
+        cursor.execute(f"CREATE TABLE {nueva} LIKE {HOY_TABLE}")
+        cursor.execute(f"INSERT INTO {nueva} SELECT * FROM {HOY_TABLE} WHERE time >= %s", (corte,))
+        conn.commit()
+
+        cursor.execute(f"RENAME TABLE {HOY_TABLE} TO {vieja}, {nueva} TO {HOY_TABLE}")
+        # Todo el día, no desde el MAX(time) copiado: cada dispositivo reporta con
+        # su propio reloj y uno atrasado puede insertar lecturas anteriores a ese máximo
+        cursor.execute(f"""
+            INSERT INTO {HOY_TABLE}
+            SELECT v.* FROM {vieja} v
+            WHERE v.time >= %s
+              AND NOT EXISTS (
+                  SELECT 1 FROM {HOY_TABLE} h WHERE h.device_id = v.device_id AND h.time = v.time
+              )
+        """, (corte,))
+        conn.commit()
+
+        cursor.execute(f"SELECT COUNT(*) AS n FROM {vieja} WHERE time < %s", (corte,))
+        descartadas = cursor.fetchone()["n"]
+        cursor.execute(f"DROP TABLE {vieja}")
+        cursor.execute(f"SELECT COUNT(*) AS n FROM {HOY_TABLE}")
+        quedan = cursor.fetchone()["n"]
+        print(f"✅ `{HOY_TABLE}` rotada en {corte:%Y-%m-%d}: {quedan} lecturas, {descartadas} de días anteriores eliminadas")
+        return quedan
+    finally:
+        cursor.close()
+
+
+def segundos_hasta_medianoche(ahora: datetime = None) -> float:
+    ahora = ahora or datetime.now(MONTERREY_TZ)
+    siguiente = MONTERREY_TZ.localize(inicio_dia_monterrey(ahora) + timedelta(days=1))
+    return (siguiente - ahora).total_seconds()
+
+
+def benchmark(conn, lecturas: int) -> None:
+    """Inserta `lecturas` en tablas temporales como los listeners (commit por lectura): 2 tablas vs 1"""
+    cursor = conn.cursor()
+    try:
+        for nombre in ("bench_pruebas", "bench_hoy"):
+            cursor.execute(f"CREATE TEMPORARY TABLE {nombre} LIKE {SOURCE_TABLE}")
+        inicio = inicio_dia_monterrey()
+        filas = [
+            (-1, 127.0, 127.0, 127.0, 40.0, 40.0, 40.0, inicio + timedelta(seconds=30 * i))
+            for i in range(lecturas)
+        ]
+
+        resultados = {}
+        for tablas in (("bench_pruebas", "bench_hoy"), ("bench_pruebas",)):
+            cursor.execute("DELETE FROM bench_pruebas")
+            cursor.execute("DELETE FROM bench_hoy")
+            conn.commit()
+            t0 = time.perf_counter()
+            for fila in filas:
+                for tabla in tablas:
+                    cursor.execute(
+                        f"INSERT INTO {tabla} ({', '.join(COLUMNS)}) VALUES ({', '.join(['%s'] * len(COLUMNS))})",
+                        fila,
+                    )
+                conn.commit()
+            resultados[len(tablas)] = time.perf_counter() - t0
+
+        for n, segundos in resultados.items():
+            print(f"📊 {n} tabla(s): {lecturas / segundos:,.0f} lecturas/s ({segundos * 1000 / lecturas:.2f} ms por lectura)")
+        print(f"✅ Escribir solo en {SOURCE_TABLE}: {(1 - resultados[1] / resultados[2]) * 100:.0f}% menos tiempo por lectura")
+    finally:
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS bench_pruebas, bench_hoy")
+        cursor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ventana caliente `hoy` (día en curso de pruebas)")
+    parser.add_argument("--estado", action="store_true", help="Muestra si `hoy` es tabla o vista y qué contiene")
+    parser.add_argument("--migrar", action="store_true", help="Convierte `hoy` en vista sobre pruebas")
+    parser.add_argument("--dias", type=int, default=1, help="Días en la vista (default: 1, solo el día en curso)")
+    parser.add_argument("--rotar", action="store_true", help="Modo tabla: borra de `hoy` los días anteriores")
+    parser.add_argument("--daemon", action="store_true", help="Con --rotar: repetir cada medianoche de Monterrey")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Mide N inserciones en 2 tablas vs 1")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    conn = _connect()
+    try:
+        if args.migrar:
+            migrar(conn, args.dias)
+        if args.rotar:
+            rotar(conn)
+            while args.daemon:
+                espera = segundos_hasta_medianoche()
+                print(f"⏳ Siguiente rotación en {espera / 3600:.1f} h")
+                time.sleep(espera + 1)
+                conn.reconnect()
+                rotar(conn)
+        if args.benchmark:
+            benchmark(conn, args.benchmark)
+        if args.estado or not (args.migrar or args.rotar or args.benchmark):
+            cursor = conn.cursor(dictionary=True)
+            estado(cursor)
+            cursor.close()
+    finally:
+        conn.close()
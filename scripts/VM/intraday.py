@@ -0,0 +1,300 @@
+"""
+Acumulado del día en curso por compresor, alimentado por los listeners MQTT.
+
+acrel.py y mqtt_to_mysql.py insertan cada lectura en `pruebas` (y en `hoy`
+mientras no sea la vista de hot_window.py). Además pasan la lectura a
+IntradayAggregator.registrar(), que mantiene por compresor (id_cliente, linea)
+el estado actual, segundos en LOAD/NOLOAD/OFF, kWh, ciclos y la hora de la
+última lectura. Un hilo guarda cada HOY_RESUMEN_FLUSH segundos las filas que
+cambiaron en `hoy_resumen` (una fila por compresor), que es lo que lee
+GET /report/today-so-far. El hilo usa su propia conexión, así que un compresor
+que deja de reportar también queda guardado, y los listeners llaman stop() al
+salir (atexit) para no perder lo pendiente.
+
+La tabla se crea al arrancar el listener (aggregator.start) o a mano:
+    python intraday.py --init
+
+Reglas (por lectura):
+    corriente   ia / ib / ic según la línea A / B / C del compresor
+    estado      LOAD si corriente >= LOAD_NO_LOAD, NOLOAD si > UMBRAL_OFF, si no OFF
+    duración    segundosPorRegistro del compresor
+    kWh         √3 · voltaje · corriente · FP · segundos / 3600 / 1000
+    ciclo       cada paso de NOLOAD a LOAD
+
+Son las mismas reglas de scripts/api/state_engine.py (este directorio se
+despliega solo, sin el paquete de la API).
+
+Si el listener se reinicia, el primer registro de cada compresor retoma la fila
+guardada del mismo día, así que a lo más se pierden HOY_RESUMEN_FLUSH segundos.
+
+Environment:
+    DB_HOST, DB_USER, DB_PASSWORD, DB_DATABASE  (solo para --init)
+    HOY_RESUMEN_FLUSH   Segundos entre escrituras a hoy_resumen (default: 60)
+    CONFIG_TTL          Segundos antes de releer umbrales de compresores (default: 300)
+"""
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+HOY_RESUMEN_TABLE = "hoy_resumen"
+HOY_RESUMEN_FLUSH = int(os.getenv("HOY_RESUMEN_FLUSH", "60"))
+CONFIG_TTL = int(os.getenv("CONFIG_TTL", "300"))
+
+FP = 0.9
+UMBRAL_OFF = 1.0
+SEGUNDOS_POR_REGISTRO = 30
+
+CORRIENTE_POR_LINEA = {"A": "ia", "B": "ib", "C": "ic"}
+
+HOY_RESUMEN_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {HOY_RESUMEN_TABLE} (
+        id_cliente INT NOT NULL,
+        linea VARCHAR(16) NOT NULL,
+        fecha DATE NOT NULL,
+        estado VARCHAR(8) NULL,
+        ultimo_registro DATETIME NULL,
+        inicio DATETIME NULL,
+        fin DATETIME NULL,
+        segundos_load INT NOT NULL DEFAULT 0,
+        segundos_noload INT NOT NULL DEFAULT 0,
+        segundos_off INT NOT NULL DEFAULT 0,
+        kWh DOUBLE NOT NULL DEFAULT 0,
+        ciclos INT NOT NULL DEFAULT 0,
+        registros INT NOT NULL DEFAULT 0,
+        fecha_actualizacion DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (id_cliente, linea)
+    )
+"""
+
+STATE_COLUMNS = [
+    "fecha", "estado", "ultimo_registro", "inicio", "fin", "segundos_load",
+    "segundos_noload", "segundos_off", "kWh", "ciclos", "registros",
+]
+
+
+def clasificar(corriente: float, load_no_load: float) -> str:
+    if corriente >= load_no_load:
+        return "LOAD"
+    if corriente > UMBRAL_OFF:
+        return "NOLOAD"
+    return "OFF"
+
+
+def _parse_time(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+
+
+class _DeviceState:
+    __slots__ = STATE_COLUMNS
+
+    def __init__(self, fecha):
+        self.fecha = fecha
+        self.estado = None
+        self.ultimo_registro = None
+        self.inicio = None
+        self.fin = None
+        self.segundos_load = 0
+        self.segundos_noload = 0
+        self.segundos_off = 0
+        self.kWh = 0.0
+        self.ciclos = 0
+        self.registros = 0
+
+    @classmethod
+    def from_row(cls, row: dict) -> "_DeviceState":
+        state = cls(row["fecha"])
+        for column in STATE_COLUMNS:
+            setattr(state, column, row[column])
+        return state
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, column) for column in STATE_COLUMNS)
+
+
+class IntradayAggregator:
+    """Acumulados del día por (id_cliente, linea), con escritura periódica a hoy_resumen"""
+
+    def __init__(self, flush_interval: int = HOY_RESUMEN_FLUSH, config_ttl: int = CONFIG_TTL):
+        self.flush_interval = flush_interval
+        self.config_ttl = config_ttl
+        self._states = {}
+        self._dirty = set()
+        self._configs = {}
+        self._lock = threading.Lock()
+        self._connect = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _lineas(self, cursor, id_cliente: int) -> list:
+        """[(linea, LOAD_NO_LOAD, voltaje, segundosPorRegistro)] de los compresores del cliente"""
+        cached = self._configs.get(id_cliente)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        cursor.execute("""
+            SELECT linea, LOAD_NO_LOAD, voltaje, segundosPorRegistro
+            FROM compresores
+            WHERE id_cliente = %s AND linea IS NOT NULL AND LOAD_NO_LOAD IS NOT NULL
+        """, (id_cliente,))
+        lineas = [
+            (row["linea"], float(row["LOAD_NO_LOAD"]), float(row["voltaje"] or 0),
+             int(row["segundosPorRegistro"] or SEGUNDOS_POR_REGISTRO))
+            for row in cursor.fetchall()
+            if row["linea"] in CORRIENTE_POR_LINEA
+        ]
+        self._configs[id_cliente] = (lineas, time.monotonic() + self.config_ttl)
+        return lineas
+
+    def _state(self, cursor, key: tuple, fecha) -> _DeviceState:
+        state = self._states.get(key)
+        if state is None:
+            cursor.execute(
+                f"SELECT {', '.join(STATE_COLUMNS)} FROM {HOY_RESUMEN_TABLE} WHERE id_cliente = %s AND linea = %s",
+                key,
+            )
+            row = cursor.fetchone()
+            state = _DeviceState.from_row(row) if row and row["fecha"] == fecha else _DeviceState(fecha)
+            self._states[key] = state
+        if state.fecha != fecha:
+            # Primer registro del día siguiente: el acumulado empieza de cero
+            state = self._states[key] = _DeviceState(fecha)
+        return state
+
+    def registrar(self, cursor, id_cliente: int, time_value, ia: float, ib: float, ic: float) -> None:
+        """Suma una lectura de `pruebas` a los compresores del cliente"""
+        instante = _parse_time(time_value)
+        corrientes = {"ia": ia, "ib": ib, "ic": ic}
+        with self._lock:
+            self._registrar(cursor, id_cliente, instante, corrientes)
+
+    def _registrar(self, cursor, id_cliente: int, instante: datetime, corrientes: dict) -> None:
+        for linea, load_no_load, voltaje, segundos in self._lineas(cursor, id_cliente):
+            key = (id_cliente, linea)
+            state = self._state(cursor, key, instante.date())
+            if state.ultimo_registro is not None and instante <= state.ultimo_registro:
+                # Lectura repetida o fuera de orden: ya está contada
+                continue
+
+            corriente = float(corrientes[CORRIENTE_POR_LINEA[linea]] or 0)
+            estado = clasificar(corriente, load_no_load)
+            if estado == "LOAD" and state.estado == "NOLOAD":
+                state.ciclos += 1
+            if estado == "LOAD":
+                state.segundos_load += segundos
+            elif estado == "NOLOAD":
+                state.segundos_noload += segundos
+            else:
+                state.segundos_off += segundos
+            if estado != "OFF":
+                state.inicio = state.inicio or instante
+                state.fin = instante
+            state.kWh += math.sqrt(3) * voltaje * corriente * FP * segundos / 3600 / 1000
+            state.estado = estado
+            state.ultimo_registro = instante
+            state.registros += 1
+            self._dirty.add(key)
+
+    def flush(self, cursor) -> int:
+        """Guarda los compresores que cambiaron; el commit lo hace quien llama"""
+        with self._lock:
+            keys = set(self._dirty)
+            rows = [key + self._states[key].values() for key in keys]
+            self._dirty.clear()
+        if not rows:
+            return 0
+        columns = ["id_cliente", "linea"] + STATE_COLUMNS
+        try:
+            cursor.executemany(f"""
+                INSERT INTO {HOY_RESUMEN_TABLE} ({", ".join(columns)})
+                VALUES ({", ".join(["%s"] * len(columns))})
+                ON DUPLICATE KEY UPDATE {", ".join(f"{c} = VALUES({c})" for c in STATE_COLUMNS)}
+            """, rows)
+        except Exception:
+            # Se reintentan en el siguiente flush
+            with self._lock:
+                self._dirty |= keys
+            raise
+        return len(rows)
+
+    def _flush_connection(self) -> int:
+        """flush() con una conexión propia, independiente de la transacción del listener"""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            try:
+                flushed = self.flush(cursor)
+                conn.commit()
+                return flushed
+            finally:
+                cursor.close()
+        finally:
+            conn.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self._flush_connection()
+            except Exception as e:
+                logging.error(f"❌ Error guardando {HOY_RESUMEN_TABLE}: {e}")
+
+    def start(self, connect) -> None:
+        """Crea hoy_resumen si no existe y arranca el flush periódico.
+
+        `connect` abre una conexión nueva a MySQL; se usa una por flush para no
+        mezclar el DDL ni el upsert con la transacción de las lecturas.
+        """
+        self._connect = connect
+        init_table(connect)
+        self._thread = threading.Thread(target=self._run, name="hoy_resumen-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el flush periódico y guarda lo pendiente (para atexit)"""
+        self._stop.set()
+        if self._connect is None:
+            return
+        try:
+            flushed = self._flush_connection()
+            logging.info(f"💾 {HOY_RESUMEN_TABLE}: {flushed} compresor(es) guardados al salir")
+        except Exception as e:
+            logging.error(f"❌ Error guardando {HOY_RESUMEN_TABLE} al salir: {e}")
+
+
+def init_table(connect) -> None:
+    """CREATE TABLE IF NOT EXISTS hoy_resumen en su propia conexión"""
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(HOY_RESUMEN_DDL)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+aggregator = IntradayAggregator()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import mysql.connector
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Acumulado del día por compresor (hoy_resumen)")
+    parser.add_argument("--init", action="store_true", help=f"Crea la tabla {HOY_RESUMEN_TABLE} si no existe")
+    args = parser.parse_args()
+    if not args.init:
+        parser.print_help()
+        raise SystemExit(0)
+
+    load_dotenv()
+    init_table(lambda: mysql.connector.connect(
+        host=os.getenv("DB_HOST"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        database=os.getenv("DB_DATABASE"),
+    ))
+    print(f"✅ Tabla {HOY_RESUMEN_TABLE} lista")
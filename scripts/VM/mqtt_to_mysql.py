@@ -1,7 +1,6 @@
 import paho.mqtt.client as mqtt
 import mysql.connector
 import json
-from datetime import datetime
 import logging
 import sys
 from dotenv import load_dotenv
@@ -9,6 +8,10 @@ import os
 import time
 import atexit
 
+from decoders import decode_mqtt
+from hot_window import escribir_hoy
+from intraday import aggregator
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -41,8 +44,12 @@ def conectar_db():
 conn = conectar_db()
 cursor = conn.cursor(dictionary=True)
 
+# Acumulado del día: crea hoy_resumen y lo guarda cada HOY_RESUMEN_FLUSH s
+aggregator.start(conectar_db)
+
 # Cerrar conexión al terminar
 def cerrar_conexion():
+    aggregator.stop()
     if conn.is_connected():
         cursor.close()
         conn.close()
@@ -66,17 +73,18 @@ def on_message(client, userdata, msg):
         payload = json.loads(msg.payload.decode())
         logging.info(f"📨 Mensaje recibido completo: {payload}")
 
-        # Obtener id_kpm directamente del campo 'id'
-        id_kpm = payload.get("id")
-        if not id_kpm:
-            logging.error("❌ No se encontró 'id' en payload")
+        # id_kpm, timestamp ('YYYYMMDDHHMMSS') y variables eléctricas (0.0 si faltan)
+        try:
+            lectura = decode_mqtt(payload)
+        except ValueError as e:
+            logging.error(str(e))
             return
-        
+
         # Consultar id_cliente con id_kpm
-        cursor.execute("SELECT id_cliente FROM dispositivo WHERE id_kpm = %s", (id_kpm,))
+        cursor.execute("SELECT id_cliente FROM dispositivo WHERE id_kpm = %s", (lectura.id_kpm,))
         result = cursor.fetchone()
         if not result:
-            logging.error(f"Dispositivo no encontrado: {id_kpm}")
+            logging.error(f"Dispositivo no encontrado: {lectura.id_kpm}")
             return
         id_device = result['id_cliente']
 
@@ -88,39 +96,26 @@ def on_message(client, userdata, msg):
         comp_result = cursor.fetchone()
         multiplicar_por_dos = bool(comp_result and comp_result.get('multiplicar_por_dos') == 1)
 
-        # Parsear timestamp en 'time' (string 'YYYYMMDDHHMMSS')
-        time_str = payload.get("time")
-        if not time_str:
-            logging.error("❌ No se encontró 'time' en payload")
-            return
-        time_fmt = datetime.strptime(time_str, "%Y%m%d%H%M%S").strftime('%Y-%m-%d %H:%M:%S')
-
-        # Extraer variables eléctricas (usar 0.0 si falta)
-        ua = float(payload.get("ua", 0))
-        ub = float(payload.get("ub", 0))
-        uc = float(payload.get("uc", 0))
-        ia = float(payload.get("ia", 0))
-        ib = float(payload.get("ib", 0))
-        ic = float(payload.get("ic", 0))
-
         # Multiplicar corrientes x2 si está configurado
         if multiplicar_por_dos:
-            ia *= 2
-            ib *= 2
-            ic *= 2
+            lectura = lectura.duplicar_corrientes()
             logging.info(f"⚡ Corrientes multiplicadas x2 para device {id_device}")
         # Insertar en BD
         insert_query = """
             INSERT INTO pruebas (device_id, ua, ub, uc, ia, ib, ic, time)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """
-        insert_hoy = """
-            INSERT INTO hoy (device_id, ua, ub, uc, ia, ib, ic, time)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        values = (id_device, ua, ub, uc, ia, ib, ic, time_fmt)
+        values = lectura.values(id_device)
+        ia, ib, ic, time_fmt = lectura.ia, lectura.ib, lectura.ic, lectura.time
         cursor.execute(insert_query, values)
-        cursor.execute(insert_hoy, values)
+        # `hoy` solo recibe la lectura mientras no sea la vista de hot_window.py
+        escribir_hoy(cursor, values)
+
+        # Acumulado del día para /report/today-so-far
+        try:
+            aggregator.registrar(cursor, id_device, time_fmt, ia, ib, ic)
+        except mysql.connector.Error as agg_err:
+            logging.error(f"❌ Error en acumulado del día: {agg_err}")
         conn.commit()
 
         logging.info(f"✅ Insertado Device {id_device} | {time_fmt}")
@@ -1,11 +1,13 @@
 """
 Endpoints de autenticación y gestión de usuarios
 """
-from fastapi import HTTPException, APIRouter
+from fastapi import HTTPException, APIRouter, Request
 from pydantic import BaseModel
 from typing import Optional
 
 from .db_utils import get_db_connection
+from .session_cache import cached_session_response, invalidate_usuario
+from .reference_cache import get_modulos_web
 
 
 class UpdateClientNumberRequest(BaseModel):
@@ -40,12 +42,21 @@ auth = APIRouter(prefix="/web", tags=["🔐 Autenticación"])
 
 
 @auth.get("/usuarios/{email}", tags=["🔐 Autenticación"])
-def get_usuario_by_email(email: str):
-    """Obtener usuario por email para autenticación"""
+def get_usuario_by_email(email: str, request: Request):
+    """Obtener usuario por email para autenticación (en caché por usuario, con ETag)"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        return cached_session_response(request, "auth", email, lambda: _load_usuario(email))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching usuario: {str(e)}")
+
 
+def _load_usuario(email: str) -> dict:
+    """Usuario, compresores según su rol y módulos habilitados"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
         # 1. OBTENER USUARIO
         cursor.execute(
             "SELECT id, email, numeroCliente, rol, name FROM usuarios_auth WHERE email = %s",
@@ -82,12 +93,7 @@ def get_usuario_by_email(email: str):
             compresores = cursor.fetchall()
 
         # 3. OBTENER MÓDULOS HABILITADOS PARA EL CLIENTE
-        cursor.execute("""
-            SELECT mantenimiento, reporteDia, reporteSemana, presion, prediccion, kwh
-            FROM modulos_web
-            WHERE numero_cliente = %s
-        """, (numeroCliente,))
-        modulos_row = cursor.fetchone()
+        modulos_row = get_modulos_web(numeroCliente, cursor)
 
         modulos = {}
         if modulos_row:
@@ -100,9 +106,6 @@ def get_usuario_by_email(email: str):
                 "kwh": bool(modulos_row.get('kwh', False))
             }
 
-        cursor.close()
-        conn.close()
-
         return {
             "id": user['id'],
             "email": user['email'],
@@ -112,11 +115,9 @@ def get_usuario_by_email(email: str):
             "compresores": compresores,
             "modulos": modulos
         }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching usuario: {str(e)}")
+    finally:
+        cursor.close()
+        conn.close()
 
 
 @auth.put("/usuarios/update-client-number", tags=["🔧 Operaciones de Administrador"])
@@ -164,6 +165,7 @@ def update_user_client_number(request: UpdateClientNumberRequest):
             )
 
         conn.commit()
+        invalidate_usuario(email=request.email)
 
         return {
             "message": "Número de cliente actualizado exitosamente",
@@ -303,6 +305,7 @@ def update_usuario_auth(id: int, request: UsuarioAuthUpdate):
         values.append(id)
         cursor.execute(f"UPDATE usuarios_auth SET {', '.join(fields)} WHERE id = %s", values)
         conn.commit()
+        invalidate_usuario(user_id=id)
         return {"success": True}
     except HTTPException:
         raise
@@ -329,6 +332,7 @@ def delete_usuario_auth(id: int):
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
         conn.commit()
+        invalidate_usuario(user_id=id)
         return {"success": True}
     except HTTPException:
         raise
@@ -1,7 +1,12 @@
-from fastapi import FastAPI, Path, HTTPException, APIRouter
+from fastapi import FastAPI, Path, HTTPException, APIRouter, Depends
 from fastapi.responses import JSONResponse
 
 from scripts.api.clases import Client, ClienteEventual
+from scripts.api.db_utils import get_db_connection
+from scripts.api.compressor_search import search_index
+from scripts.api.session_cache import invalidate_all
+from scripts.api.reference_cache import CLIENTES, MODULOS_WEB, invalidate as invalidate_reference
+from scripts.api.pagination import PageParams, page_params, build_query, count_rows, split_page, page_response
 
 import mysql.connector
 import os
@@ -15,31 +20,34 @@ DB_DATABASE = os.getenv("DB_DATABASE")
 
 client = APIRouter(prefix="/clients", tags=["Clientes"])
 
+# Columnas de GET /clients/ (SELECT DISTINCT): la fila completa es la clave del cursor
+CLIENT_COLUMNS = ["numero_cliente", "nombre_cliente", "RFC", "direccion", "champion",
+                  "CostokWh", "demoDiario", "demoSemanal"]
+CLIENT_SELECT = f"SELECT DISTINCT {', '.join(CLIENT_COLUMNS)} FROM clientes"
+
+# Orden de la paginación por cursor de GET /clients/
+CLIENT_PAGE_KEYS = [(column, "ASC") for column in CLIENT_COLUMNS]
+
 # Get all clients
 @client.get("/")
-def get_all_clients():
+def get_all_clients(page: PageParams = Depends(page_params)):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute(
-            """SELECT DISTINCT numero_cliente, nombre_cliente, RFC, direccion, champion, CostokWh, demoDiario, demoSemanal
-                FROM clientes;
-            """
-        )
+        query, params = build_query(CLIENT_SELECT, [], [], CLIENT_PAGE_KEYS, page)
+        cursor.execute(query, tuple(params))
 
         res = cursor.fetchall()
+        # Mismas filas que la página: las distintas, no los numero_cliente distintos
+        total = count_rows(cursor, f"FROM ({CLIENT_SELECT}) AS t", [], []) if page.include_total else None
         cursor.close()
         conn.close()
 
-        if not res:
+        if not res and page.cursor is None:
             return {"error": "Check connection to DB or the .env"}
-        
+        res, next_cursor = split_page(res, page, lambda row: tuple(row))
+
         clients = [
             {
                 "numero_cliente": row[0],
@@ -55,9 +63,7 @@ def get_all_clients():
             for row in res
         ]
 
-        return{
-            "data": clients
-        }
+        return page_response(clients, page, next_cursor, total)
     except mysql.connector.Error as err:
         return{"error": str(err)}
 
@@ -67,12 +73,7 @@ def get_all_clients():
 @client.get("/eventuales")
 def get_all_eventuales():
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute("SELECT * FROM clientes_eventuales")
@@ -102,12 +103,7 @@ def get_all_eventuales():
 @client.get("/eventuales/{id}")
 def get_eventual_by_id(id: int = Path(..., description="ID del cliente eventual")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -138,12 +134,7 @@ def get_eventual_by_id(id: int = Path(..., description="ID del cliente eventual"
 @client.post("/eventuales")
 def create_eventual(request: ClienteEventual):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -187,12 +178,7 @@ def create_eventual(request: ClienteEventual):
 @client.put("/eventuales/{id}")
 def update_eventual(id: int = Path(..., description="ID del cliente eventual"), request: ClienteEventual = None):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -233,12 +219,7 @@ def update_eventual(id: int = Path(..., description="ID del cliente eventual"),
 @client.delete("/eventuales/{id}")
 def delete_eventual(id: int = Path(..., description="ID del cliente eventual")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -266,12 +247,7 @@ def delete_eventual(id: int = Path(..., description="ID del cliente eventual")):
 @client.get("/by-id/{id_cliente}")
 def get_client_by_id(id_cliente: int = Path(...,description="ID del Cliente")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -308,12 +284,7 @@ def get_client_by_id(id_cliente: int = Path(...,description="ID del Cliente")):
 @client.get("/{numero_cliente}")
 def get_client_data(numero_cliente: int = Path(...,description="Numero del Cliente")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -350,12 +321,7 @@ def get_client_data(numero_cliente: int = Path(...,description="Numero del Clien
 @client.get("/by-id/{id_cliente}")
 def get_client_by_id(id_cliente: int = Path(...,description="ID del Cliente")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -393,12 +359,7 @@ def get_client_by_id(id_cliente: int = Path(...,description="ID del Cliente")):
 @client.post("/")
 def create_client(request: Client):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute(
@@ -457,6 +418,7 @@ def create_client(request: Client):
         )
 
         conn.commit()
+        invalidate_reference(MODULOS_WEB, request.numero_cliente)
 
         return {
             "success": True,
@@ -486,12 +448,7 @@ def create_client(request: Client):
 @client.put("/{numero_cliente}")
 def update_client(numero_cliente: int = Path(..., description="Numero del cliente"), request: Client = None):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -519,6 +476,10 @@ def update_client(numero_cliente: int = Path(..., description="Numero del client
         )
         
         conn.commit()
+        # El nombre del cliente forma parte de la búsqueda de compresores
+        search_index.refresh_cliente(numero_cliente)
+        invalidate_all()
+        invalidate_reference(CLIENTES)
         return {"success": True, "message": "Cliente actualizado exitosamente"}
     
     except mysql.connector.Error as err:
@@ -535,12 +496,7 @@ def update_client(numero_cliente: int = Path(..., description="Numero del client
 @client.delete("/{numero_cliente}")
 def delete_client(numero_cliente: int = Path(..., description="Numero del cliente")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -552,6 +508,9 @@ def delete_client(numero_cliente: int = Path(..., description="Numero del client
             raise HTTPException(status_code=404, detail="Cliente no encontrado")
         
         conn.commit()
+        search_index.remove_cliente(numero_cliente)
+        invalidate_all()
+        invalidate_reference(CLIENTES)
         return {"success": True, "message": "Cliente eliminado exitosamente"}
     
     except mysql.connector.Error as err:
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Path, HTTPException, APIRouter
+from fastapi import FastAPI, Path, HTTPException, APIRouter, Depends
 from fastapi.responses import JSONResponse
 
 import mysql.connector
@@ -6,6 +6,11 @@ import os
 from dotenv import load_dotenv
 
 from .clases import Compresor, CompresorEventual
+from .db_utils import get_db_connection
+from .compressor_search import search_index
+from .session_cache import invalidate_all
+from .reference_cache import COMPRESORES, invalidate as invalidate_reference
+from .pagination import PageParams, page_params, build_query, count_rows, split_page, page_response
 
 load_dotenv()
 DB_HOST = os.getenv("DB_HOST")
@@ -15,31 +20,34 @@ DB_DATABASE = os.getenv("DB_DATABASE")
 
 compresores = APIRouter(prefix="/compresores", tags=["Compresores"])
 
+# Orden de la paginación por cursor de GET /compresores/
+COMPRESOR_PAGE_KEYS = [("c.id", "ASC")]
+
 @compresores.get("/")
-def get_all_compresores():
+def get_all_compresores(page: PageParams = Depends(page_params)):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute(
+        query, params = build_query(
             """SELECT c.id, c.hp, c.tipo, c.voltaje, c.marca, c.numero_serie,
                       c.anio, c.id_cliente, c.Amp_Load, c.Amp_No_Load,
                       c.proyecto, c.linea, c.LOAD_NO_LOAD, c.Alias, c.fecha_ultimo_mtto,
                       cl.nombre_cliente, cl.numero_cliente 
                FROM compresores c
-               LEFT JOIN clientes cl ON c.id_cliente = cl.id_cliente"""
+               LEFT JOIN clientes cl ON c.id_cliente = cl.id_cliente""",
+            [], [], COMPRESOR_PAGE_KEYS, page
         )
+        cursor.execute(query, tuple(params))
 
         res = cursor.fetchall()
+        total = count_rows(cursor, "FROM compresores", [], []) if page.include_total else None
 
         cursor.close()
         conn.close()
 
+        res, next_cursor = split_page(res, page, lambda row: (row[0],))
+
         compresores = [
             {
                 "id": row[0],
@@ -63,21 +71,14 @@ def get_all_compresores():
             for row in res
         ]
 
-        return{
-            "data": compresores
-        }
+        return page_response(compresores, page, next_cursor, total)
     except mysql.connector.Error as err:
         return{"error": str(err)}
 
 @compresores.get("/{numero_cliente}")
 def get_compresores_cliente(numero_cliente: int = Path(...,description="Numero del Cliente")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -127,49 +128,9 @@ def get_compresores_cliente(numero_cliente: int = Path(...,description="Numero d
 @compresores.get("/compresor-cliente/{query}")
 def search_compresores(query: str = Path(..., description="Número de serie o número de cliente")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
-        cursor = conn.cursor()
-
-        # Search by serial number, client number, client name, or alias
-        cursor.execute(
-            """SELECT c.hp, c.tipo, c.marca, c.numero_serie, c.anio, c.id_cliente, c.Alias , cl.nombre_cliente, cl.numero_cliente
-               FROM compresores c
-               JOIN clientes cl ON cl.id_cliente = c.id_cliente
-               WHERE c.numero_serie LIKE %s OR cl.numero_cliente LIKE %s OR cl.nombre_cliente LIKE %s OR c.Alias LIKE %s
-               LIMIT 20
-            """,
-            (f"%{query}%", f"%{query}%", f"%{query}%", f"%{query}%")
-        )
-
-        res = cursor.fetchall()
-        cursor.close()
-        conn.close()
-
-        if not res:
-            return {"data": []}
-        
-        compresores = [
-            {
-                "hp": row[0],
-                "tipo": row[1],
-                "marca": row[2],
-                "numero_serie": row[3],
-                "anio": row[4],
-                "id_cliente": row[5],
-                "alias": row[6],
-                "nombre_cliente": row[7],
-                "numero_cliente": row[8],
-            }
-            for row in res
-        ]
-        
+        # Search by serial number, client number, client name, or alias (ver compressor_search.py)
         return {
-            "data": compresores
+            "data": search_index.search(query)
         }
     
     except mysql.connector.Error as err:
@@ -179,12 +140,7 @@ def search_compresores(query: str = Path(..., description="Número de serie o n
 @compresores.post("/")
 def create_compresor(request: Compresor):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Check if numero_serie already exists
@@ -244,6 +200,9 @@ def create_compresor(request: Compresor):
         )
 
         conn.commit()
+        search_index.refresh_compresor(next_id)
+        invalidate_all()
+        invalidate_reference(COMPRESORES)
 
         return {
             "success": True,
@@ -273,12 +232,7 @@ def create_compresor(request: Compresor):
 @compresores.put("/{compresor_id}")
 def update_compresor(compresor_id: int = Path(..., description="ID del compresor"), request: Compresor = None):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Check if compresor exists
@@ -318,6 +272,9 @@ def update_compresor(compresor_id: int = Path(..., description="ID del compresor
         )
         
         conn.commit()
+        search_index.refresh_compresor(compresor_id)
+        invalidate_all()
+        invalidate_reference(COMPRESORES)
         return {"success": True, "message": "Compresor actualizado exitosamente"}
     
     except mysql.connector.Error as err:
@@ -334,12 +291,7 @@ def update_compresor(compresor_id: int = Path(..., description="ID del compresor
 @compresores.delete("/{compresor_id}")
 def delete_compresor(compresor_id: int = Path(..., description="ID del compresor")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -351,6 +303,9 @@ def delete_compresor(compresor_id: int = Path(..., description="ID del compresor
             raise HTTPException(status_code=404, detail="Compresor no encontrado")
         
         conn.commit()
+        search_index.refresh_compresor(compresor_id)
+        invalidate_all()
+        invalidate_reference(COMPRESORES)
         return {"success": True, "message": "Compresor eliminado exitosamente"}
     
     except mysql.connector.Error as err:
@@ -369,12 +324,7 @@ def delete_compresor(compresor_id: int = Path(..., description="ID del compresor
 @compresores.get("/eventuales")
 def get_all_compresores_eventuales():
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute("SELECT * FROM compresores_eventuales")
@@ -416,12 +366,7 @@ def get_all_compresores_eventuales():
 @compresores.get("/eventuales/{id}")
 def get_compresor_eventual_by_id(id: int = Path(..., description="ID del compresor eventual")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -464,12 +409,7 @@ def get_compresor_eventual_by_id(id: int = Path(..., description="ID del compres
 @compresores.post("/eventuales")
 def create_compresor_eventual(request: CompresorEventual):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -528,12 +468,7 @@ def create_compresor_eventual(request: CompresorEventual):
 @compresores.put("/eventuales/{id}")
 def update_compresor_eventual(id: int = Path(..., description="ID del compresor eventual"), request: CompresorEventual = None):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -589,12 +524,7 @@ def update_compresor_eventual(id: int = Path(..., description="ID del compresor
 @compresores.delete("/eventuales/{id}")
 def delete_compresor_eventual(id: int = Path(..., description="ID del compresor eventual")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
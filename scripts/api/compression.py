@@ -0,0 +1,204 @@
+"""
+Compresión de respuestas (brotli o gzip) negociada con Accept-Encoding.
+
+Las series por fases, line-data, presión y el detalle semanal son JSON grandes
+que se envían al dashboard y al navegador headless que genera los PDFs. Este
+middleware ASGI comprime las respuestas de texto/JSON que superan un tamaño
+mínimo. Las respuestas en streaming se comprimen por bloques (cada bloque se
+envía en cuanto se comprime). Imágenes, PDFs y respuestas ya codificadas o
+parciales (206) pasan sin cambios.
+
+Si el paquete `brotli` no está instalado solo se ofrece gzip.
+
+Environment:
+    COMPRESSION_MIN_SIZE  Bytes mínimos para comprimir (default: 1024)
+    GZIP_LEVEL            Nivel de gzip 1-9 (default: 6)
+    BROTLI_QUALITY        Calidad de brotli 0-11 (default: 4)
+"""
+import os
+import zlib
+from typing import Optional
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Bloques mayores a esto se comprimen en un hilo para no bloquear el event loop
+THREAD_MIN_SIZE = 256 * 1024
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Elige 'br', 'gzip' o None según Accept-Encoding (respeta q=0 y '*').
+    Con igual preferencia se prefiere brotli.
+    """
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+
+    wildcard = weights.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _is_compressible(content_type: str) -> bool:
+    content_type = content_type.partition(";")[0].strip().lower()
+    return any(content_type.startswith(t) for t in COMPRESSIBLE_TYPES)
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, body: bytes, final: bool) -> bytes:
+        flush_mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(body) + self._compressor.flush(flush_mode)
+
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, body: bytes, final: bool) -> bytes:
+        data = self._compressor.process(body)
+        return data + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class CompressionMiddleware:
+    """Middleware ASGI de compresión gzip/brotli"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE,
+                 gzip_level: int = GZIP_LEVEL, brotli_quality: int = BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await _CompressingResponder(self, encoding, send).run(scope, receive)
+
+    def new_stream(self, encoding: str):
+        if encoding == "br":
+            return _BrotliStream(self.brotli_quality)
+        return _GzipStream(self.gzip_level)
+
+
+class _CompressingResponder:
+    """Estado de una respuesta: decide si se comprime al ver el primer bloque"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start_message = None
+        self.passthrough = False
+        self.stream = None
+        self.pending = b""
+
+    async def run(self, scope, receive):
+        await self.middleware.app(scope, receive, self.send_wrapper)
+
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        if len(body) >= THREAD_MIN_SIZE:
+            return await anyio.to_thread.run_sync(self.stream.compress, body, final)
+        return self.stream.compress(body, final)
+
+    async def send_wrapper(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.start_message = message
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 206, 304)
+                or not _is_compressible(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if message_type != "http.response.body":
+            # p. ej. http.response.pathsend: se envía tal cual, sin comprimir
+            self.passthrough = True
+            await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.stream is None:
+            # Un primer bloque chico en streaming no basta para decidir: se acumula
+            # hasta superar el mínimo o hasta el final de la respuesta
+            body = self.pending + body
+            if more_body and len(body) < self.middleware.minimum_size:
+                self.pending = body
+                return
+            self.pending = b""
+
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+
+            self.stream = self.middleware.new_stream(self.encoding)
+            headers["Content-Encoding"] = self.encoding
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            compressed = await self._compress(body, final=not more_body)
+            if not more_body:
+                headers["Content-Length"] = str(len(compressed))
+            await self.send(self.start_message)
+            await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            return
+
+        compressed = await self._compress(body, final=not more_body)
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
@@ -0,0 +1,281 @@
+"""
+Índice de búsqueda de compresores en memoria.
+
+GET /compresores/compresor-cliente/{query} se llama en cada tecla del buscador
+del frontend. Antes eran cuatro `LIKE '%q%'` sobre compresores JOIN clientes, que
+MySQL no puede resolver con índice. Aquí se cargan una vez los compresores con
+su cliente y se indexan todas las subcadenas de 1 a 3 caracteres de
+numero_serie, numero_cliente, nombre_cliente y Alias (sin mayúsculas ni
+acentos, igual que la collation de MySQL). Una búsqueda intersecta los
+trigramas de la consulta, verifica la subcadena y ordena por relevancia:
+
+    coincidencia exacta > prefijo > inicio de palabra > subcadena
+    numero_serie > numero_cliente > Alias > nombre_cliente
+
+Los endpoints que crean, editan o borran compresores y clientes llaman a
+refresh_compresor / refresh_serie / refresh_cliente / remove_cliente. Cada
+proceso de uvicorn tiene su propio índice, así que además se reconstruye
+completo cuando tiene más de COMPRESSOR_SEARCH_TTL segundos (cambios hechos en
+otro worker o fuera de la API). Esa reconstrucción corre en un hilo (una a la
+vez) mientras las búsquedas siguen usando el índice anterior; solo la primera
+carga del proceso hace esperar a la búsqueda.
+
+Environment:
+    COMPRESSOR_SEARCH_TTL  Segundos antes de reconstruir el índice (default: 300)
+"""
+import os
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Set
+
+import mysql.connector
+
+from .db_utils import get_db_connection
+
+COMPRESSOR_SEARCH_TTL = int(os.getenv("COMPRESSOR_SEARCH_TTL", "300"))
+MAX_GRAM = 3
+DEFAULT_LIMIT = 20
+
+SEARCH_SQL = """
+    SELECT c.id, c.hp, c.tipo, c.marca, c.numero_serie, c.anio, c.id_cliente, c.Alias,
+           cl.nombre_cliente, cl.numero_cliente
+    FROM compresores c
+    JOIN clientes cl ON cl.id_cliente = c.id_cliente
+"""
+
+# (campo del documento, peso para desempatar entre campos)
+SEARCH_FIELDS = (
+    ("numero_serie", 4),
+    ("numero_cliente", 3),
+    ("alias", 2),
+    ("nombre_cliente", 1),
+)
+
+MATCH_EXACT = 4
+MATCH_PREFIX = 3
+MATCH_WORD = 2
+MATCH_SUBSTRING = 1
+
+WORD_SEPARATORS = (" ", "-", "_", ".", "/")
+
+
+def normalize(value) -> str:
+    """Minúsculas y sin acentos (como utf8mb4_general_ci)"""
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(value).strip().lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _grams(text: str) -> Set[str]:
+    grams = set()
+    for size in range(1, MAX_GRAM + 1):
+        for i in range(len(text) - size + 1):
+            grams.add(text[i:i + size])
+    return grams
+
+
+def _row_to_doc(row) -> dict:
+    return {
+        "id": row[0],
+        "hp": row[1],
+        "tipo": row[2],
+        "marca": row[3],
+        "numero_serie": row[4],
+        "anio": row[5],
+        "id_cliente": row[6],
+        "alias": row[7],
+        "nombre_cliente": row[8],
+        "numero_cliente": row[9],
+    }
+
+
+def _match_rank(value: str, query: str) -> int:
+    if not value or query not in value:
+        return 0
+    if value == query:
+        return MATCH_EXACT
+    if value.startswith(query):
+        return MATCH_PREFIX
+    if any(sep + query in value for sep in WORD_SEPARATORS):
+        return MATCH_WORD
+    return MATCH_SUBSTRING
+
+
+class CompressorSearchIndex:
+    """Índice de subcadenas (1..3 caracteres) sobre compresores y su cliente"""
+
+    def __init__(self, ttl: int = COMPRESSOR_SEARCH_TTL):
+        self.ttl = ttl
+        self._docs: Dict[int, dict] = {}
+        self._keys: Dict[int, Dict[str, str]] = {}
+        self._grams: Dict[str, Set[int]] = {}
+        self._built_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()  # una reconstrucción completa a la vez
+        self._ready = False
+        self._changes = 0
+
+    # ----- Construcción y mantenimiento -----
+
+    def _fetch(self, where: str = "", params: tuple = ()) -> List[dict]:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(SEARCH_SQL + (f" WHERE {where}" if where else ""), params)
+            return [_row_to_doc(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _add(self, doc: dict) -> None:
+        keys = {field: normalize(doc[field]) for field, _ in SEARCH_FIELDS}
+        self._docs[doc["id"]] = doc
+        self._keys[doc["id"]] = keys
+        for gram in set().union(*(_grams(value) for value in keys.values())):
+            self._grams.setdefault(gram, set()).add(doc["id"])
+
+    def _remove(self, compresor_id: int) -> None:
+        keys = self._keys.pop(compresor_id, None)
+        self._docs.pop(compresor_id, None)
+        if keys is None:
+            return
+        for gram in set().union(*(_grams(value) for value in keys.values())):
+            ids = self._grams.get(gram)
+            if ids is not None:
+                ids.discard(compresor_id)
+                if not ids:
+                    del self._grams[gram]
+
+    def rebuild(self) -> int:
+        """Carga todos los compresores; devuelve cuántos quedaron indexados"""
+        with self._rebuild_lock:
+            return self._rebuild()
+
+    def _rebuild(self) -> int:
+        changes = self._changes
+        # Se arma aparte para que las búsquedas sigan usando el índice actual
+        staging = CompressorSearchIndex(self.ttl)
+        for doc in self._fetch():
+            staging._add(doc)
+        with self._lock:
+            self._docs, self._keys, self._grams = staging._docs, staging._keys, staging._grams
+            # Un refresh_* aplicado durante la carga no está en `docs`: otra vuelta
+            self._built_at = time.monotonic() if self._changes == changes else None
+            self._ready = True
+            return len(self._docs)
+
+    def _rebuild_in_background(self) -> None:
+        try:
+            self._rebuild()
+        except Exception as err:
+            print(f"⚠️  Compressor search index rebuild failed: {err}")
+        finally:
+            self._rebuild_lock.release()
+
+    def _is_stale(self) -> bool:
+        return self._built_at is None or time.monotonic() - self._built_at > self.ttl
+
+    def _ensure_fresh(self) -> None:
+        if not self._is_stale():
+            return
+        if not self._ready:
+            # Primera carga: no hay índice que servir mientras tanto
+            with self._rebuild_lock:
+                if not self._ready:
+                    self._rebuild()
+            return
+        if self._rebuild_lock.acquire(blocking=False):
+            threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def _fetch_changed(self, where: str, params: tuple) -> Optional[List[dict]]:
+        # Si falla la lectura la escritura ya se hizo: el índice se marca viejo y
+        # la siguiente búsqueda lo reconstruye completo
+        try:
+            return self._fetch(where, params)
+        except mysql.connector.Error as err:
+            print(f"⚠️  Compressor search index refresh failed: {err}")
+            self._built_at = None
+            return None
+
+    def _replace(self, current_ids: Set[int], docs: Optional[List[dict]]) -> None:
+        if docs is None:
+            return
+        with self._lock:
+            self._changes += 1
+            for compresor_id in current_ids:
+                self._remove(compresor_id)
+            for doc in docs:
+                self._remove(doc["id"])
+                self._add(doc)
+
+    def refresh_compresor(self, compresor_id: int) -> None:
+        """Vuelve a leer un compresor (alta, cambio o baja)"""
+        if self._built_at is None:
+            return
+        self._replace({compresor_id}, self._fetch_changed("c.id = %s", (compresor_id,)))
+
+    def refresh_serie(self, numero_serie: str) -> None:
+        """Vuelve a leer el compresor con ese número de serie"""
+        if self._built_at is None or not numero_serie:
+            return
+        with self._lock:
+            current = {cid for cid, doc in self._docs.items() if doc["numero_serie"] == numero_serie}
+        self._replace(current, self._fetch_changed("c.numero_serie = %s", (numero_serie,)))
+
+    def refresh_cliente(self, numero_cliente: int) -> None:
+        """Vuelve a leer los compresores de un cliente (p. ej. cambió su nombre)"""
+        if self._built_at is None:
+            return
+        with self._lock:
+            current = {cid for cid, doc in self._docs.items() if doc["numero_cliente"] == numero_cliente}
+        self._replace(current, self._fetch_changed("cl.numero_cliente = %s", (numero_cliente,)))
+
+    def remove_cliente(self, numero_cliente: int) -> None:
+        """Quita del índice los compresores de un cliente borrado"""
+        with self._lock:
+            self._changes += 1
+            for cid in [cid for cid, doc in self._docs.items() if doc["numero_cliente"] == numero_cliente]:
+                self._remove(cid)
+
+    # ----- Búsqueda -----
+
+    def _candidates(self, query: str) -> Set[int]:
+        if len(query) <= MAX_GRAM:
+            return set(self._grams.get(query, ()))
+        sets = []
+        for i in range(len(query) - MAX_GRAM + 1):
+            ids = self._grams.get(query[i:i + MAX_GRAM])
+            if not ids:
+                return set()
+            sets.append(ids)
+        sets.sort(key=len)
+        return set(sets[0]).intersection(*sets[1:])
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[dict]:
+        """Compresores cuyo serie, número de cliente, nombre o alias contienen `query`, por relevancia"""
+        self._ensure_fresh()
+        query = normalize(query)
+        if not query:
+            return []
+
+        scored = []
+        with self._lock:
+            for compresor_id in self._candidates(query):
+                keys = self._keys[compresor_id]
+                best = None
+                for field, weight in SEARCH_FIELDS:
+                    rank = _match_rank(keys[field], query)
+                    if rank:
+                        score = (rank, weight, -len(keys[field]))
+                        if best is None or score > best:
+                            best = score
+                if best is not None:
+                    scored.append((best, keys["numero_serie"], self._docs[compresor_id]))
+
+        scored.sort(key=lambda item: (tuple(-x for x in item[0]), item[1]))
+        return [{k: v for k, v in doc.items() if k != "id"} for _, _, doc in scored[:limit]]
+
+
+search_index = CompressorSearchIndex()
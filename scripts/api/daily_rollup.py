@@ -0,0 +1,397 @@
+"""
+Resumen diario por compresor (tabla `daily_rollup`).
+
+Los reportes semanales llaman a semanaGeneralFP, que recalcula estados, kWh,
+horas LOAD/NOLOAD y ciclos desde las lecturas crudas de `pruebas` de 13 semanas
+en cada petición. Aquí, una vez cerrado el día, se guarda por (id_cliente,
+linea, fecha) lo que DFDFTest calcula para ese día, más el reparto de kWh y de
+registros por estado, así que una semana se arma con 7 filas y el comparativo
+de 12 semanas con 84.
+
+Cierre del día anterior (cron diario, después de medianoche):
+    python -m scripts.api.daily_rollup --cerrar
+
+Backfill (se puede ejecutar varias veces; recalcula y sobrescribe):
+    python -m scripts.api.daily_rollup --desde 2025-01-01 [--hasta 2025-06-30]
+        [--cliente 7] [--linea A] [--dry-run]
+
+Mientras falte algún día del rango en la tabla, semana_general() usa el
+procedimiento como antes.
+
+kwh_por_periodo() (GET /report/kwh-rango) suma el kWh diario de varios
+clientes por día, semana o mes. Los rollups se guardan en memoria por
+(id_cliente, año), así que un año completo sale de una consulta por cliente y
+las siguientes peticiones no tocan MySQL hasta que vence KWH_CACHE_TTL. Esa
+caché vive en cada proceso de la API y el cierre / backfill corre en otro, así
+que un día recalculado aparece en /report/kwh-rango a más tardar KWH_CACHE_TTL
+segundos después (no hay invalidación entre procesos).
+
+Environment:
+    KWH_CACHE_TTL  Segundos que se guarda en memoria el kWh diario por cliente y año (default: 900)
+"""
+import argparse
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import mysql.connector
+
+from .db_utils import get_db_connection
+from .reference_cache import TableCache, get_compresor_specs
+
+DAILY_ROLLUP_TABLE = "daily_rollup"
+
+# Semanas previas contra las que se compara la semana del reporte
+SEMANAS_ANTERIORES = 12
+
+GRANULARIDADES = ("dia", "semana", "mes")
+
+# kWh diario por (id_cliente, año): {linea: {fecha: kWh}}
+_kwh_cache = TableCache(DAILY_ROLLUP_TABLE, int(os.getenv("KWH_CACHE_TTL", "900")))
+
+DAILY_ROLLUP_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {DAILY_ROLLUP_TABLE} (
+        id_cliente INT NOT NULL,
+        linea VARCHAR(16) NOT NULL,
+        fecha DATE NOT NULL,
+        inicio DATETIME NULL,
+        fin DATETIME NULL,
+        horas_trabajadas DOUBLE NOT NULL DEFAULT 0,
+        kWh DOUBLE NOT NULL DEFAULT 0,
+        kWh_load DOUBLE NOT NULL DEFAULT 0,
+        kWh_noload DOUBLE NOT NULL DEFAULT 0,
+        horas_load DOUBLE NOT NULL DEFAULT 0,
+        horas_noload DOUBLE NOT NULL DEFAULT 0,
+        horas_off DOUBLE NOT NULL DEFAULT 0,
+        hp_equivalente DOUBLE NOT NULL DEFAULT 0,
+        ciclos INT NOT NULL DEFAULT 0,
+        promedio_ciclos_hora DOUBLE NOT NULL DEFAULT 0,
+        registros_load INT NOT NULL DEFAULT 0,
+        registros_noload INT NOT NULL DEFAULT 0,
+        registros_off INT NOT NULL DEFAULT 0,
+        fecha_calculo DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (id_cliente, linea, fecha)
+    )
+"""
+
+ROLLUP_COLUMNS = [
+    "inicio", "fin", "horas_trabajadas", "kWh", "kWh_load", "kWh_noload",
+    "horas_load", "horas_noload", "horas_off", "hp_equivalente", "ciclos",
+    "promedio_ciclos_hora", "registros_load", "registros_noload", "registros_off",
+]
+
+# Columnas de semanaGeneralFP / selectSemanaGeneralFP
+SEMANA_COLUMNS = [
+    "semana", "fecha", "kWh", "horas_trabajadas", "kWh_load", "horas_load",
+    "kWh_noload", "horas_noload", "hp_equivalente", "conteo_ciclos", "promedio_ciclos_por_hora"
+]
+
+
+def ensure_daily_rollup_table() -> None:
+    """Crea la tabla de resúmenes si no existe"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(DAILY_ROLLUP_DDL)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def _as_datetime(fecha: date, value) -> Optional[datetime]:
+    """inicio/fin de DFDFTest pueden venir como DATETIME, TIME o timedelta"""
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, timedelta):
+        return datetime.combine(fecha, time()) + value
+    if isinstance(value, time):
+        return datetime.combine(fecha, value)
+    return None
+
+
+def compute_day(cursor, id_cliente: int, linea: str, fecha: date) -> dict:
+    """
+    Resumen de un día cerrado a partir de DFDFTest.
+
+    El kWh total, horas, hp equivalente y ciclos son los del procedimiento; el
+    kWh se reparte entre LOAD y NOLOAD según la corriente acumulada en cada
+    estado. Un día sin lecturas queda con todo en cero.
+    """
+    cursor.execute("CALL DFDFTest(%s, %s, %s, %s)", (id_cliente, id_cliente, linea, fecha))
+    rows = cursor.fetchall()
+    cursor.nextset()
+    summary = cursor.fetchone()
+    while cursor.nextset():
+        pass
+
+    rollup = {column: 0 for column in ROLLUP_COLUMNS}
+    rollup.update(inicio=None, fin=None)
+    if not summary:
+        return rollup
+
+    (_, inicio, fin, horas_trab, kWh, horas_load, horas_noload,
+     hp_equivalente, ciclos, prom_ciclos_hora) = summary
+
+    corriente = {"LOAD": 0.0, "NOLOAD": 0.0, "OFF": 0.0}
+    registros = {"LOAD": 0, "NOLOAD": 0, "OFF": 0}
+    for row in rows:
+        estado = row[3]
+        if estado in registros:
+            registros[estado] += 1
+            corriente[estado] += float(row[2] or 0)
+
+    kWh = float(kWh or 0)
+    corriente_total = corriente["LOAD"] + corriente["NOLOAD"] + corriente["OFF"]
+    specs = get_compresor_specs(id_cliente, linea, cursor)
+    segundos = specs.segundos_por_registro if specs and specs.segundos_por_registro else 30
+
+    rollup.update(
+        inicio=_as_datetime(fecha, inicio),
+        fin=_as_datetime(fecha, fin),
+        horas_trabajadas=float(horas_trab or 0),
+        kWh=kWh,
+        kWh_load=kWh * corriente["LOAD"] / corriente_total if corriente_total else 0,
+        kWh_noload=kWh * corriente["NOLOAD"] / corriente_total if corriente_total else 0,
+        horas_load=float(horas_load or 0),
+        horas_noload=float(horas_noload or 0),
+        horas_off=registros["OFF"] * segundos / 3600,
+        hp_equivalente=float(hp_equivalente or 0),
+        ciclos=int(ciclos or 0),
+        promedio_ciclos_hora=float(prom_ciclos_hora or 0),
+        registros_load=registros["LOAD"],
+        registros_noload=registros["NOLOAD"],
+        registros_off=registros["OFF"],
+    )
+    return rollup
+
+
+def store_rollup(cursor, id_cliente: int, linea: str, fecha: date, rollup: dict) -> None:
+    """Inserta o reemplaza el resumen del día (idempotente)"""
+    columns = ["id_cliente", "linea", "fecha"] + ROLLUP_COLUMNS
+    cursor.execute(f"""
+        INSERT INTO {DAILY_ROLLUP_TABLE} ({", ".join(columns)})
+        VALUES ({", ".join(["%s"] * len(columns))})
+        ON DUPLICATE KEY UPDATE {", ".join(f"{c} = VALUES({c})" for c in ROLLUP_COLUMNS)}
+    """, (id_cliente, linea, fecha) + tuple(rollup[c] for c in ROLLUP_COLUMNS))
+
+
+def _devices(cursor, id_cliente: Optional[int] = None, linea: Optional[str] = None) -> List[Tuple[int, str]]:
+    where = ["linea IS NOT NULL"]
+    params = []
+    if id_cliente is not None:
+        where.append("id_cliente = %s")
+        params.append(id_cliente)
+    if linea is not None:
+        where.append("linea = %s")
+        params.append(linea)
+    cursor.execute(
+        f"SELECT DISTINCT id_cliente, linea FROM compresores WHERE {' AND '.join(where)} ORDER BY id_cliente, linea",
+        tuple(params),
+    )
+    return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def _days(desde: date, hasta: date) -> Iterable[date]:
+    for offset in range((hasta - desde).days + 1):
+        yield desde + timedelta(days=offset)
+
+
+def backfill(desde: date, hasta: Optional[date] = None, id_cliente: Optional[int] = None,
+             linea: Optional[str] = None, dry_run: bool = False) -> int:
+    """
+    Calcula y guarda los resúmenes de [desde, hasta] (por defecto hasta ayer).
+
+    Solo se calculan días cerrados. Devuelve cuántos (compresor, día) se procesaron.
+    """
+    ayer = date.today() - timedelta(days=1)
+    hasta = min(hasta or ayer, ayer)
+    if not dry_run:
+        ensure_daily_rollup_table()
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    total = 0
+    errores = 0
+    try:
+        devices = _devices(cursor, id_cliente, linea)
+        for cid, line in devices:
+            for fecha in _days(desde, hasta):
+                if dry_run:
+                    total += 1
+                    continue
+                try:
+                    store_rollup(cursor, cid, line, fecha, compute_day(cursor, cid, line, fecha))
+                    conn.commit()
+                    total += 1
+                except mysql.connector.Error as err:
+                    conn.rollback()
+                    errores += 1
+                    print(f"⚠️  Rollup {cid}/{line} {fecha}: {err}")
+    finally:
+        cursor.close()
+        conn.close()
+
+    print(f"{'🔎 [dry-run]' if dry_run else '✅'} {total} día(s) de {len(devices)} compresor(es) "
+          f"entre {desde} y {hasta}" + (f", {errores} con error" if errores else ""))
+    return total
+
+
+def close_day(fecha: Optional[date] = None) -> int:
+    """Cierra un día (por defecto ayer) para todos los compresores"""
+    fecha = fecha or date.today() - timedelta(days=1)
+    return backfill(fecha, fecha)
+
+
+def fetch_rollups(cursor, id_cliente: int, linea: str, desde: date, hasta: date) -> List[dict]:
+    """Filas de daily_rollup de [desde, hasta] ordenadas por fecha"""
+    columns = ["fecha"] + ROLLUP_COLUMNS
+    cursor.execute(f"""
+        SELECT {", ".join(columns)}
+        FROM {DAILY_ROLLUP_TABLE}
+        WHERE id_cliente = %s AND linea = %s AND fecha BETWEEN %s AND %s
+        ORDER BY fecha
+    """, (id_cliente, linea, desde, hasta))
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _semana_desde_rollups(cursor, id_cliente: int, linea: str, lunes: date, signo: int) -> Optional[List[dict]]:
+    desde = lunes - timedelta(weeks=SEMANAS_ANTERIORES)
+    hasta = lunes + timedelta(days=6)
+    try:
+        rows = fetch_rollups(cursor, id_cliente, linea, desde, hasta)
+    except mysql.connector.Error:
+        # Tabla aún no creada: se usa el procedimiento
+        return None
+    if len(rows) != (hasta - desde).days + 1:
+        return None
+    return [
+        {
+            "semana": signo * (((lunes - r["fecha"]).days + 6) // 7),
+            "fecha": r["fecha"],
+            "kWh": r["kWh"],
+            "horas_trabajadas": r["horas_trabajadas"],
+            "kWh_load": r["kWh_load"],
+            "horas_load": r["horas_load"],
+            "kWh_noload": r["kWh_noload"],
+            "horas_noload": r["horas_noload"],
+            "hp_equivalente": r["hp_equivalente"],
+            "conteo_ciclos": r["ciclos"],
+            "promedio_ciclos_por_hora": r["promedio_ciclos_hora"],
+        }
+        for r in rows
+    ]
+
+
+def semana_general(cursor, id_cliente: int, linea: str, fecha: Optional[str] = None) -> List[dict]:
+    """
+    Filas por día de la semana del reporte y las 12 anteriores, con las columnas
+    de semanaGeneralFP.
+
+    Sin `fecha` es la semana anterior (lunes a domingo) con semana = 0, 1, ...
+    hacia atrás, como semanaGeneralFP. Con `fecha` es la semana que la contiene
+    y la numeración es la de selectSemanaGeneralFP (la semana elegida es la
+    mayor). Si daily_rollup no tiene todos los días se llama al procedimiento.
+    """
+    if fecha:
+        dia = datetime.strptime(fecha, "%Y-%m-%d").date()
+        lunes = dia - timedelta(days=dia.weekday())
+    else:
+        hoy = date.today()
+        lunes = hoy - timedelta(days=hoy.weekday() + 7)
+
+    data = _semana_desde_rollups(cursor, id_cliente, linea, lunes, -1 if fecha else 1)
+    if data is not None:
+        return data
+
+    if fecha:
+        cursor.execute("CALL selectSemanaGeneralFP(%s,%s, %s, %s)", (id_cliente, id_cliente, linea, fecha))
+    else:
+        cursor.execute("CALL semanaGeneralFP(%s,%s, %s)", (id_cliente, id_cliente, linea))
+    results = cursor.fetchall()
+    while cursor.nextset():
+        pass
+    return [dict(zip(SEMANA_COLUMNS, row)) for row in results]
+
+
+def _kwh_año(cursor, id_cliente: int, año: int) -> Dict[str, Dict[date, float]]:
+    """{linea: {fecha: kWh}} de un cliente y año, desde la caché o daily_rollup"""
+    def load():
+        cursor.execute(f"""
+            SELECT linea, fecha, kWh
+            FROM {DAILY_ROLLUP_TABLE}
+            WHERE id_cliente = %s AND fecha >= %s AND fecha < %s
+        """, (id_cliente, date(año, 1, 1), date(año + 1, 1, 1)))
+        lineas: Dict[str, Dict[date, float]] = {}
+        for linea, fecha, kwh in cursor.fetchall():
+            lineas.setdefault(linea, {})[fecha] = float(kwh)
+        return lineas
+
+    return _kwh_cache.get((id_cliente, año), load)
+
+
+def _inicio_periodo(fecha: date, granularidad: str) -> date:
+    if granularidad == "semana":
+        return fecha - timedelta(days=fecha.weekday())
+    if granularidad == "mes":
+        return fecha.replace(day=1)
+    return fecha
+
+
+def kwh_por_periodo(cursor, clientes: List[int], desde: date, hasta: date,
+                    granularidad: str = "dia", linea: Optional[str] = None) -> List[dict]:
+    """
+    kWh de [desde, hasta] por compresor y periodo, desde daily_rollup.
+
+    Args:
+        clientes: id_cliente a incluir
+        granularidad: "dia", "semana" (desde el lunes) o "mes"
+        linea: Solo esta línea (default: todas las del cliente)
+
+    Returns:
+        [{"id_cliente", "linea", "periodo", "kWh", "dias"}] ordenadas; `dias` es
+        cuántos días del periodo tienen rollup (los que faltan no suman)
+    """
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f"Granularidad inválida: {granularidad} (usar {', '.join(GRANULARIDADES)})")
+
+    totales: Dict[Tuple[int, str, date], List[float]] = {}
+    for id_cliente in dict.fromkeys(clientes):
+        for año in range(desde.year, hasta.year + 1):
+            for line, dias in _kwh_año(cursor, id_cliente, año).items():
+                if linea is not None and line != linea:
+                    continue
+                for fecha, kwh in dias.items():
+                    if desde <= fecha <= hasta:
+                        total = totales.setdefault((id_cliente, line, _inicio_periodo(fecha, granularidad)), [0.0, 0])
+                        total[0] += kwh
+                        total[1] += 1
+
+    return [
+        {"id_cliente": id_cliente, "linea": line, "periodo": periodo, "kWh": round(kwh, 2), "dias": dias}
+        for (id_cliente, line, periodo), (kwh, dias) in sorted(totales.items())
+    ]
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resúmenes diarios por compresor (daily_rollup)")
+    parser.add_argument("--init", action="store_true", help="Crea la tabla daily_rollup")
+    parser.add_argument("--cerrar", action="store_true", help="Calcula el día anterior para todos los compresores")
+    parser.add_argument("--desde", type=_parse_date, help="Primer día del backfill (YYYY-MM-DD)")
+    parser.add_argument("--hasta", type=_parse_date, help="Último día del backfill (default: ayer)")
+    parser.add_argument("--cliente", type=int, help="Solo este id_cliente")
+    parser.add_argument("--linea", help="Solo esta línea")
+    parser.add_argument("--dry-run", action="store_true", help="Solo cuenta, no escribe en la base de datos")
+    args = parser.parse_args()
+
+    if args.init:
+        ensure_daily_rollup_table()
+        print(f"✅ Tabla {DAILY_ROLLUP_TABLE} lista")
+    if args.cerrar:
+        close_day()
+    if args.desde:
+        backfill(args.desde, args.hasta, args.cliente, args.linea, dry_run=args.dry_run)
+    if not (args.init or args.cerrar or args.desde):
+        parser.print_help()
@@ -3,11 +3,20 @@ Utilidades de base de datos y funciones auxiliares compartidas
 """
 import mysql.connector
 import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dotenv import load_dotenv
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
 import pandas as pd
 import numpy as np
-from datetime import date, timedelta
-from typing import List, Tuple, Optional
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Sequence, Tuple, Optional, Union
+
+from .metrics import record_db_call, record_pool_wait
+from .query_profiler import StatementTimer
 
 load_dotenv()
 
@@ -16,20 +25,291 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_DATABASE = os.getenv("DB_DATABASE")
 
+# Pool compartido para trabajo concurrente (ver pooled_connections)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# Filas por fetchmany() en las lecturas en streaming (ver leer_columnas)
+DB_STREAM_CHUNK = int(os.getenv("DB_STREAM_CHUNK", "5000"))
+
+# Días que lee obtener_datos_presion sin fecha, hasta la última lectura del RTU
+PRESION_MAX_DIAS = int(os.getenv("PRESION_MAX_DIAS", "31"))
+
 # Constantes compartidas
 FP = 0.9
 HORAS = 24
 COLORES = ['purple', 'orange', 'blue', 'green', 'red', 'cyan', 'brown', 'magenta', 'teal', 'lime', 'pink', 'gold']
 
 
-def get_db_connection():
-    """Obtiene una conexión a la base de datos"""
-    return mysql.connector.connect(
-        host=DB_HOST,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_DATABASE
-    )
+_pool = None
+_pool_lock = threading.Lock()
+
+# Conexiones entregadas dentro de pooled_connections(); None fuera de ese bloque
+_pooled_scope: ContextVar[Optional[list]] = ContextVar("db_pooled_scope", default=None)
+
+
+def _get_pool() -> pooling.MySQLConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = pooling.MySQLConnectionPool(
+                pool_name="ventologix_api",
+                pool_size=DB_POOL_SIZE,
+                pool_reset_session=True,
+                host=DB_HOST,
+                user=DB_USER,
+                password=DB_PASSWORD,
+                database=DB_DATABASE,
+                consume_results=True,
+            )
+        return _pool
+
+
+def _get_pooled_connection():
+    """Conexión del pool; si está agotado espera hasta DB_POOL_TIMEOUT segundos"""
+    pool = _get_pool()
+    deadline = time.monotonic() + DB_POOL_TIMEOUT
+    while True:
+        try:
+            return pool.get_connection()
+        except PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.01)
+
+
+@contextmanager
+def pooled_connections():
+    """
+    Dentro del bloque, get_db_connection() toma conexiones del pool compartido
+    (DB_POOL_SIZE) en lugar de abrir una nueva. Al salir se devuelven al pool las
+    que el código no haya cerrado (p. ej. un endpoint que regresa antes del close).
+
+        with pooled_connections():
+            resultado = get_daily_report(id_cliente, linea)
+    """
+    issued = []
+    token = _pooled_scope.set(issued)
+    try:
+        yield
+    finally:
+        _pooled_scope.reset(token)
+        for conn in issued:
+            try:
+                conn.close()
+            except mysql.connector.Error as err:
+                print(f"⚠️  Error returning pooled connection: {err}")
+
+
+def get_db_connection(database: Optional[str] = None):
+    """
+    Obtiene una conexión a la base de datos.
+
+    La conexión está instrumentada (ver metrics.py): el tiempo para obtenerla y el
+    de cada execute/callproc/fetch/commit se suma a la petición HTTP en curso.
+    Dentro de pooled_connections() la conexión sale del pool compartido.
+    """
+    scope = _pooled_scope.get()
+    start = time.perf_counter()
+    if scope is not None and database is None:
+        conn = InstrumentedConnection(_get_pooled_connection())
+        scope.append(conn)
+    else:
+        conn = InstrumentedConnection(mysql.connector.connect(
+            host=DB_HOST,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            database=database or DB_DATABASE
+        ))
+    record_pool_wait(time.perf_counter() - start)
+    return conn
+
+
+class InstrumentedCursor:
+    """
+    Cursor que mide cada llamada a MySQL; el resto se delega al cursor real.
+
+    Además de metrics.py, cada sentencia (execute/callproc más sus fetch) se
+    reporta a query_profiler.py con su texto, parámetros y filas devueltas.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._statement = None
+
+    def _timed(self, kind: str, method, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            record_db_call(kind, elapsed)
+            if self._statement is not None:
+                self._statement.elapsed += elapsed
+
+    def _begin_statement(self, kind: str, statement, params) -> None:
+        self._end_statement()
+        self._statement = StatementTimer(kind, statement, params)
+
+    def _end_statement(self) -> None:
+        statement, self._statement = self._statement, None
+        if statement is not None:
+            statement.finish()
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._begin_statement("query", operation, params)
+        result = self._timed("query", self._cursor.execute, operation, params, *args, **kwargs)
+        if not getattr(self._cursor, "with_rows", False):
+            self._statement.rows = self._cursor.rowcount
+            self._end_statement()
+        return result
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        self._begin_statement("query", operation, f"<{len(seq_params)} filas>")
+        result = self._timed("query", self._cursor.executemany, operation, seq_params, *args, **kwargs)
+        self._statement.rows = self._cursor.rowcount
+        self._end_statement()
+        return result
+
+    def callproc(self, procname, args=(), *rest, **kwargs):
+        self._begin_statement("procedure", procname, args)
+        result = self._timed("procedure", self._cursor.callproc, procname, args, *rest, **kwargs)
+        # Los resultados del procedimiento ya vienen completos (cursores con buffer)
+        try:
+            self._statement.rows = sum(max(r.rowcount, 0) for r in self._cursor.stored_results())
+        except Exception:
+            pass
+        self._end_statement()
+        return result
+
+    def fetchone(self):
+        row = self._timed("fetch", self._cursor.fetchone)
+        if self._statement is not None:
+            if row is None:
+                self._end_statement()
+            else:
+                self._statement.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._timed("fetch", self._cursor.fetchmany, *args, **kwargs)
+        if self._statement is not None:
+            self._statement.rows += len(rows)
+            if not rows:
+                self._end_statement()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed("fetch", self._cursor.fetchall)
+        if self._statement is not None:
+            self._statement.rows += len(rows)
+            self._end_statement()
+        return rows
+
+    def close(self):
+        self._end_statement()
+        return self._cursor.close()
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class InstrumentedConnection:
+    """Conexión cuyos cursores están instrumentados; el resto se delega"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._closed = False
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+    def close(self):
+        # Idempotente: una conexión del pool solo se devuelve una vez
+        if self._closed:
+            return
+        self._closed = True
+        self._conn.close()
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return self._conn.commit()
+        finally:
+            record_db_call("commit", time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =======================================================================================
+#                              LECTURA EN STREAMING
+# =======================================================================================
+
+def iter_columnas(cursor, columnas: Sequence[Tuple[str, str]],
+                  chunk: int = DB_STREAM_CHUNK) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Resultado de la consulta ya ejecutada en bloques de a lo más `chunk` filas.
+
+    El cursor debe ser sin buffer y de tuplas (conn.cursor()): MySQL envía las
+    filas conforme se piden, así que en memoria solo hay un bloque a la vez.
+
+    Args:
+        columnas: [(nombre, dtype de NumPy)] en el orden del SELECT; "float64"
+            convierte NULL en NaN, "datetime64[s]" en NaT y "object" deja el valor tal cual
+    """
+    while True:
+        rows = cursor.fetchmany(chunk)
+        if not rows:
+            return
+        valores = zip(*rows)
+        yield {nombre: np.array(v, dtype=dtype) for (nombre, dtype), v in zip(columnas, valores)}
+
+
+def leer_columnas(cursor, columnas: Sequence[Tuple[str, str]], chunk: int = DB_STREAM_CHUNK,
+                  capacidad: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Lee el resultado de la consulta ya ejecutada a un arreglo de NumPy por columna.
+
+    Los arreglos se reservan una vez (`capacidad`, o el primer bloque) y se
+    duplican al llenarse; cada bloque de fetchmany se copia directo a ellos, sin
+    pasar por listas de dicts. Consume también los result sets restantes (CALL).
+    El resultado completo queda en memoria: usar con consultas de rango acotado
+    (o iter_columnas para procesar bloque por bloque).
+    """
+    datos = {nombre: np.empty(max(capacidad, chunk), dtype=dtype) for nombre, dtype in columnas}
+    n = 0
+    for bloque in iter_columnas(cursor, columnas, chunk):
+        k = len(next(iter(bloque.values())))
+        tam = len(next(iter(datos.values())))
+        if n + k > tam:
+            while n + k > tam:
+                tam *= 2
+            for nombre, arreglo in datos.items():
+                nuevo = np.empty(tam, dtype=arreglo.dtype)
+                nuevo[:n] = arreglo[:n]
+                datos[nombre] = nuevo
+        for nombre, valores in bloque.items():
+            datos[nombre][n:n + k] = valores
+        n += k
+    while cursor.nextset():
+        pass
+    return {nombre: arreglo[:n] for nombre, arreglo in datos.items()}
 
 
 # =======================================================================================
@@ -74,48 +354,88 @@ def obtener_medidores_presion(numero_cliente: int) -> List[dict]:
     ]
 
 
+PERIODOS = ("dia", "semana", "mes")
+
+
+def rango_periodo(periodo: str, fecha: Union[str, date, datetime]) -> Tuple[datetime, datetime]:
+    """
+    Rango semiabierto [inicio, fin) del día, semana (lunes a domingo) o mes que contiene `fecha`.
+
+    Filtrar con `col >= inicio AND col < fin` deja que MySQL use el índice
+    (device_id, time) y descarte particiones; `DATE(col) = ...`, `YEARWEEK(col)`
+    o `MONTH(col)` obligan a revisar toda la tabla.
+
+    Args:
+        periodo: "dia", "semana" o "mes"
+        fecha: date, datetime o "YYYY-MM-DD"
+    """
+    if isinstance(fecha, str):
+        fecha = datetime.strptime(fecha, "%Y-%m-%d").date()
+    elif isinstance(fecha, datetime):
+        fecha = fecha.date()
+
+    if periodo == "dia":
+        inicio = fecha
+        fin = fecha + timedelta(days=1)
+    elif periodo == "semana":
+        inicio = fecha - timedelta(days=fecha.weekday())
+        fin = inicio + timedelta(weeks=1)
+    elif periodo == "mes":
+        inicio = fecha.replace(day=1)
+        fin = (inicio + timedelta(days=32)).replace(day=1)
+    else:
+        raise ValueError(f"Periodo inválido: {periodo} (usar {', '.join(PERIODOS)})")
+    return datetime.combine(inicio, datetime.min.time()), datetime.combine(fin, datetime.min.time())
+
+
+def filtro_rango(columna: str, inicio: datetime, fin: datetime) -> Tuple[str, tuple]:
+    """Condición SQL `columna >= %s AND columna < %s` y sus parámetros"""
+    return f"{columna} >= %s AND {columna} < %s", (inicio, fin)
+
+
+def leer_telemetria(tabla: str, device_id: int, inicio: datetime, fin: datetime, cursor=None) -> pd.DataFrame:
+    """
+    Lecturas crudas de [inicio, fin) de un dispositivo de `pruebas` o `RTU_datos`.
+
+    Los días ya exportados se leen del archivo Parquet (telemetry_archive.py) y
+    el resto de MySQL; el resultado es el mismo DataFrame en ambos casos
+    (columna de tiempo + mediciones como float), ordenado por tiempo.
+    """
+    # Import local: telemetry_archive importa este módulo
+    from .telemetry_archive import read_range
+    return read_range(tabla, device_id, inicio, fin, cursor)
+
+
 def obtener_datos_presion(RTU_id: int, dispositivo_id: int = None, linea: str = None, fecha: str = None) -> pd.DataFrame:
-    """Obtiene datos de presión desde las tablas RTU_datos y RTU_sensores"""
+    """Obtiene datos de presión desde las tablas RTU_datos y RTU_sensores (un día, o los últimos PRESION_MAX_DIAS)"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
-        # Obtener configuración de sensores para este RTU
-        cursor.execute("""
-            SELECT C, Vmin, Vmax, Lmin, Lmax
-            FROM RTU_sensores
-            WHERE RTU_id = %s
-            ORDER BY C
-        """, (RTU_id,))
-        sensores_rows = cursor.fetchall()
-        sensores = {row['C']: row for row in sensores_rows}
-
-        # Consultar datos del RTU para la fecha especificada
+        # Obtener configuración de sensores para este RTU (import local: reference_cache importa este módulo)
+        from .reference_cache import get_rtu_sensores
+        sensores = get_rtu_sensores(RTU_id, cursor)
+
+        # Consultar datos del RTU para la fecha especificada (del archivo Parquet si ya está archivada)
         if fecha:
-            cursor.execute("""
-                SELECT S1, S2, S3, Time
-                FROM RTU_datos
-                WHERE RTU_id = %s AND DATE(Time) = %s
-                ORDER BY Time
-            """, (RTU_id, fecha))
+            df = leer_telemetria("RTU_datos", RTU_id, *rango_periodo("dia", fecha), cursor=cursor)
         else:
-            cursor.execute("""
-                SELECT S1, S2, S3, Time
-                FROM RTU_datos
-                WHERE RTU_id = %s
-                ORDER BY Time
-            """, (RTU_id,))
-
-        datos = cursor.fetchall()
+            # Sin fecha: los últimos PRESION_MAX_DIAS días hasta la última lectura, no
+            # toda la historia del RTU (el DataFrame tiene que caber en memoria completo)
+            cursor.execute("SELECT MAX(Time) AS ultimo FROM RTU_datos WHERE RTU_id = %s", (RTU_id,))
+            ultimo = cursor.fetchone()["ultimo"]
+            if ultimo is None:
+                df = pd.DataFrame()
+            else:
+                fin = ultimo + timedelta(seconds=1)
+                df = leer_telemetria("RTU_datos", RTU_id, fin - timedelta(days=PRESION_MAX_DIAS), fin, cursor=cursor)
+
         cursor.close()
         conn.close()
 
-        if not datos:
+        if df.empty:
             return pd.DataFrame()
 
-        # Convertir a DataFrame
-        df = pd.DataFrame(datos)
-
         # Convertir voltajes a PSI usando calibración de sensores
         if 1 in sensores:
             s1_config = sensores[1]
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, HTTPException
 import mysql.connector
-import os
 from dotenv import load_dotenv
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
+from .db_utils import get_db_connection
+
 load_dotenv()
 
 dooble_router = APIRouter(prefix="/dooble", tags=["🤖 Dooble"])
@@ -13,12 +14,7 @@ dooble_router = APIRouter(prefix="/dooble", tags=["🤖 Dooble"])
 
 def get_dooble_db_connection():
     """Conexión a la base de datos Dooble"""
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database="Dooble",
-    )
+    return get_db_connection(database="Dooble")
 
 
 @dooble_router.get("/maquinas-por-cliente")
@@ -4,8 +4,6 @@ Uses Service Account credentials (gcs-storage-key.json).
 """
 import sys
 from pathlib import Path
-from google.cloud import storage
-from google.oauth2 import service_account
 from datetime import datetime
 
 # Configure UTF-8 encoding for Windows console
@@ -23,17 +21,28 @@ GCS_KEY_FILE = str(LIB_DIR / "gcs-storage-key.json")
 
 BUCKET_NAME = "vento-archive"
 
+# Seconds a folio with no photos in the bucket is not scanned again
+PHOTO_SCAN_CACHE_TTL = 300
 
+
+# google-cloud-storage is imported on first use so the API starts without loading it
 def get_credentials():
+    from google.oauth2 import service_account
+
     return service_account.Credentials.from_service_account_file(GCS_KEY_FILE)
 
 
 def get_gcs_client():
     """Initialize and return a GCS Storage client using service account credentials."""
+    from google.cloud import storage
+
     credentials = get_credentials()
     return storage.Client(credentials=credentials, project=credentials.project_id)
 
 
+_scanned_folios = None  # TableCache, created on first use (pdf_worker_script imports this module standalone)
+
+
 def get_bucket():
     """Return the GCS bucket instance."""
     return get_gcs_client().bucket(BUCKET_NAME)
@@ -63,12 +72,63 @@ def upload_photo(bucket, file_content: bytes, blob_name: str, mime_type: str = '
         raise
 
 
-def upload_maintenance_photos(client_name: str, folio: str, photos_by_category: dict, parent_folder: str = "mantenimiento") -> dict:
+CATEGORY_MAP = {
+    "ACEITE": "ACEITE",
+    "OIL": "ACEITE",
+    "CONDICIONES_AMBIENTALES": "CONDICIONES_AMBIENTALES",
+    "ENVIRONMENTAL": "CONDICIONES_AMBIENTALES",
+    "DISPLAY": "DISPLAY_HORAS",
+    "DISPLAY_HORAS": "DISPLAY_HORAS",
+    "PLACAS": "PLACAS_EQUIPO",
+    "PLACAS_EQUIPO": "PLACAS_EQUIPO",
+    "TEMPERATURAS": "TEMPERATURAS",
+    "TEMPERATURES": "TEMPERATURAS",
+    "PRESIONES": "PRESIONES",
+    "PRESSURES": "PRESIONES",
+    "TANQUES": "TANQUES",
+    "TANKS": "TANQUES",
+    "MANTENIMIENTO": "MANTENIMIENTO",
+    "MAINTENANCE": "MANTENIMIENTO",
+    "OTROS": "OTROS",
+    "OTHER": "OTROS",
+    "COMPONENTES": "COMPONENTES",
+    "REFRIGERACION": "REFRIGERACION",
+    "DISPLAY_HORAS_POST": "DISPLAY_HORAS_POST",
+    "ACEITE_POST": "ACEITE_POST",
+    "TEMPERATURAS_POST": "TEMPERATURAS_POST",
+    "PRESIONES_POST": "PRESIONES_POST",
+    "OTROS_POST": "OTROS_POST",
+}
+
+# Descriptive label used in the filename for each category
+CATEGORY_LABEL_MAP = {
+    "ACEITE": "Aceite",
+    "CONDICIONES_AMBIENTALES": "CondAmbiental",
+    "DISPLAY_HORAS": "Display",
+    "PLACAS_EQUIPO": "Placa",
+    "TEMPERATURAS": "Temperatura",
+    "PRESIONES": "Presion",
+    "TANQUES": "Tanque",
+    "MANTENIMIENTO": "Mantenimiento",
+    "OTROS": "Otro",
+    "COMPONENTES": "Componente",
+    "REFRIGERACION": "Refrigeracion",
+    "DISPLAY_HORAS_POST": "DisplayPost",
+    "ACEITE_POST": "AceitePost",
+    "TEMPERATURAS_POST": "TempPost",
+    "PRESIONES_POST": "PresionPost",
+    "OTROS_POST": "OtroPost",
+}
+
+
+def plan_maintenance_uploads(client_name: str, folio: str, photos_by_category: dict, parent_folder: str = "mantenimiento") -> dict:
     """
-    Upload maintenance report photos organized by category to GCS.
+    Resolve the GCS blob name of every photo before uploading it.
 
     Path structure: {parent_folder}/{year}/{month}/{client_name}/{folio}/{category}/{filename}
     Files are named descriptively, e.g.: Foto_Presion1.jpg, Foto_Display1.jpg
+    Images are stored with the extension of the upload pipeline's output format
+    (see photo_processing.py), so the names are known before processing.
 
     Args:
         client_name: Client name
@@ -79,85 +139,35 @@ def upload_maintenance_photos(client_name: str, folio: str, photos_by_category:
                 "CONDICIONES_AMBIENTALES": [...],
                 ...
             }
+            file_content may be the bytes or the path of a spooled temporary file.
         parent_folder: Parent folder in GCS (default: "mantenimiento", use "Secadoras" for dryers)
 
     Returns:
-        Dictionary with uploaded file URLs by category
+        Plan dict consumed by upload_planned_photos
     """
-    category_map = {
-        "ACEITE": "ACEITE",
-        "OIL": "ACEITE",
-        "CONDICIONES_AMBIENTALES": "CONDICIONES_AMBIENTALES",
-        "ENVIRONMENTAL": "CONDICIONES_AMBIENTALES",
-        "DISPLAY": "DISPLAY_HORAS",
-        "DISPLAY_HORAS": "DISPLAY_HORAS",
-        "PLACAS": "PLACAS_EQUIPO",
-        "PLACAS_EQUIPO": "PLACAS_EQUIPO",
-        "TEMPERATURAS": "TEMPERATURAS",
-        "TEMPERATURES": "TEMPERATURAS",
-        "PRESIONES": "PRESIONES",
-        "PRESSURES": "PRESIONES",
-        "TANQUES": "TANQUES",
-        "TANKS": "TANQUES",
-        "MANTENIMIENTO": "MANTENIMIENTO",
-        "MAINTENANCE": "MANTENIMIENTO",
-        "OTROS": "OTROS",
-        "OTHER": "OTROS",
-        "COMPONENTES": "COMPONENTES",
-        "REFRIGERACION": "REFRIGERACION",
-        "DISPLAY_HORAS_POST": "DISPLAY_HORAS_POST",
-        "ACEITE_POST": "ACEITE_POST",
-        "TEMPERATURAS_POST": "TEMPERATURAS_POST",
-        "PRESIONES_POST": "PRESIONES_POST",
-        "OTROS_POST": "OTROS_POST",
-    }
-
-    # Descriptive label used in the filename for each category
-    category_label_map = {
-        "ACEITE": "Aceite",
-        "CONDICIONES_AMBIENTALES": "CondAmbiental",
-        "DISPLAY_HORAS": "Display",
-        "PLACAS_EQUIPO": "Placa",
-        "TEMPERATURAS": "Temperatura",
-        "PRESIONES": "Presion",
-        "TANQUES": "Tanque",
-        "MANTENIMIENTO": "Mantenimiento",
-        "OTROS": "Otro",
-        "COMPONENTES": "Componente",
-        "REFRIGERACION": "Refrigeracion",
-        "DISPLAY_HORAS_POST": "DisplayPost",
-        "ACEITE_POST": "AceitePost",
-        "TEMPERATURAS_POST": "TempPost",
-        "PRESIONES_POST": "PresionPost",
-        "OTROS_POST": "OtroPost",
-    }
-
-    try:
-        bucket = get_bucket()
-        now = datetime.now()
-        year = now.strftime("%Y")
-        month = now.strftime("%m")
-        clean_client = client_name.strip().replace('/', '-')
-        clean_folio = folio.strip().replace('/', '-')
-        # Path: {parent_folder}/{year}/{month}/{client_name}/{folio}/{category}/{filename}
-        base_prefix = f"{parent_folder}/{year}/{month}/{clean_client}/{clean_folio}"
-
-        uploaded_files = {}
-
-        for category, photos in photos_by_category.items():
-            if not photos:
-                continue
-
-            category_key = category.upper().replace(" ", "_")
-            standard_category = category_map.get(category_key, "OTROS")
-            label = category_label_map.get(standard_category, "Foto")
-            uploaded_files[category] = []
-
-            print(f"\n📤 Uploading {len(photos)} photo(s) to {standard_category}")
-
-            for idx, (filename, file_content, mime_type) in enumerate(photos):
-                # Determine file extension from original filename or mime type
-                original_ext = ""
+    from .photo_processing import output_extension
+
+    now = datetime.now()
+    year = now.strftime("%Y")
+    month = now.strftime("%m")
+    clean_client = client_name.strip().replace('/', '-')
+    clean_folio = folio.strip().replace('/', '-')
+    # Path: {parent_folder}/{year}/{month}/{client_name}/{folio}/{category}/{filename}
+    base_prefix = f"{parent_folder}/{year}/{month}/{clean_client}/{clean_folio}"
+
+    items = []
+    for category, photos in photos_by_category.items():
+        if not photos:
+            continue
+
+        category_key = category.upper().replace(" ", "_")
+        standard_category = CATEGORY_MAP.get(category_key, "OTROS")
+        label = CATEGORY_LABEL_MAP.get(standard_category, "Foto")
+
+        for idx, (filename, file_content, mime_type) in enumerate(photos):
+            # Determine file extension from the output format, original filename or mime type
+            original_ext = output_extension(mime_type)
+            if not original_ext:
                 if "." in filename:
                     original_ext = "." + filename.rsplit(".", 1)[-1].lower()
                 elif mime_type:
@@ -166,24 +176,83 @@ def upload_maintenance_photos(client_name: str, folio: str, photos_by_category:
                 else:
                     original_ext = ".jpg"
 
-                # Descriptive name: Foto_Presion1.jpg, Foto_Display2.jpg, etc.
-                unique_filename = f"Foto_{label}{idx + 1}{original_ext}"
-                blob_name = f"{base_prefix}/{standard_category}/{unique_filename}"
+            # Descriptive name: Foto_Presion1.jpg, Foto_Display2.jpg, etc.
+            unique_filename = f"Foto_{label}{idx + 1}{original_ext}"
+            items.append({
+                "category": category,
+                "standard_category": standard_category,
+                "filename": unique_filename,
+                "blob_name": f"{base_prefix}/{standard_category}/{unique_filename}",
+                "content": file_content,
+                "mime_type": mime_type,
+            })
+
+    return {
+        "parent_folder": parent_folder,
+        "client": clean_client,
+        "folio": clean_folio,
+        "report_folio": folio.strip(),
+        "gcs_prefix": base_prefix,
+        "items": items,
+    }
+
 
-                file_info = upload_photo(bucket, file_content, blob_name, mime_type)
+def planned_files(plan: dict) -> dict:
+    """Uploaded-files listing (by original category) for a plan."""
+    uploaded_files = {}
+    for item in plan["items"]:
+        uploaded_files.setdefault(item["category"], []).append({
+            "blob_name": item["blob_name"],
+            "filename": item["filename"],
+            "category": item["standard_category"],
+        })
+    return uploaded_files
 
-                uploaded_files[category].append({
-                    "blob_name": file_info["blob_name"],
-                    "filename": unique_filename,
-                    "category": standard_category,
-                })
 
-        print(f"\n✅ Successfully uploaded all photos for folio {folio}")
+def upload_planned_photos(plan: dict) -> dict:
+    """
+    Optimize and upload the photos of a plan, then register them in the photo index.
+
+    Returns:
+        Dictionary with uploaded file names by category
+    """
+    from .photo_processing import optimize_photo
+
+    try:
+        bucket = get_bucket()
+
+        for item in plan["items"]:
+            content, mime_type = optimize_photo(item["content"], item["mime_type"])
+            upload_photo(bucket, content, item["blob_name"], mime_type)
+
+        print(f"\n✅ Successfully uploaded all photos for folio {plan['folio']}")
+
+        # Register uploads in the photo index so lookups by folio don't scan the bucket
+        try:
+            from .photo_index import index_photos
+            index_photos([
+                {
+                    "parent_folder": plan["parent_folder"],
+                    "cliente": plan["client"],
+                    "folio": plan["folio"],
+                    "categoria": item["standard_category"],
+                    "blob_name": item["blob_name"],
+                }
+                for item in plan["items"]
+            ])
+        except Exception as error:
+            print(f"⚠️ Could not index uploaded photos: {error}")
+
+        # New photos change the report, so a cached PDF of this folio is stale
+        from .pdf_cache import invalidate_report_pdf, KIND_MTTO, KIND_SECADORA
+        kind = KIND_SECADORA if plan["parent_folder"] == "Secadoras" else KIND_MTTO
+        invalidate_report_pdf(plan["report_folio"], kind)
+
         return {
             "success": True,
-            "gcs_prefix": base_prefix,
+            "gcs_prefix": plan["gcs_prefix"],
             "bucket": BUCKET_NAME,
-            "uploaded_files": uploaded_files,
+            "uploaded_files": planned_files(plan),
         }
 
     except Exception as error:
@@ -191,27 +260,84 @@ def upload_maintenance_photos(client_name: str, folio: str, photos_by_category:
         return {"success": False, "error": str(error)}
 
 
-def list_gcs_photos_by_folio(client_name: str, folio: str) -> dict:
+def upload_maintenance_photos(client_name: str, folio: str, photos_by_category: dict, parent_folder: str = "mantenimiento") -> dict:
+    """
+    Upload maintenance report photos organized by category to GCS (synchronously).
+
+    See plan_maintenance_uploads for the path structure and argument format.
+
+    Returns:
+        Dictionary with uploaded file names by category
+    """
+    try:
+        plan = plan_maintenance_uploads(client_name, folio, photos_by_category, parent_folder)
+    except Exception as error:
+        print(f"❌ Error uploading maintenance photos: {error}")
+        return {"success": False, "error": str(error)}
+    return upload_planned_photos(plan)
+
+
+def list_gcs_photos_by_folio(client_name: str, folio: str, parent_folder: str = "mantenimiento") -> dict:
     """
-    List photos from GCS organized by category for a given client/folio.
+    List photos organized by category for a given client/folio.
 
-    Path structure: mantenimiento/{year}/{month}/{client_name}/{folio}/{category}/{filename}
-    Searches across all year/month combinations under mantenimiento/.
+    Reads the `fotos_reportes` photo index (see photo_index.py). The bucket is
+    scanned when the index cannot be queried, or when it has nothing for the
+    folio (reports uploaded before the index, or not backfilled yet); what the
+    scan finds is added to the index so the next lookup does not scan again.
+    Empty scans are remembered for PHOTO_SCAN_CACHE_TTL seconds.
 
     Returns:
         {
-            "by_category": {"ACEITE": ["url1", ...], ...},
-            "flat": ["url1", "url2", ...]
+            "by_category": {"ACEITE": ["blob1", ...], ...},
+            "flat": ["blob1", "blob2", ...]
         }
     """
+    try:
+        from .photo_index import lookup_photos
+        photos = lookup_photos(client_name, folio, parent_folder)
+    except Exception as error:
+        print(f"⚠️ Photo index unavailable, scanning bucket: {error}")
+        return _scan_gcs_photos_by_folio(client_name, folio, parent_folder)
+    if photos["flat"]:
+        return photos
+    global _scanned_folios
+    if _scanned_folios is None:
+        from .reference_cache import TableCache
+        _scanned_folios = TableCache("fotos_reportes", PHOTO_SCAN_CACHE_TTL)
+    return _scanned_folios.get(
+        (parent_folder, client_name.strip(), folio.strip()),
+        lambda: _scan_and_index(client_name, folio, parent_folder),
+    )
+
+
+def _scan_and_index(client_name: str, folio: str, parent_folder: str) -> dict:
+    """Scan the bucket for a folio missing from the index and register what it finds."""
+    photos = _scan_gcs_photos_by_folio(client_name, folio, parent_folder)
+    if photos["flat"]:
+        try:
+            from .photo_index import index_photos, parse_blob_name
+            index_photos([entry for entry in map(parse_blob_name, photos["flat"]) if entry])
+        except Exception as error:
+            print(f"⚠️ Could not index scanned photos: {error}")
+    return photos
+
+
+def _scan_gcs_photos_by_folio(client_name: str, folio: str, parent_folder: str = "mantenimiento") -> dict:
+    """
+    List photos by scanning every blob under {parent_folder}/.
+
+    Path structure: {parent_folder}/{year}/{month}/{client_name}/{folio}/{category}/{filename}
+    Searches across all year/month combinations under {parent_folder}/.
+    """
     try:
         client = get_gcs_client()
         clean_client = client_name.strip().replace('/', '-')
         clean_folio = folio.strip().replace('/', '-')
 
-        # Search under mantenimiento/ and match /{client_name}/{folio}/ anywhere in path
+        # Search under {parent_folder}/ and match /{client_name}/{folio}/ anywhere in path
         target_segment = f"/{clean_client}/{clean_folio}/"
-        blobs = client.list_blobs(BUCKET_NAME, prefix="mantenimiento/")
+        blobs = client.list_blobs(BUCKET_NAME, prefix=f"{parent_folder}/")
 
         by_category = {}
         flat = []
@@ -6,6 +6,7 @@ from pydantic import EmailStr
 from typing import Optional
 
 from .db_utils import get_db_connection
+from .session_cache import invalidate_usuario
 
 
 ingenieros_router = APIRouter(prefix="/web", tags=["👥 Gestión de Usuarios"])
@@ -158,6 +159,7 @@ def create_ingeniero(
         )
 
         conn.commit()
+        invalidate_usuario(email=email)
         cursor.close()
         conn.close()
 
@@ -251,6 +253,8 @@ def update_ingeniero(
         )
 
         conn.commit()
+        invalidate_usuario(email=old_email)
+        invalidate_usuario(email=email)
         cursor.close()
         conn.close()
 
@@ -298,6 +302,7 @@ def delete_ingeniero(
         )
 
         conn.commit()
+        invalidate_usuario(email=ingeniero['email'])
         cursor.close()
         conn.close()
 
@@ -0,0 +1,94 @@
+"""
+Respuesta JSON con orjson para los endpoints de series de tiempo.
+
+FastAPI por defecto pasa el resultado por jsonable_encoder (recorre cada dict,
+datetime y Decimal en Python) y luego json.dumps. Para las series de un día
+completo por fases eso domina el CPU de la petición. FastJSONResponse serializa
+directo con orjson, que maneja datetime/date y NumPy de forma nativa; Decimal y
+timedelta se convierten en `_default`.
+
+Los endpoints devuelven la respuesta ya construida (así FastAPI no vuelve a
+codificarla). `series_response` además permite la forma por columnas:
+
+    filas:    {"data": [{"time": ..., "ia": ...}, ...]}
+    columnas: {"data": {"time": [...], "ia": [...]}}
+"""
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Sequence
+
+import numpy as np
+import orjson
+from fastapi.responses import JSONResponse
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """Tipos que orjson no serializa por sí solo"""
+    if isinstance(obj, Decimal):
+        # Igual que jsonable_encoder: enteros como int, el resto como float
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "isoformat"):  # pandas.Timestamp y similares
+        return obj.isoformat()
+    if hasattr(obj, "item"):  # escalares de NumPy no cubiertos por OPT_SERIALIZE_NUMPY
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content) -> bytes:
+    """Serializa con orjson y las conversiones de `_default`"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializada con orjson"""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def rows_to_columns(rows: Iterable[Sequence], columns: Sequence[str]) -> dict:
+    """Filas (tuplas) a un dict de listas por columna"""
+    rows = list(rows)
+    if not rows:
+        return {column: [] for column in columns}
+    return {column: list(values) for column, values in zip(columns, zip(*rows))}
+
+
+def series_response(rows: Sequence[Sequence], columns: Sequence[str], columnar: bool = False, **extra) -> FastJSONResponse:
+    """
+    Respuesta {"data": ..., **extra} de una serie de tiempo.
+
+    Args:
+        rows: Filas en el orden de `columns`
+        columns: Nombres de columna
+        columnar: True para {"time": [...], ...}; False para una lista de objetos
+        extra: Campos adicionales de la respuesta (p. ej. fecha)
+    """
+    if columnar:
+        data = rows_to_columns(rows, columns)
+    else:
+        data = [dict(zip(columns, row)) for row in rows]
+    return FastJSONResponse({"data": data, **extra})
+
+
+def arrays_response(arrays: Dict[str, np.ndarray], columnar: bool = False, **extra) -> FastJSONResponse:
+    """
+    Como series_response, pero desde un arreglo de NumPy por columna (db_utils.leer_columnas).
+
+    En la forma por columnas los arreglos numéricos se serializan directo con
+    orjson; las demás columnas (tiempos, texto) pasan por tolist().
+    """
+    if columnar:
+        data = {c: a if a.dtype.kind in "fiub" else a.tolist() for c, a in arrays.items()}
+    else:
+        columns = list(arrays)
+        data = [dict(zip(columns, row)) for row in zip(*(a.tolist() for a in arrays.values()))]
+    return FastJSONResponse({"data": data, **extra})
@@ -1,7 +1,7 @@
 """
 Endpoints de mantenimiento web - Gestión de registros y reportes de mantenimiento
 """
-from fastapi import HTTPException, APIRouter, Query
+from fastapi import HTTPException, APIRouter, Query, Depends
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import date
@@ -10,11 +10,14 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
-from google.cloud import storage
-from google.oauth2 import service_account
 from pathlib import Path
 
 from .db_utils import get_db_connection
+from .compressor_search import search_index
+from .session_cache import invalidate_all
+from .reference_cache import COMPRESORES, get_mantenimientos_tipo, get_nombre_mantenimiento, invalidate as invalidate_reference
+from .pagination import PageParams, page_params, build_query, count_rows, split_page, project, page_response
+from .pdf_cache import invalidate_report_pdfs_for_serie
 
 
 # GCS configuration
@@ -46,8 +49,7 @@ def send_maintenance_notification(compresor_id: int, tipo_mantenimiento: int):
         """, (compresor_id,))
         compresor_data = cursor.fetchone()
 
-        cursor.execute("SELECT nombre_tipo FROM mantenimientos_tipo WHERE id_mantenimiento = %s", (tipo_mantenimiento,))
-        tipo_data = cursor.fetchone()
+        tipo_nombre = get_nombre_mantenimiento(tipo_mantenimiento, cursor) or "N/A"
 
         cursor.close()
         conn.close()
@@ -55,7 +57,6 @@ def send_maintenance_notification(compresor_id: int, tipo_mantenimiento: int):
         alias = compresor_data.get("Alias", "N/A") if compresor_data else "N/A"
         cliente = compresor_data.get("nombre_cliente", "N/A") if compresor_data else "N/A"
         direccion = compresor_data.get("direccion", "N/A") if compresor_data else "N/A"
-        tipo_nombre = tipo_data.get("nombre_tipo", "N/A") if tipo_data else "N/A"
 
         msg = MIMEMultipart()
         msg["From"] = SMTP_FROM
@@ -158,8 +159,14 @@ class UpdateMaintenanceReportRequest(BaseModel):
 
 maintenance_web = APIRouter(prefix="/web", tags=["🛠️ Mantenimiento de Compresores"])
 
+# Orden de la paginación por cursor de GET /web/registros-mantenimiento (más recientes primero)
+REGISTRO_PAGE_KEYS = [("timestamp", "DESC"), ("id", "DESC")]
+
 
 def get_gcs_client():
+    from google.cloud import storage
+    from google.oauth2 import service_account
+
     credentials = service_account.Credentials.from_service_account_file(GCS_KEY_FILE)
     return storage.Client(credentials=credentials, project=credentials.project_id)
 
@@ -190,7 +197,8 @@ def get_gcs_folder_images(prefix: str) -> List[dict]:
 
 
 @maintenance_web.get("/registros-mantenimiento", tags=["🔧 Mantenimiento"])
-def get_registros_mantenimiento(numero_cliente: Optional[int] = Query(None, description="Número del cliente")):
+def get_registros_mantenimiento(numero_cliente: Optional[int] = Query(None, description="Número del cliente"),
+                                page: PageParams = Depends(page_params)):
     """Obtiene los registros de mantenimiento"""
     try:
         conn = get_db_connection()
@@ -208,17 +216,20 @@ def get_registros_mantenimiento(numero_cliente: Optional[int] = Query(None, desc
             FROM registros_mantenimiento_tornillo
         """
 
+        where, params = [], []
         if numero_cliente is not None:
-            query = base_query + "\n WHERE numero_cliente = %s\n ORDER BY timestamp DESC"
-            cursor.execute(query, (numero_cliente,))
-        else:
-            query = base_query + "\n ORDER BY timestamp DESC"
-            cursor.execute(query)
+            where.append("numero_cliente = %s")
+            params.append(numero_cliente)
+        query, query_params = build_query(base_query, where, params, REGISTRO_PAGE_KEYS, page, keep_order=True)
+        cursor.execute(query, tuple(query_params))
 
         registros = cursor.fetchall()
+        total = count_rows(cursor, "FROM registros_mantenimiento_tornillo", where, params) if page.include_total else None
         cursor.close()
         conn.close()
 
+        registros, next_cursor = split_page(registros, page, lambda row: (row["timestamp"], row["id"]))
+
         formatted_registros = []
         for registro in registros:
             tasks = []
@@ -249,8 +260,13 @@ def get_registros_mantenimiento(numero_cliente: Optional[int] = Query(None, desc
             }
             formatted_registros.append(formatted_registro)
 
-        return formatted_registros
+        # Sin parámetros de paginación se conserva la respuesta original (lista)
+        if page.paginated:
+            return page_response(formatted_registros, page, next_cursor, total)
+        return project(formatted_registros, page)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching registros de mantenimiento: {str(e)}")
 
@@ -258,21 +274,11 @@ def get_registros_mantenimiento(numero_cliente: Optional[int] = Query(None, desc
 @maintenance_web.get("/maintenance/types", tags=["🛠️ Mantenimiento de Compresores"])
 def get_maintenance_types(tipo: str = Query(..., description="Tipo de compresor: piston o tornillo")):
     """Obtiene tipos de mantenimiento para compresores"""
-    conn = None
-    cursor = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM mantenimientos_tipo WHERE tipo_compresor = %s", (tipo,))
-        maintenance_types = cursor.fetchall()
+        maintenance_types = get_mantenimientos_tipo(tipo)
         return {"maintenance_types": maintenance_types}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching maintenance types: {str(e)}")
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 
 @maintenance_web.post("/maintenance/add", tags=["🛠️ Mantenimiento de Compresores"])
@@ -716,6 +722,12 @@ def update_maintenance_report(registro_id: int, request: UpdateMaintenanceReport
             cursor.execute(compressor_query, compressor_values)
             conn.commit()
 
+            # Los PDFs cacheados de las órdenes de este compresor muestran datos que acaban de cambiar
+            invalidate_report_pdfs_for_serie(request.numero_serie)
+            search_index.refresh_serie(request.numero_serie)
+            invalidate_all()
+            invalidate_reference(COMPRESORES)
+
         return {"success": True, "message": "Reporte actualizado exitosamente", "registro_id": registro_id}
 
     except Exception as e:
@@ -1,27 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import JSONResponse
 import mysql.connector
-import os
 from dotenv import load_dotenv
 from datetime import datetime
 from typing import Optional, List
 import json
 
 from .clases import ReporteMantenimiento, MantenimientoItem
+from .db_utils import get_db_connection
+from .pdf_cache import invalidate_report_pdf
 
 load_dotenv()
 
 router = APIRouter()
 
-# Database configuration
-def get_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_DATABASE"),
-    )
-
 # ==================== ENDPOINTS ====================
 
 @router.post("/reporte_mantenimiento/")
@@ -102,6 +94,7 @@ async def crear_reporte_mantenimiento(data: ReporteMantenimiento):
             conn.commit()
             cursor.close()
             conn.close()
+            invalidate_report_pdf(data.folio)
 
             return {
                 "success": True,
@@ -174,6 +167,7 @@ async def crear_reporte_mantenimiento(data: ReporteMantenimiento):
             conn.commit()
             cursor.close()
             conn.close()
+            invalidate_report_pdf(data.folio)
 
             return {
                 "success": True,
@@ -256,6 +250,7 @@ async def eliminar_reporte_mantenimiento(folio: str):
 
         cursor.close()
         conn.close()
+        invalidate_report_pdf(folio)
 
         return {
             "success": True,
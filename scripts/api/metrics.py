@@ -0,0 +1,242 @@
+"""
+Instrumentación de peticiones y base de datos, expuesta en formato Prometheus.
+
+El middleware `track_request` mide cada petición y la etiqueta con la plantilla
+de la ruta (p. ej. /report/kwh-diario-fases, no la URL con parámetros). Durante
+la petición, las conexiones de db_utils.get_db_connection reportan aquí el tiempo
+de cada execute/callproc/fetch y lo que tardó obtener la conexión, así que por
+petición se sabe cuánto fue base de datos y cuánto Python.
+
+Métricas (GET /metrics):
+    http_requests_total{method,route,status}        Peticiones atendidas
+    http_request_duration_seconds{method,route}     Latencia total
+    http_request_db_seconds{method,route}           Tiempo en MySQL por petición
+    http_request_python_seconds{method,route}       Latencia menos MySQL y espera de conexión
+    http_request_db_queries{method,route}           Sentencias (execute) por petición
+    http_request_db_procedures{method,route}        Procedimientos (callproc) por petición
+    db_pool_wait_seconds                            Tiempo para obtener una conexión
+    db_calls_total{kind} / db_call_seconds_total{kind}  Totales por tipo de llamada
+
+GET /metrics/queries devuelve el perfil de sentencias de query_profiler.py.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from .query_profiler import SORT_KEYS, format_report, get_report
+
+metrics_router = APIRouter(tags=["📈 Métricas"])
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+# Etiqueta para peticiones que no coinciden con ninguna ruta (evita una serie por URL)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _format_labels(names: Sequence[str], values: Tuple) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Contador acumulativo con etiquetas"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Histograma con buckets fijos y etiquetas"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label_values -> [conteos por bucket (no acumulados), suma, total]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._series.items())
+        for label_values, (counts, total, count) in items:
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels + ("le",), label_values + (_format_value(upper),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+REQUESTS_TOTAL = Counter("http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status"))
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "Latencia total de la petición", ("method", "route"))
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Tiempo en MySQL por petición", ("method", "route"))
+REQUEST_PYTHON_SECONDS = Histogram(
+    "http_request_python_seconds", "Latencia de la petición sin contar MySQL ni la espera de conexión", ("method", "route")
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Sentencias ejecutadas por petición", ("method", "route"), buckets=COUNT_BUCKETS
+)
+REQUEST_DB_PROCEDURES = Histogram(
+    "http_request_db_procedures", "Procedimientos almacenados llamados por petición", ("method", "route"), buckets=COUNT_BUCKETS
+)
+POOL_WAIT = Histogram("db_pool_wait_seconds", "Tiempo para obtener una conexión a MySQL")
+DB_CALLS = Counter("db_calls_total", "Llamadas a MySQL por tipo (query, procedure, fetch, commit)", ("kind",))
+DB_CALL_SECONDS = Counter("db_call_seconds_total", "Segundos en MySQL por tipo de llamada", ("kind",))
+
+ALL_METRICS = (
+    REQUESTS_TOTAL,
+    REQUEST_DURATION,
+    REQUEST_DB_SECONDS,
+    REQUEST_PYTHON_SECONDS,
+    REQUEST_DB_QUERIES,
+    REQUEST_DB_PROCEDURES,
+    POOL_WAIT,
+    DB_CALLS,
+    DB_CALL_SECONDS,
+)
+
+
+class RequestStats:
+    """Acumulado de base de datos de una petición (compartido con sus hilos de trabajo)"""
+
+    __slots__ = ("db_seconds", "queries", "procedures", "pool_wait_seconds", "_lock")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.procedures = 0
+        self.pool_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("metrics_request_stats", default=None)
+
+
+def record_db_call(kind: str, seconds: float) -> None:
+    """Registra una llamada a MySQL ('query', 'procedure', 'fetch' o 'commit')"""
+    DB_CALLS.inc(kind)
+    DB_CALL_SECONDS.inc(kind, amount=seconds)
+    stats = _current_request.get()
+    if stats is None:
+        return
+    with stats._lock:
+        stats.db_seconds += seconds
+        if kind == "query":
+            stats.queries += 1
+        elif kind == "procedure":
+            stats.procedures += 1
+
+
+def record_pool_wait(seconds: float) -> None:
+    """Registra el tiempo que tardó obtener una conexión"""
+    POOL_WAIT.observe(seconds)
+    stats = _current_request.get()
+    if stats is not None:
+        with stats._lock:
+            stats.pool_wait_seconds += seconds
+
+
+def _route_label(request: Request) -> str:
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+async def track_request(request: Request, call_next):
+    """Middleware HTTP: latencia por ruta y reparto MySQL/Python de cada petición"""
+    stats = RequestStats()
+    token = _current_request.set(stats)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        _current_request.reset(token)
+        method = request.method
+        route = _route_label(request)
+        REQUESTS_TOTAL.inc(method, route, str(status))
+        REQUEST_DURATION.observe(elapsed, method, route)
+        REQUEST_DB_SECONDS.observe(stats.db_seconds, method, route)
+        REQUEST_PYTHON_SECONDS.observe(max(elapsed - stats.db_seconds - stats.pool_wait_seconds, 0.0), method, route)
+        REQUEST_DB_QUERIES.observe(stats.queries, method, route)
+        REQUEST_DB_PROCEDURES.observe(stats.procedures, method, route)
+
+
+def render_metrics() -> str:
+    """Todas las métricas en formato de texto de Prometheus"""
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@metrics_router.get("/metrics/queries", include_in_schema=False)
+def get_query_profile(
+    sort: str = Query("total", description=f"Orden: {', '.join(SORT_KEYS)}"),
+    limit: int = Query(50, ge=1, le=1000),
+    format: str = Query("json", pattern="^(json|text)$"),
+):
+    """Sentencias y procedimientos agregados por huella (ver query_profiler.py)"""
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort debe ser uno de {', '.join(SORT_KEYS)}")
+    entries = get_report(sort, limit)
+    if format == "text":
+        return PlainTextResponse(format_report(entries))
+    return {"sort": sort, "queries": entries}
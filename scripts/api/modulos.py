@@ -6,6 +6,9 @@ import os
 from dotenv import load_dotenv
 
 from .clases import Modulos
+from .db_utils import get_db_connection
+from .session_cache import invalidate_cliente
+from .reference_cache import MODULOS_WEB, invalidate as invalidate_reference
 
 load_dotenv()
 DB_HOST = os.getenv("DB_HOST")
@@ -18,12 +21,7 @@ modulos_web = APIRouter(prefix="/modulos", tags=["Modulos"])
 @modulos_web.get("/")
 def get_modulos():
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            host=DB_HOST,
-            database=DB_DATABASE,
-            password=DB_PASSWORD
-        )
+        conn = get_db_connection()
         
         cursor = conn.cursor()
 
@@ -65,12 +63,7 @@ def get_modulos():
 @modulos_web.get("/{numero_cliente}")
 def get_modulos_by_cliente(numero_cliente: int = Path(..., description="Numero del cliente")):
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            host=DB_HOST,
-            database=DB_DATABASE,
-            password=DB_PASSWORD
-        )
+        conn = get_db_connection()
         
         cursor = conn.cursor()
 
@@ -111,12 +104,7 @@ def get_modulos_by_cliente(numero_cliente: int = Path(..., description="Numero d
 @modulos_web.post("/")
 def submit_modulos_permission(request : Modulos):
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            host=DB_HOST,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
 
         cursor = conn.cursor(dictionary=True)
 
@@ -153,6 +141,8 @@ def submit_modulos_permission(request : Modulos):
         )
 
         conn.commit()
+        invalidate_cliente(request.numero_cliente)
+        invalidate_reference(MODULOS_WEB, request.numero_cliente)
 
         return{
             "sucess": True,
@@ -177,12 +167,7 @@ def submit_modulos_permission(request : Modulos):
 @modulos_web.put("/{numero_cliente}")
 def update_modulos_cliente(numero_cliente: int = Path(...,description="Numero del cliente"), request: Modulos = None):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
 
         cursor = conn.cursor()
 
@@ -218,6 +203,8 @@ def update_modulos_cliente(numero_cliente: int = Path(...,description="Numero de
             )
         )
         conn.commit()
+        invalidate_cliente(numero_cliente)
+        invalidate_reference(MODULOS_WEB, numero_cliente)
         return {"success": True, "message": "Modulos del cliente actualizado"}
     
     except mysql.connector.Error as err:
@@ -234,12 +221,7 @@ def update_modulos_cliente(numero_cliente: int = Path(...,description="Numero de
 @modulos_web.delete("/{numero_cliente}")
 def delete_cliente_web(numero_cliente: int = Path(...,description="Numero del cliente")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
 
         cursor = conn.cursor()
 
@@ -252,6 +234,8 @@ def delete_cliente_web(numero_cliente: int = Path(...,description="Numero del cl
             raise HTTPException(status_code=404, detail="Numero de cliente no encontrado")
         
         conn.commit()
+        invalidate_cliente(numero_cliente)
+        invalidate_reference(MODULOS_WEB, numero_cliente)
         return {"sucess": True, "message": "Cliente dado de baja de web"}
     
         
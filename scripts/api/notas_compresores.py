@@ -1,10 +1,12 @@
-from fastapi import Path, HTTPException, APIRouter
+from fastapi import Path, HTTPException, APIRouter, Depends
 
 import mysql.connector
 import os
 from dotenv import load_dotenv
 
 from .clases import NotaCompresor, NotaCompresorUpdate
+from .db_utils import get_db_connection
+from .pagination import PageParams, page_params, build_query, count_rows, split_page, page_response
 
 load_dotenv()
 DB_HOST = os.getenv("DB_HOST")
@@ -14,31 +16,33 @@ DB_DATABASE = os.getenv("DB_DATABASE")
 
 notas_compresores = APIRouter(prefix="/notas-compresores", tags=["Notas Compresores"])
 
+# Orden de la paginación por cursor de GET /notas-compresores/ (más recientes primero)
+NOTA_PAGE_KEYS = [("nc.fecha_creacion", "DESC"), ("nc.id", "DESC")]
+
 
 @notas_compresores.get("/")
-def get_all_notas():
+def get_all_notas(page: PageParams = Depends(page_params)):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute(
+        query, params = build_query(
             """SELECT nc.id, nc.numero_serie, nc.nota, nc.creado_por, nc.fecha_creacion, nc.fecha_actualizacion,
                       c.Alias, cl.nombre_cliente, cl.numero_cliente
                FROM notas_compresores nc
                LEFT JOIN compresores c ON c.numero_serie = nc.numero_serie
-               LEFT JOIN clientes cl ON cl.id_cliente = c.id_cliente
-               ORDER BY nc.fecha_creacion DESC"""
+               LEFT JOIN clientes cl ON cl.id_cliente = c.id_cliente""",
+            [], [], NOTA_PAGE_KEYS, page, keep_order=True
         )
+        cursor.execute(query, tuple(params))
 
         res = cursor.fetchall()
+        total = count_rows(cursor, "FROM notas_compresores", [], []) if page.include_total else None
         cursor.close()
         conn.close()
 
+        res, next_cursor = split_page(res, page, lambda row: (row[4], row[0]))
+
         notas = [
             {
                 "id": row[0],
@@ -54,7 +58,7 @@ def get_all_notas():
             for row in res
         ]
 
-        return {"data": notas}
+        return page_response(notas, page, next_cursor, total)
     except mysql.connector.Error as err:
         return {"error": str(err)}
 
@@ -62,12 +66,7 @@ def get_all_notas():
 @notas_compresores.get("/{numero_serie}")
 def get_notas_by_compresor(numero_serie: str = Path(..., description="Numero de serie del compresor")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -110,12 +109,7 @@ def create_nota(request: NotaCompresor):
     conn = None
     cursor = None
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -149,12 +143,7 @@ def update_nota(request: NotaCompresorUpdate, nota_id: int = Path(..., descripti
     conn = None
     cursor = None
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -191,12 +180,7 @@ def delete_nota(nota_id: int = Path(..., description="ID de la nota")):
     conn = None
     cursor = None
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
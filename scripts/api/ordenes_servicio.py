@@ -1,7 +1,10 @@
-from fastapi import FastAPI, Path, HTTPException, APIRouter
+from fastapi import FastAPI, Path, HTTPException, APIRouter, Depends
 from fastapi.responses import JSONResponse
 
 from scripts.api.clases import OrdenServicio
+from scripts.api.pdf_cache import invalidate_report_pdf
+from scripts.api.db_utils import get_db_connection
+from scripts.api.pagination import PageParams, page_params, build_query, count_rows, split_page, page_response
 
 import mysql.connector
 import os
@@ -15,28 +18,27 @@ DB_DATABASE = os.getenv("DB_DATABASE")
 
 ordenes = APIRouter(prefix="/ordenes", tags=["Ordenes de Servicio"])
 
+# Orden de la paginación por cursor de GET /ordenes/ (más recientes primero)
+ORDEN_PAGE_KEYS = [("fecha_creacion", "DESC"), ("folio", "DESC")]
+
 # Get all ordenes
 @ordenes.get("/")
-def get_all_ordenes():
+def get_all_ordenes(page: PageParams = Depends(page_params)):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
-        cursor.execute(
-            "SELECT * FROM ordenes_servicio"
-        )
+        query, params = build_query("SELECT * FROM ordenes_servicio", [], [], ORDEN_PAGE_KEYS, page)
+        cursor.execute(query, tuple(params))
 
         res = cursor.fetchall()
+        total = count_rows(cursor, "FROM ordenes_servicio", [], []) if page.include_total else None
         cursor.close()
         conn.close()
 
-        if not res:
+        if not res and page.cursor is None:
             return {"error": "Check connection to DB or the .env"}
+        res, next_cursor = split_page(res, page, lambda row: (row["fecha_creacion"], row["folio"]))
 
         clients = [
             {
@@ -66,9 +68,7 @@ def get_all_ordenes():
             for row in res
         ]
 
-        return{
-            "data": clients
-        }
+        return page_response(clients, page, next_cursor, total)
     except mysql.connector.Error as err:
         return{"error": str(err)}
 
@@ -76,12 +76,7 @@ def get_all_ordenes():
 @ordenes.get("/{folio}")
 def get_ordenes_by_folio(folio: str = Path(..., description="The folio of the orden de servicio to retrieve")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute(
@@ -134,12 +129,7 @@ def get_ordenes_by_folio(folio: str = Path(..., description="The folio of the or
 @ordenes.post("/")
 def create_orden_servicio(request: OrdenServicio):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute(
@@ -205,9 +195,7 @@ def update_orden_tecnico(folio: str, id_tecnico: int = None):
     conn = None
     cursor = None
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST, user=DB_USER, password=DB_PASSWORD, database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute("SELECT folio FROM ordenes_servicio WHERE folio = %s", (folio,))
@@ -219,6 +207,7 @@ def update_orden_tecnico(folio: str, id_tecnico: int = None):
             (id_tecnico, folio)
         )
         conn.commit()
+        invalidate_report_pdf(folio)
         return {"success": True, "message": "Técnico asignado exitosamente"}
 
     except mysql.connector.Error as err:
@@ -246,12 +235,7 @@ def update_orden_estado(folio: str, estado: str):
                 detail=f"Estado inválido. Debe ser uno de: {', '.join(valid_estados)}"
             )
 
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -268,6 +252,7 @@ def update_orden_estado(folio: str, estado: str):
         )
 
         conn.commit()
+        invalidate_report_pdf(folio)
         return {"success": True, "message": f"Estado actualizado a '{estado}' exitosamente"}
     
     except mysql.connector.Error as err:
@@ -285,12 +270,7 @@ def update_orden_estado(folio: str, estado: str):
 @ordenes.put("/{folio}")
 def update_orden_servicio(folio: str, request: OrdenServicio):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -337,6 +317,7 @@ def update_orden_servicio(folio: str, request: OrdenServicio):
         )
 
         conn.commit()
+        invalidate_report_pdf(folio)
         return {"success": True, "message": "Orden actualizada exitosamente"}
     
     except mysql.connector.Error as err:
@@ -352,12 +333,7 @@ def update_orden_servicio(folio: str, request: OrdenServicio):
 @ordenes.delete("/{folio}")
 def delete_orden_by_folio(folio:  str = Path(...,description="Folio de la Orden" )):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -369,6 +345,7 @@ def delete_orden_by_folio(folio:  str = Path(...,description="Folio de la Orden"
             raise HTTPException(status_code=404, detail="Folio no encontrado")
         
         conn.commit()
+        invalidate_report_pdf(folio)
         return {"sucess": True, "message": "Orden de servicio eliminada"}
     
     except mysql.connector.Error as err:
@@ -0,0 +1,193 @@
+"""
+Paginación por cursor (keyset), proyección de campos y total opcional para los
+endpoints de listas completas (clientes, compresores, órdenes, notas, historial
+de reportes y registros de mantenimiento).
+
+Parámetros de query (todos opcionales; sin `limit` se devuelve la lista completa
+como antes):
+
+    limit          Tamaño de página (1..MAX_PAGE_SIZE)
+    cursor         Valor de `next_cursor` de la página anterior
+    fields         Campos a devolver, separados por coma (p. ej. folio,estado)
+    include_total  true para contar todas las filas del filtro (una consulta extra)
+
+La página siguiente se obtiene con `WHERE (clave) < (última clave vista)` sobre
+el mismo ORDER BY, en lugar de OFFSET, así que cada página cuesta lo mismo sin
+importar qué tan adentro esté. Las columnas de la clave pueden ser NULL: MySQL
+ordena NULL como el menor valor y la condición lo toma en cuenta. Sin paginación la consulta no lleva ORDER BY salvo que el
+endpoint ya ordenara así antes (`keep_order`).
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query
+
+MAX_PAGE_SIZE = 500
+
+
+class PageParams:
+    """Parámetros de paginación de una petición"""
+
+    def __init__(self, limit: Optional[int], cursor: Optional[str], fields: Optional[str], include_total: bool):
+        self.limit = limit
+        self.cursor = decode_cursor(cursor) if cursor else None
+        self.fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        self.include_total = include_total
+
+    @property
+    def paginated(self) -> bool:
+        """Si la petición pidió algo más que la lista completa"""
+        return self.limit is not None or self.cursor is not None or self.include_total
+
+
+def page_params(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamaño de página (sin limit: todo)"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma"),
+    include_total: bool = Query(False, description="Incluye el total de filas (consulta extra)"),
+) -> PageParams:
+    """Dependencia de FastAPI: `page: PageParams = Depends(page_params)`"""
+    return PageParams(limit, cursor, fields, include_total)
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime) else value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Clave de la última fila → token opaco para `cursor`"""
+    raw = json.dumps([_to_json(v) for v in values], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> list:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="cursor inválido")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail="cursor inválido")
+    return values
+
+
+def _equals(column: str, value) -> Tuple[str, list]:
+    return (f"{column} IS NULL", []) if value is None else (f"{column} = %s", [value])
+
+
+def _after(column: str, direction: str, value) -> Optional[Tuple[str, list]]:
+    """`column` estrictamente después de `value`; None si no hay nada después"""
+    if direction.upper() == "DESC":
+        # NULL va al final en DESC
+        return None if value is None else (f"({column} < %s OR {column} IS NULL)", [value])
+    return (f"{column} IS NOT NULL", []) if value is None else (f"{column} > %s", [value])
+
+
+def keyset_condition(keys: Sequence[Tuple[str, str]], values: Sequence) -> Tuple[str, list]:
+    """
+    Condición "después de `values`" para un ORDER BY de varias columnas.
+
+    Args:
+        keys: [(columna, "ASC" | "DESC"), ...] — juntas deben identificar la fila
+        values: Valores de esas columnas en la última fila vista
+
+    Se expande como (a < x) OR (a = x AND b < y) para que MySQL use el índice,
+    con IS NULL donde la última fila traía NULL.
+    """
+    if len(values) != len(keys):
+        raise HTTPException(status_code=400, detail="cursor inválido")
+    clauses = []
+    params = []
+    for i, (column, direction) in enumerate(keys):
+        after = _after(column, direction, values[i])
+        if after is None:
+            continue
+        parts = []
+        for j in range(i):
+            sql, part_params = _equals(keys[j][0], values[j])
+            parts.append(sql)
+            params.extend(part_params)
+        parts.append(after[0])
+        params.extend(after[1])
+        clauses.append("(" + " AND ".join(parts) + ")")
+    if not clauses:
+        # La última fila vista era la última posible
+        return "FALSE", params
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def order_by(keys: Sequence[Tuple[str, str]]) -> str:
+    return "ORDER BY " + ", ".join(f"{column} {direction}" for column, direction in keys)
+
+
+def build_query(select_sql: str, where: List[str], params: list, keys: Sequence[Tuple[str, str]],
+                page: PageParams, keep_order: bool = False) -> Tuple[str, list]:
+    """
+    SELECT con filtros, condición de cursor, ORDER BY y LIMIT (una fila de más
+    para saber si hay otra página).
+
+    Args:
+        keep_order: Ordena por `keys` aunque no se pida paginación (el endpoint ya
+            devolvía la lista en ese orden)
+    """
+    where = list(where)
+    params = list(params)
+    if page.cursor is not None:
+        condition, cursor_params = keyset_condition(keys, page.cursor)
+        where.append(condition)
+        params.extend(cursor_params)
+    sql = select_sql
+    if where:
+        sql += "\n WHERE " + " AND ".join(where)
+    if page.paginated or keep_order:
+        sql += "\n " + order_by(keys)
+    if page.limit is not None:
+        sql += "\n LIMIT %s"
+        params.append(page.limit + 1)
+    return sql, params
+
+
+def count_rows(cursor, from_sql: str, where: List[str], params: list, count_expr: str = "COUNT(*)") -> int:
+    """Total de filas del filtro, sin cursor ni límite"""
+    sql = f"SELECT {count_expr} {from_sql}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    cursor.execute(sql, tuple(params))
+    row = cursor.fetchone()
+    return list(row.values())[0] if isinstance(row, dict) else row[0]
+
+
+def split_page(rows: list, page: PageParams, key_of: Callable[[object], Sequence]) -> Tuple[list, Optional[str]]:
+    """Quita la fila extra y calcula next_cursor (None en la última página)"""
+    if page.limit is None or len(rows) <= page.limit:
+        return rows, None
+    rows = rows[:page.limit]
+    return rows, encode_cursor(key_of(rows[-1]))
+
+
+def project(items: List[dict], page: PageParams) -> List[dict]:
+    """Deja solo los campos pedidos en `fields`"""
+    if not page.fields or not items:
+        return items
+    unknown = [f for f in page.fields if f not in items[0]]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Campos desconocidos: {', '.join(unknown)}")
+    return [{f: item[f] for f in page.fields} for item in items]
+
+
+def page_response(items: List[dict], page: PageParams, next_cursor: Optional[str],
+                  total: Optional[int] = None, **extra) -> dict:
+    """{"data": [...], "next_cursor": ..., "total": ...} (campos de paginación solo si se pidieron)"""
+    response = {**extra, "data": project(items, page)}
+    if page.paginated:
+        response["next_cursor"] = next_cursor
+    if total is not None:
+        response["total"] = total
+    return response
@@ -0,0 +1,255 @@
+"""
+Caché de PDFs renderizados para reportes finalizados.
+
+Los reportes terminados/enviados ya no cambian, así que su PDF se renderiza una
+sola vez y se guarda en disco local y en GCS bajo la clave (tipo, folio, versión).
+La versión de contenido vive en la tabla `pdf_cache_versiones`; cualquier
+escritura que modifique el folio (pre/post mantenimiento, fotos, firma, etc.)
+llama a invalidate_report_pdf, que incrementa la versión y borra las copias (las
+locales en el momento; las de GCS en el pool de photo_processing, fuera de la
+petición).
+
+La tabla se crea al arrancar la API (api_server) o a mano:
+    python -m scripts.api.pdf_cache --init
+
+Environment:
+    PDF_CACHE_DIR  Directorio local (default: <repo>/.cache/pdfs)
+"""
+import asyncio
+import os
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from .db_utils import get_db_connection
+from .drive_utils import get_gcs_client, BUCKET_NAME
+from .photo_processing import submit
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent.parent
+PDF_CACHE_DIR = Path(os.getenv("PDF_CACHE_DIR", str(SCRIPT_DIR / ".cache" / "pdfs")))
+PDF_CACHE_GCS_PREFIX = "pdf_cache"
+PDF_CACHE_TABLE = "pdf_cache_versiones"
+
+PDF_CACHE_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {PDF_CACHE_TABLE} (
+        tipo VARCHAR(16) NOT NULL,
+        folio VARCHAR(128) NOT NULL,
+        version INT NOT NULL DEFAULT 0,
+        fecha_actualizacion DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (tipo, folio)
+    )
+"""
+
+# Tipos de reporte: mantenimiento de compresor y secadora
+KIND_MTTO = "mtto"
+KIND_SECADORA = "secadora"
+
+
+def _clean_folio(folio: str) -> str:
+    return folio.strip().replace("/", "-").replace("\\", "-")
+
+
+def _local_dir(kind: str, folio: str) -> Path:
+    return PDF_CACHE_DIR / kind / _clean_folio(folio)
+
+
+def _blob_prefix(kind: str, folio: str) -> str:
+    return f"{PDF_CACHE_GCS_PREFIX}/{kind}/{_clean_folio(folio)}/"
+
+
+def get_content_version(kind: str, folio: str) -> int:
+    """Versión de contenido actual del folio (0 si nunca se ha invalidado)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT version FROM {PDF_CACHE_TABLE} WHERE tipo = %s AND folio = %s",
+        (kind, folio),
+    )
+    row = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    return row[0] if row else 0
+
+
+def is_finalized(kind: str, folio: str) -> bool:
+    """Indica si el reporte ya está terminado/enviado y su PDF se puede cachear"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if kind == KIND_SECADORA:
+        cursor.execute(
+            "SELECT estado FROM reportes_secadora WHERE folio = %s",
+            (folio,),
+        )
+        row = cursor.fetchone()
+        finalized = bool(row) and row[0] in ("terminado", "enviado")
+    else:
+        cursor.execute(
+            """SELECT o.estado, rs.enviado
+               FROM ordenes_servicio o
+               LEFT JOIN reportes_status rs ON rs.folio = o.folio
+               WHERE o.folio = %s""",
+            (folio,),
+        )
+        row = cursor.fetchone()
+        finalized = bool(row) and (row[0] in ("terminado", "enviado") or row[1] == 1)
+    cursor.close()
+    conn.close()
+    return finalized
+
+
+def load_cached_pdf(kind: str, folio: str, version: int) -> Optional[bytes]:
+    """Busca el PDF en disco y, si no está, en GCS (y lo copia a disco)"""
+    path = _local_dir(kind, folio) / f"v{version}.pdf"
+    if path.exists():
+        return path.read_bytes()
+
+    blob = get_gcs_client().bucket(BUCKET_NAME).blob(f"{_blob_prefix(kind, folio)}v{version}.pdf")
+    if not blob.exists():
+        return None
+    content = blob.download_as_bytes()
+    _write_local(path, content)
+    return content
+
+
+def _write_local(path: Path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+def store_pdf(kind: str, folio: str, version: int, content: bytes) -> None:
+    """Guarda el PDF en disco local y en GCS"""
+    _write_local(_local_dir(kind, folio) / f"v{version}.pdf", content)
+    blob = get_gcs_client().bucket(BUCKET_NAME).blob(f"{_blob_prefix(kind, folio)}v{version}.pdf")
+    blob.upload_from_string(content, content_type="application/pdf")
+
+
+def _delete_gcs_copies(kind: str, folio: str) -> None:
+    try:
+        client = get_gcs_client()
+        for blob in client.list_blobs(BUCKET_NAME, prefix=_blob_prefix(kind, folio)):
+            blob.delete()
+    except Exception as e:
+        print(f"⚠️ No se pudieron borrar los PDFs cacheados en GCS de {folio}: {e}")
+
+
+def invalidate_report_pdf(folio: str, kind: str = KIND_MTTO) -> None:
+    """
+    Invalida el PDF cacheado de un folio: incrementa la versión y borra las copias.
+
+    Las copias se borran aunque falle el cambio de versión, para que nunca se
+    sirva el PDF anterior a la edición. Nunca lanza excepciones, para no romper
+    la escritura que la llama.
+    """
+    if not folio:
+        return
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""INSERT INTO {PDF_CACHE_TABLE} (tipo, folio, version)
+                VALUES (%s, %s, 1)
+                ON DUPLICATE KEY UPDATE version = version + 1""",
+            (kind, folio),
+        )
+        conn.commit()
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        print(f"⚠️ No se pudo incrementar la versión del PDF cacheado de {folio}: {e}")
+
+    local_dir = _local_dir(kind, folio)
+    if local_dir.exists():
+        for path in local_dir.glob("*.pdf"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    try:
+        submit(_delete_gcs_copies, kind, folio)
+    except RuntimeError:
+        # Pool ya cerrado (apagado del proceso)
+        _delete_gcs_copies(kind, folio)
+
+
+def invalidate_report_pdfs_for_serie(numero_serie: str) -> None:
+    """Invalida los PDFs de todas las órdenes de servicio de un compresor"""
+    if not numero_serie:
+        return
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT folio FROM ordenes_servicio WHERE numero_serie = %s",
+            (numero_serie,),
+        )
+        folios = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        print(f"⚠️ No se pudieron buscar los folios del compresor {numero_serie}: {e}")
+        return
+    for folio in folios:
+        invalidate_report_pdf(folio, KIND_MTTO)
+
+
+async def get_or_render_pdf(kind: str, folio: str, render: Callable[[], Awaitable[bytes]]) -> bytes:
+    """
+    Devuelve el PDF cacheado si el reporte está finalizado; si no, lo renderiza.
+    Los PDFs de reportes finalizados se guardan tras el primer render.
+    """
+    try:
+        finalized = await asyncio.to_thread(is_finalized, kind, folio)
+        version = await asyncio.to_thread(get_content_version, kind, folio) if finalized else None
+    except Exception as e:
+        print(f"⚠️ Caché de PDF no disponible para {folio}: {e}")
+        return await render()
+
+    if finalized:
+        try:
+            cached = await asyncio.to_thread(load_cached_pdf, kind, folio, version)
+            if cached:
+                print(f"📄 PDF de {folio} servido desde caché (v{version})")
+                return cached
+        except Exception as e:
+            print(f"⚠️ No se pudo leer el PDF cacheado de {folio}: {e}")
+
+    pdf_bytes = await render()
+
+    if finalized:
+        # Se guarda con la versión leída antes del render: si se invalidó mientras tanto,
+        # esta copia queda huérfana y nunca se sirve.
+        try:
+            await asyncio.to_thread(store_pdf, kind, folio, version, pdf_bytes)
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar el PDF de {folio} en caché: {e}")
+    return pdf_bytes
+
+
+def ensure_pdf_cache_table() -> None:
+    """Crea la tabla de versiones si no existe"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(PDF_CACHE_DDL)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Caché de PDFs de reportes finalizados")
+    parser.add_argument("--init", action="store_true", help="Crea la tabla de versiones")
+    parser.add_argument("--invalidate", metavar="FOLIO", help="Invalida el PDF cacheado de un folio")
+    parser.add_argument("--kind", default=KIND_MTTO, choices=[KIND_MTTO, KIND_SECADORA])
+    args = parser.parse_args()
+
+    if args.init:
+        ensure_pdf_cache_table()
+        print(f"✅ Tabla {PDF_CACHE_TABLE} lista")
+    if args.invalidate:
+        invalidate_report_pdf(args.invalidate, args.kind)
+        print(f"✅ PDF de {args.invalidate} invalidado")
+    if not (args.init or args.invalidate):
+        parser.print_help()
@@ -2,20 +2,159 @@
 PDF Generation using Playwright.
 Runs the browser in a separate subprocess to avoid asyncio/ProactorEventLoop
 conflicts on Windows when called from uvicorn.
+
+The subprocess is long-lived (pdf_worker_script.py --serve): it is started with
+the API, keeps Chromium and the GCS client warm and renders several jobs at once.
+Requests and PDFs travel over its stdin/stdout pipes. If the worker dies it is
+restarted on the next request; if a job outlives PDF_JOB_TIMEOUT (plus a margin)
+the worker is considered stuck and killed.
+
+Environment:
+    PDF_JOB_TIMEOUT         Seconds allowed per render (default: 240)
+    PDF_WORKER_CONCURRENCY  Renders in parallel inside the worker (default: 3)
 """
 import asyncio
+import itertools
+import json
 import os
 import subprocess
 import sys
+import threading
 import traceback
+from concurrent.futures import Future
 
 from fastapi import HTTPException
 
 _WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf_worker_script.py")
 
+PDF_JOB_TIMEOUT = float(os.getenv("PDF_JOB_TIMEOUT", "240"))
+
+
+class PdfWorker:
+    """Client for the persistent PDF worker subprocess."""
+
+    def __init__(self):
+        self._proc = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending: dict = {}
+        self._ids = itertools.count(1)
+
+    def start(self) -> None:
+        """Start the worker process if it is not running."""
+        with self._lock:
+            self._ensure_started()
+
+    def _ensure_started(self):
+        """Running worker process, started if needed. Caller holds _lock."""
+        if self._proc is not None and self._proc.poll() is None:
+            return self._proc
+        self._proc = subprocess.Popen(
+            [sys.executable, _WORKER, "--serve"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=None,  # worker logs go straight to the server console
+            bufsize=0,
+        )
+        threading.Thread(target=self._read_responses, args=(self._proc,), daemon=True).start()
+        print(f"🟢 PDF worker started (pid {self._proc.pid})")
+        return self._proc
+
+    def stop(self) -> None:
+        """Close the worker's stdin so it finishes pending jobs and exits."""
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=PDF_JOB_TIMEOUT)
+        except Exception:
+            proc.kill()
+
+    def kill(self, proc) -> None:
+        """Kill a wedged worker; its pending jobs fail and the next request starts a new one."""
+        with self._lock:
+            if self._proc is proc:
+                self._proc = None
+        if proc.poll() is None:
+            print(f"⚠️  Killing unresponsive PDF worker (pid {proc.pid})")
+            proc.kill()
+
+    def _read_responses(self, proc) -> None:
+        """Reader thread: dispatch framed responses to the waiting futures."""
+        stdout = proc.stdout
+        try:
+            while True:
+                line = stdout.readline()
+                if not line:
+                    break
+                header = json.loads(line)
+                payload = b""
+                if header.get("ok"):
+                    size = header["size"]
+                    chunks = []
+                    while size > 0:
+                        chunk = stdout.read(size)
+                        if not chunk:
+                            raise EOFError("PDF worker closed stdout mid-response")
+                        chunks.append(chunk)
+                        size -= len(chunk)
+                    payload = b"".join(chunks)
+                _, future = self._pending.pop(header.get("id"), (None, None))
+                if future is None or future.done():
+                    continue
+                if header.get("ok"):
+                    future.set_result(payload)
+                else:
+                    future.set_exception(RuntimeError(header.get("error", "PDF worker error")))
+        except Exception as e:
+            print(f"❌ PDF worker reader stopped: {e!r}")
+        finally:
+            # Fail everything still waiting on this process; the next request restarts it.
+            # Under _lock so submit() cannot register a job on it after the sweep.
+            code = proc.poll()
+            with self._lock:
+                if self._proc is proc:
+                    self._proc = None
+                for job_id, (job_proc, future) in list(self._pending.items()):
+                    if job_proc is not proc:
+                        continue
+                    self._pending.pop(job_id, None)
+                    if not future.done():
+                        future.set_exception(RuntimeError(f"PDF worker exited ({code})"))
+
+    def submit(self, folio: str, frontend_url: str, view_path: str, timeout: float):
+        """Send a render job; returns (worker process, future resolving to the PDF bytes)."""
+        job_id = next(self._ids)
+        future: Future = Future()
+        with self._lock:
+            proc = self._ensure_started()
+            self._pending[job_id] = (proc, future)
+        # A cancelled wait (timeout / client gone) must not leave the entry behind
+        future.add_done_callback(lambda _: self._pending.pop(job_id, None))
+        request = {
+            "id": job_id,
+            "folio": folio,
+            "frontend_url": frontend_url,
+            "view_path": view_path,
+            "timeout": timeout,
+        }
+        try:
+            with self._write_lock:
+                proc.stdin.write((json.dumps(request) + "\n").encode("utf-8"))
+                proc.stdin.flush()
+        except Exception:
+            self._pending.pop(job_id, None)
+            raise
+        return proc, future
+
+
+pdf_worker = PdfWorker()
+
 
 def _run_worker(folio: str, frontend_url: str, view_path: str = "/features/compressor-maintenance/reports/view") -> bytes:
-    """Blocking call — intended to run inside run_in_executor."""
+    """Blocking one-shot render in a fresh subprocess (fallback if the persistent worker fails)."""
     result = subprocess.run(
         [sys.executable, _WORKER, folio, frontend_url, view_path],
         capture_output=True,
@@ -37,11 +176,22 @@ def _run_worker(folio: str, frontend_url: str, view_path: str = "/features/compr
 async def generate_pdf_from_react(folio: str, frontend_url: str = "https://dashboard.ventologix.com", view_path: str = "/features/compressor-maintenance/reports/view") -> bytes:
     """
     Generate a PDF by capturing the React view page using Playwright.
-    The browser runs in a subprocess to avoid Windows event-loop conflicts.
+    The browser runs in the persistent worker subprocess to avoid Windows event-loop conflicts.
     """
     try:
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _run_worker, folio, frontend_url, view_path)
+        try:
+            proc, future = pdf_worker.submit(folio, frontend_url, view_path, PDF_JOB_TIMEOUT)
+        except OSError as e:
+            print(f"⚠️  PDF worker unavailable ({e!r}), rendering in a one-shot subprocess")
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, _run_worker, folio, frontend_url, view_path)
+        try:
+            # The worker enforces the job timeout; the extra margin covers startup and transfer
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=PDF_JOB_TIMEOUT + 30)
+        except asyncio.TimeoutError:
+            # Past its own timeout the worker is stuck; replace it
+            pdf_worker.kill(proc)
+            raise
     except Exception as e:
         tb = traceback.format_exc()
         print(f"❌ Error generating PDF: {type(e).__name__}: {repr(e)}\n{tb}")
@@ -2,15 +2,25 @@
 Standalone PDF worker — runs as a subprocess so Playwright gets a fresh
 event loop (ProactorEventLoop on Windows) without conflicting with uvicorn.
 
-Usage: python pdf_worker_script.py <folio> <frontend_url>
+One-shot usage: python pdf_worker_script.py <folio> <frontend_url> [view_path]
 Output: raw PDF bytes written to stdout
+
+Persistent usage: python pdf_worker_script.py --serve
+Keeps Chromium and the GCS client warm and renders jobs concurrently.
+Protocol over stdin/stdout (one request per line, responses in any order):
+    request:  {"id": 1, "folio": "...", "frontend_url": "...", "view_path": "...", "timeout": 120}\n
+    response: {"id": 1, "ok": true, "size": N}\n followed by N bytes of PDF
+              {"id": 1, "ok": false, "error": "..."}\n
+Logs go to stderr.
 """
 import sys
 import os
 import asyncio
 import base64
+import json
 import mimetypes
 from pathlib import Path
+from urllib.parse import urlparse, parse_qs
 
 # Add the script's directory to sys.path so we can import sibling modules
 sys.path.insert(0, str(Path(__file__).resolve().parent))
@@ -20,11 +30,25 @@ from playwright.async_api import async_playwright
 # GCS direct access for serving images without HTTP proxy round-trips
 from drive_utils import get_gcs_client, BUCKET_NAME
 
+DEFAULT_VIEW_PATH = "/features/compressor-maintenance/reports/view"
+DEFAULT_JOB_TIMEOUT = 240
+MAX_CONCURRENT_JOBS = int(os.getenv("PDF_WORKER_CONCURRENCY", "3"))
+
+# Reused across jobs so credentials are loaded only once per worker process
+_gcs_client = None
+
+
+def _get_client():
+    global _gcs_client
+    if _gcs_client is None:
+        _gcs_client = get_gcs_client()
+    return _gcs_client
+
 
 def _fetch_gcs_blob_as_data_url(blob_name: str) -> str | None:
     """Download a blob from GCS and return it as a base64 data URL."""
     try:
-        client = get_gcs_client()
+        client = _get_client()
         gcs_blob = client.bucket(BUCKET_NAME).blob(blob_name)
         content = gcs_blob.download_as_bytes()
         content_type = gcs_blob.content_type or mimetypes.guess_type(blob_name)[0] or "image/jpeg"
@@ -35,10 +59,8 @@ def _fetch_gcs_blob_as_data_url(blob_name: str) -> str | None:
         return None
 
 
-async def main() -> None:
-    folio = sys.argv[1]
-    frontend_url = sys.argv[2]
-    view_path = sys.argv[3] if len(sys.argv) > 3 else "/features/compressor-maintenance/reports/view"
+async def render_pdf(browser, folio: str, frontend_url: str, view_path: str = DEFAULT_VIEW_PATH) -> bytes:
+    """Render one report view to PDF bytes in its own browser context."""
     view_url = f"{frontend_url}{view_path}?folio={folio}"
 
     print(f"📄 Opening: {view_url}", file=sys.stderr)
@@ -46,127 +68,139 @@ async def main() -> None:
     # Pre-load a cache for intercepted image requests
     image_cache: dict[str, str] = {}  # blob_name -> data URL
 
+    context = await browser.new_context()
+    try:
+        page = await context.new_page()
+
+        # Intercept foto proxy requests and serve images directly as data URLs
+        # This avoids HTTP round-trips through the API proxy
+        async def handle_route(route):
+            url = route.request.url
+            if "/reporte_mtto/foto?" in url:
+                # Extract blob parameter
+                parsed = urlparse(url)
+                params = parse_qs(parsed.query)
+                blob_name = params.get("blob", [None])[0]
+
+                if blob_name:
+                    # Check cache first
+                    if blob_name not in image_cache:
+                        # Blocking GCS download runs off the event loop so other jobs keep rendering
+                        data_url = await asyncio.to_thread(_fetch_gcs_blob_as_data_url, blob_name)
+                        if data_url:
+                            image_cache[blob_name] = data_url
+
+                    if blob_name in image_cache:
+                        data_url = image_cache[blob_name]
+                        # Extract content type and body from data URL
+                        header, b64data = data_url.split(",", 1)
+                        content_type = header.split(":")[1].split(";")[0]
+                        body = base64.b64decode(b64data)
+                        await route.fulfill(
+                            status=200,
+                            content_type=content_type,
+                            body=body,
+                        )
+                        return
+
+            # Fallback: let the request continue normally
+            await route.continue_()
+
+        await page.route("**/reporte_mtto/foto**", handle_route)
+
+        # domcontentloaded is fast; we rely on the selector wait for data
+        await page.goto(view_url, wait_until="domcontentloaded", timeout=60000)
+
+        # Wait for the actual report content (not the loading overlay)
+        try:
+            await page.wait_for_selector(".bg-gradient-to-r", timeout=60000)
+            print("✅ Report content loaded", file=sys.stderr)
+        except Exception:
+            await page.wait_for_selector(".shadow-lg", timeout=60000)
+            print("⚠️  Used fallback selector", file=sys.stderr)
+
+        # Brief wait for React to finish rendering sections
+        await page.wait_for_timeout(1500)
+
+        # Scroll to trigger any lazy content
+        await page.evaluate("""async () => {
+            await new Promise(resolve => {
+                let totalHeight = 0;
+                const distance = 400;
+                const timer = setInterval(() => {
+                    window.scrollBy(0, distance);
+                    totalHeight += distance;
+                    if (totalHeight >= document.body.scrollHeight) {
+                        clearInterval(timer);
+                        window.scrollTo(0, 0);
+                        resolve();
+                    }
+                }, 100);
+            });
+        }""")
+
+        # Wait for all images to be fully decoded and ready to paint
+        # img.decode() guarantees the image is decompressed and renderable
+        img_stats = await page.evaluate("""async () => {
+            const imgs = Array.from(document.querySelectorAll('img'));
+            let decoded = 0, failed = 0;
+            await Promise.all(imgs.map(async (img) => {
+                try {
+                    // First ensure the image has loaded
+                    if (!img.complete) {
+                        await Promise.race([
+                            new Promise((res, rej) => {
+                                img.addEventListener('load', res);
+                                img.addEventListener('error', rej);
+                            }),
+                            new Promise((_, rej) => setTimeout(() => rej('timeout'), 30000))
+                        ]);
+                    }
+                    // Then force full decode — this is what guarantees pixels are ready
+                    await img.decode();
+                    decoded++;
+                } catch (e) {
+                    failed++;
+                }
+            }));
+            return { total: imgs.length, decoded, failed };
+        }""")
+
+        print(f"📸 Images: {img_stats['total']} total, {img_stats['decoded']} decoded, {img_stats['failed']} failed", file=sys.stderr)
+
+        # Hide non-print elements
+        await page.evaluate("""() => {
+            document.querySelectorAll('.no-print').forEach(el => el.style.display = 'none');
+            const sidebar = document.querySelector('aside');
+            if (sidebar) sidebar.style.display = 'none';
+            document.querySelectorAll('nav').forEach(nav => nav.style.display = 'none');
+            document.querySelectorAll('[class*="fixed"], [class*="sticky"]').forEach(el => {
+                if (!el.closest('.bg-white.rounded-lg')) el.style.display = 'none';
+            });
+            document.body.style.backgroundColor = 'white';
+            const main = document.querySelector('.min-h-screen');
+            if (main) { main.style.minHeight = 'auto'; main.style.padding = '20px'; }
+        }""")
+
+        return await page.pdf(
+            format="A3",
+            print_background=True,
+            margin={"top": "0.5in", "right": "0.5in", "bottom": "0.5in", "left": "0.5in"},
+            prefer_css_page_size=False,
+        )
+    finally:
+        await context.close()
+
+
+async def main() -> None:
+    folio = sys.argv[1]
+    frontend_url = sys.argv[2]
+    view_path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_VIEW_PATH
+
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         try:
-            page = await browser.new_page()
-
-            # Intercept foto proxy requests and serve images directly as data URLs
-            # This avoids HTTP round-trips through the API proxy
-            async def handle_route(route):
-                url = route.request.url
-                if "/reporte_mtto/foto?" in url:
-                    # Extract blob parameter
-                    from urllib.parse import urlparse, parse_qs
-                    parsed = urlparse(url)
-                    params = parse_qs(parsed.query)
-                    blob_name = params.get("blob", [None])[0]
-
-                    if blob_name:
-                        # Check cache first
-                        if blob_name not in image_cache:
-                            data_url = _fetch_gcs_blob_as_data_url(blob_name)
-                            if data_url:
-                                image_cache[blob_name] = data_url
-
-                        if blob_name in image_cache:
-                            data_url = image_cache[blob_name]
-                            # Extract content type and body from data URL
-                            header, b64data = data_url.split(",", 1)
-                            content_type = header.split(":")[1].split(";")[0]
-                            body = base64.b64decode(b64data)
-                            await route.fulfill(
-                                status=200,
-                                content_type=content_type,
-                                body=body,
-                            )
-                            return
-
-                # Fallback: let the request continue normally
-                await route.continue_()
-
-            await page.route("**/reporte_mtto/foto**", handle_route)
-
-            # domcontentloaded is fast; we rely on the selector wait for data
-            await page.goto(view_url, wait_until="domcontentloaded", timeout=60000)
-
-            # Wait for the actual report content (not the loading overlay)
-            try:
-                await page.wait_for_selector(".bg-gradient-to-r", timeout=60000)
-                print("✅ Report content loaded", file=sys.stderr)
-            except Exception:
-                await page.wait_for_selector(".shadow-lg", timeout=60000)
-                print("⚠️  Used fallback selector", file=sys.stderr)
-
-            # Brief wait for React to finish rendering sections
-            await page.wait_for_timeout(1500)
-
-            # Scroll to trigger any lazy content
-            await page.evaluate("""async () => {
-                await new Promise(resolve => {
-                    let totalHeight = 0;
-                    const distance = 400;
-                    const timer = setInterval(() => {
-                        window.scrollBy(0, distance);
-                        totalHeight += distance;
-                        if (totalHeight >= document.body.scrollHeight) {
-                            clearInterval(timer);
-                            window.scrollTo(0, 0);
-                            resolve();
-                        }
-                    }, 100);
-                });
-            }""")
-
-            # Wait for all images to be fully decoded and ready to paint
-            # img.decode() guarantees the image is decompressed and renderable
-            img_stats = await page.evaluate("""async () => {
-                const imgs = Array.from(document.querySelectorAll('img'));
-                let decoded = 0, failed = 0;
-                await Promise.all(imgs.map(async (img) => {
-                    try {
-                        // First ensure the image has loaded
-                        if (!img.complete) {
-                            await Promise.race([
-                                new Promise((res, rej) => {
-                                    img.addEventListener('load', res);
-                                    img.addEventListener('error', rej);
-                                }),
-                                new Promise((_, rej) => setTimeout(() => rej('timeout'), 30000))
-                            ]);
-                        }
-                        // Then force full decode — this is what guarantees pixels are ready
-                        await img.decode();
-                        decoded++;
-                    } catch (e) {
-                        failed++;
-                    }
-                }));
-                return { total: imgs.length, decoded, failed };
-            }""")
-
-            print(f"📸 Images: {img_stats['total']} total, {img_stats['decoded']} decoded, {img_stats['failed']} failed", file=sys.stderr)
-
-            # Hide non-print elements
-            await page.evaluate("""() => {
-                document.querySelectorAll('.no-print').forEach(el => el.style.display = 'none');
-                const sidebar = document.querySelector('aside');
-                if (sidebar) sidebar.style.display = 'none';
-                document.querySelectorAll('nav').forEach(nav => nav.style.display = 'none');
-                document.querySelectorAll('[class*="fixed"], [class*="sticky"]').forEach(el => {
-                    if (!el.closest('.bg-white.rounded-lg')) el.style.display = 'none';
-                });
-                document.body.style.backgroundColor = 'white';
-                const main = document.querySelector('.min-h-screen');
-                if (main) { main.style.minHeight = 'auto'; main.style.padding = '20px'; }
-            }""")
-
-            pdf_bytes = await page.pdf(
-                format="A3",
-                print_background=True,
-                margin={"top": "0.5in", "right": "0.5in", "bottom": "0.5in", "left": "0.5in"},
-                prefer_css_page_size=False,
-            )
+            pdf_bytes = await render_pdf(browser, folio, frontend_url, view_path)
         finally:
             await browser.close()
 
@@ -174,5 +208,79 @@ async def main() -> None:
     print("✅ PDF generated", file=sys.stderr)
 
 
+async def serve() -> None:
+    """Persistent mode: keep one Chromium alive and render requests read from stdin."""
+    loop = asyncio.get_running_loop()
+    out = sys.stdout.buffer
+    # stdout carries the protocol; stray prints from libraries go to stderr
+    sys.stdout = sys.stderr
+    write_lock = asyncio.Lock()
+    browser_lock = asyncio.Lock()
+    slots = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+    tasks: set[asyncio.Task] = set()
+
+    async def respond(header: dict, payload: bytes = b"") -> None:
+        async with write_lock:
+            out.write((json.dumps(header) + "\n").encode("utf-8"))
+            if payload:
+                out.write(payload)
+            out.flush()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        _get_client()
+        print(f"🟢 PDF worker ready (concurrency={MAX_CONCURRENT_JOBS})", file=sys.stderr)
+
+        async def current_browser():
+            nonlocal browser
+            async with browser_lock:
+                if not browser.is_connected():
+                    print("⚠️  Browser disconnected, relaunching", file=sys.stderr)
+                    browser = await p.chromium.launch(headless=True)
+                return browser
+
+        async def run_job(job: dict) -> None:
+            job_id = job.get("id")
+            timeout = float(job.get("timeout") or DEFAULT_JOB_TIMEOUT)
+            try:
+                async with slots:
+                    pdf_bytes = await asyncio.wait_for(
+                        render_pdf(
+                            await current_browser(),
+                            job["folio"],
+                            job["frontend_url"],
+                            job.get("view_path") or DEFAULT_VIEW_PATH,
+                        ),
+                        timeout=timeout,
+                    )
+                await respond({"id": job_id, "ok": True, "size": len(pdf_bytes)}, pdf_bytes)
+                print(f"✅ PDF generated for {job['folio']}", file=sys.stderr)
+            except asyncio.TimeoutError:
+                await respond({"id": job_id, "ok": False, "error": f"PDF job timed out after {timeout:.0f}s"})
+            except Exception as e:
+                await respond({"id": job_id, "ok": False, "error": f"{type(e).__name__}: {e!r}"})
+
+        try:
+            while True:
+                line = await loop.run_in_executor(None, sys.stdin.buffer.readline)
+                if not line:
+                    break  # parent closed the pipe
+                try:
+                    job = json.loads(line)
+                except ValueError:
+                    print(f"⚠️  Ignoring malformed request: {line!r}", file=sys.stderr)
+                    continue
+                task = asyncio.create_task(run_job(job))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            await browser.close()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        asyncio.run(serve())
+    else:
+        asyncio.run(main())
@@ -0,0 +1,302 @@
+"""
+On-disk LRU cache for report photos served by /reporte_mtto/foto.
+
+Originals are streamed from GCS straight to disk (never buffered in memory) and
+thumbnails are generated from the cached original at a fixed set of sizes.
+Cached entries are revalidated against the GCS object generation after
+PHOTO_CACHE_REVALIDATE_S seconds, because re-uploads overwrite blob names.
+
+The total cache size is counted once (first request) and then kept up to date
+on every write, so the directory is only scanned when eviction is actually
+needed. Photos are served from an open file handle (open_cached_photo), which
+keeps streaming even if eviction unlinks the entry meanwhile; if it was
+evicted before it could be opened, it is fetched again.
+
+Environment:
+    PHOTO_CACHE_DIR           Cache directory (default: <repo>/.cache/fotos)
+    PHOTO_CACHE_MAX_MB        Max total size before LRU eviction (default: 1024)
+    PHOTO_CACHE_REVALIDATE_S  Seconds before re-checking GCS metadata (default: 600)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+from .drive_utils import get_gcs_client, BUCKET_NAME
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent.parent
+CACHE_DIR = Path(os.getenv("PHOTO_CACHE_DIR", str(SCRIPT_DIR / ".cache" / "fotos")))
+CACHE_MAX_BYTES = int(os.getenv("PHOTO_CACHE_MAX_MB", "1024")) * 1024 * 1024
+REVALIDATE_SECONDS = int(os.getenv("PHOTO_CACHE_REVALIDATE_S", "600"))
+
+# Fixed thumbnail sizes (longest side in px) offered for the report grid
+THUMBNAIL_SIZES = {"sm": 160, "md": 640}
+THUMBNAIL_QUALITY = 80
+
+CHUNK_SIZE = 64 * 1024
+
+_key_locks: dict = {}
+_key_locks_guard = threading.Lock()
+_evict_lock = threading.Lock()
+_size_lock = threading.Lock()
+_total_bytes: Optional[int] = None  # None until the first scan
+
+
+def _lock_for(key: str) -> threading.Lock:
+    with _key_locks_guard:
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+def _cache_key(blob_name: str, size: Optional[str]) -> str:
+    return hashlib.sha256(f"{blob_name}|{size or 'orig'}".encode("utf-8")).hexdigest()
+
+
+def _paths(key: str) -> Tuple[Path, Path]:
+    base = CACHE_DIR / key[:2]
+    return base / key, base / f"{key}.json"
+
+
+def _read_meta(meta_path: Path) -> Optional[dict]:
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path: Path, meta: dict) -> None:
+    tmp = meta_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+
+
+def _touch(path: Path) -> None:
+    """Mark an entry as recently used (LRU order is file mtime)."""
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def _scan() -> Tuple[list, int]:
+    """(mtime, size, path) of every cached entry, and their total size."""
+    entries = []
+    total = 0
+    for path in CACHE_DIR.glob("*/*"):
+        if path.suffix in (".json", ".tmp"):
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    return entries, total
+
+
+def _replace_entry(tmp: Path, data_path: Path) -> None:
+    """Move a finished download/thumbnail into place and update the size counter."""
+    global _total_bytes
+    try:
+        previous = data_path.stat().st_size
+    except OSError:
+        previous = 0
+    os.replace(tmp, data_path)
+    with _size_lock:
+        if _total_bytes is not None:
+            _total_bytes += data_path.stat().st_size - previous
+
+
+def _evict_if_needed() -> None:
+    """Delete least recently used entries until the cache fits CACHE_MAX_BYTES."""
+    global _total_bytes
+    with _size_lock:
+        if _total_bytes is not None and _total_bytes <= CACHE_MAX_BYTES:
+            return
+    if not _evict_lock.acquire(blocking=False):
+        return
+    try:
+        entries, total = _scan()
+        if total > CACHE_MAX_BYTES:
+            for _, size, path in sorted(entries):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    # In use (Windows does not unlink open files): keep it for now
+                    continue
+                try:
+                    path.with_suffix(".json").unlink()
+                except OSError:
+                    pass
+                total -= size
+                if total <= CACHE_MAX_BYTES:
+                    break
+        with _size_lock:
+            _total_bytes = total
+    finally:
+        _evict_lock.release()
+
+
+def _fetch_original(blob_name: str, data_path: Path, meta_path: Path, meta: Optional[dict]) -> dict:
+    """Download (or revalidate) the original blob into the cache."""
+    gcs_blob = get_gcs_client().bucket(BUCKET_NAME).get_blob(blob_name)
+    if gcs_blob is None:
+        raise FileNotFoundError(blob_name)
+
+    generation = str(gcs_blob.generation)
+    if meta and meta.get("generation") == generation and data_path.exists():
+        meta["checked_at"] = time.time()
+        _write_meta(meta_path, meta)
+        return meta
+
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = data_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    gcs_blob.download_to_filename(str(tmp))
+    _replace_entry(tmp, data_path)
+
+    updated = gcs_blob.updated.timestamp() if gcs_blob.updated else time.time()
+    meta = {
+        "blob_name": blob_name,
+        "generation": generation,
+        "etag": f'"{gcs_blob.md5_hash or generation}"',
+        "content_type": gcs_blob.content_type or "image/jpeg",
+        "last_modified": updated,
+        "size": data_path.stat().st_size,
+        "checked_at": time.time(),
+    }
+    _write_meta(meta_path, meta)
+    return meta
+
+
+def _build_thumbnail(original_path: Path, original_meta: dict, size: str, data_path: Path, meta_path: Path) -> dict:
+    """Render a JPEG thumbnail of the cached original."""
+    from PIL import Image, ImageOps
+
+    max_side = THUMBNAIL_SIZES[size]
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = data_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with Image.open(original_path) as img:
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_side, max_side))
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.save(tmp, format="JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+    _replace_entry(tmp, data_path)
+
+    meta = {
+        "blob_name": original_meta["blob_name"],
+        "generation": original_meta["generation"],
+        "etag": f'"{original_meta["generation"]}-{size}"',
+        "content_type": "image/jpeg",
+        "last_modified": original_meta["last_modified"],
+        "size": data_path.stat().st_size,
+        "checked_at": original_meta["checked_at"],
+    }
+    _write_meta(meta_path, meta)
+    return meta
+
+
+def get_cached_photo(blob_name: str, size: Optional[str] = None) -> Tuple[Path, dict]:
+    """
+    Return (path, metadata) of a cached photo, fetching it from GCS if needed.
+
+    Args:
+        blob_name: Full GCS object path
+        size: None for the original, or one of THUMBNAIL_SIZES
+
+    Raises:
+        FileNotFoundError: if the blob does not exist in GCS
+        ValueError: if size is not a supported thumbnail size
+    """
+    if size is not None and size not in THUMBNAIL_SIZES:
+        raise ValueError(f"Unsupported thumbnail size: {size}")
+
+    orig_path, orig_meta_path = _paths(_cache_key(blob_name, None))
+    with _lock_for(str(orig_path)):
+        orig_meta = _read_meta(orig_meta_path)
+        stale = (
+            orig_meta is None
+            or not orig_path.exists()
+            or time.time() - orig_meta.get("checked_at", 0) > REVALIDATE_SECONDS
+        )
+        if stale:
+            orig_meta = _fetch_original(blob_name, orig_path, orig_meta_path, orig_meta)
+    _touch(orig_path)
+
+    if size is None:
+        _evict_if_needed()
+        return orig_path, orig_meta
+
+    thumb_path, thumb_meta_path = _paths(_cache_key(blob_name, size))
+    with _lock_for(str(thumb_path)):
+        thumb_meta = _read_meta(thumb_meta_path)
+        if (
+            thumb_meta is None
+            or not thumb_path.exists()
+            or thumb_meta.get("generation") != orig_meta["generation"]
+        ):
+            thumb_meta = _build_thumbnail(orig_path, orig_meta, size, thumb_path, thumb_meta_path)
+    _touch(thumb_path)
+    _evict_if_needed()
+    return thumb_path, thumb_meta
+
+
+def open_cached_photo(blob_name: str, size: Optional[str] = None) -> Tuple[BinaryIO, dict]:
+    """
+    get_cached_photo() and open the file, fetching it again if it was evicted in between.
+
+    The caller owns the returned file (iter_file closes it when done).
+    """
+    path, meta = get_cached_photo(blob_name, size)
+    try:
+        return open(path, "rb"), meta
+    except FileNotFoundError:
+        path, meta = get_cached_photo(blob_name, size)
+        return open(path, "rb"), meta
+
+
+def iter_file(f: BinaryIO, start: int = 0, end: Optional[int] = None):
+    """Yield the bytes of the open file `f` in chunks, from `start` to `end` inclusive, then close it."""
+    with f:
+        f.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `Range: bytes=...` header.
+
+    Returns:
+        (start, end) inclusive, or None when the header is absent or not a byte range
+
+    Raises:
+        ValueError: if the range is not satisfiable
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].split(",")[0].strip()
+    start_s, _, end_s = spec.partition("-")
+    if start_s == "":
+        # Suffix range: last N bytes
+        length = int(end_s)
+        if length <= 0:
+            raise ValueError(range_header)
+        return max(size - length, 0), size - 1
+    start = int(start_s)
+    end = int(end_s) if end_s else size - 1
+    if start >= size or end < start:
+        raise ValueError(range_header)
+    return start, min(end, size - 1)
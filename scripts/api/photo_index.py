@@ -0,0 +1,164 @@
+"""
+Índice de fotos de reportes en la base de datos.
+
+Cada foto subida a GCS por upload_maintenance_photos se registra en la tabla
+`fotos_reportes` (folio, cliente, categoría, blob), de modo que consultar las
+fotos de un folio es una búsqueda indexada y no un recorrido del bucket.
+
+Backfill de blobs existentes (se puede ejecutar varias veces):
+    python -m scripts.api.photo_index --backfill [--prefix mantenimiento] [--dry-run]
+"""
+import argparse
+from typing import List, Optional
+
+from .db_utils import get_db_connection
+
+PHOTO_INDEX_TABLE = "fotos_reportes"
+
+PHOTO_INDEX_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {PHOTO_INDEX_TABLE} (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        parent_folder VARCHAR(64) NOT NULL,
+        cliente VARCHAR(255) NOT NULL,
+        folio VARCHAR(128) NOT NULL,
+        categoria VARCHAR(64) NOT NULL,
+        blob_name VARCHAR(512) NOT NULL,
+        fecha_creacion DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE KEY uq_fotos_reportes_blob (blob_name),
+        KEY idx_fotos_reportes_folio (parent_folder, folio, cliente)
+    )
+"""
+
+
+def clean_segment(value: str) -> str:
+    """Normaliza cliente/folio igual que la ruta en GCS"""
+    return (value or "").strip().replace('/', '-')
+
+
+def parse_blob_name(blob_name: str) -> Optional[dict]:
+    """
+    Extrae los campos del índice desde una ruta de GCS.
+
+    Ruta esperada: {parent_folder}/{year}/{month}/{client_name}/{folio}/{category}/{filename}
+    """
+    parts = blob_name.split('/')
+    if len(parts) != 7 or not parts[6]:
+        return None
+    return {
+        "parent_folder": parts[0],
+        "cliente": parts[3],
+        "folio": parts[4],
+        "categoria": parts[5],
+        "blob_name": blob_name,
+    }
+
+
+def ensure_photo_index_table() -> None:
+    """Crea la tabla del índice si no existe"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(PHOTO_INDEX_DDL)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def index_photos(entries: List[dict]) -> int:
+    """
+    Registra (o actualiza) fotos en el índice.
+
+    Args:
+        entries: Lista de dicts con parent_folder, cliente, folio, categoria y blob_name
+
+    Returns:
+        Número de filas enviadas a la base de datos
+    """
+    if not entries:
+        return 0
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.executemany(f"""
+        INSERT INTO {PHOTO_INDEX_TABLE} (parent_folder, cliente, folio, categoria, blob_name)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            parent_folder = VALUES(parent_folder),
+            cliente = VALUES(cliente),
+            folio = VALUES(folio),
+            categoria = VALUES(categoria)
+    """, [
+        (e["parent_folder"], e["cliente"], e["folio"], e["categoria"], e["blob_name"])
+        for e in entries
+    ])
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return len(entries)
+
+
+def lookup_photos(client_name: str, folio: str, parent_folder: str = "mantenimiento") -> dict:
+    """
+    Consulta las fotos de un folio en el índice.
+
+    Returns:
+        {
+            "by_category": {"ACEITE": ["blob1", ...], ...},
+            "flat": ["blob1", "blob2", ...]
+        }
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT categoria, blob_name
+        FROM {PHOTO_INDEX_TABLE}
+        WHERE parent_folder = %s AND folio = %s AND cliente = %s
+        ORDER BY categoria, blob_name
+    """, (parent_folder, clean_segment(folio), clean_segment(client_name)))
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+    by_category = {}
+    flat = []
+    for categoria, blob_name in rows:
+        by_category.setdefault(categoria, []).append(blob_name)
+        flat.append(blob_name)
+    return {"by_category": by_category, "flat": flat}
+
+
+def backfill_photo_index(prefix: str = "mantenimiento", dry_run: bool = False, batch_size: int = 500) -> int:
+    """Recorre el bucket una sola vez y registra en el índice todas las fotos bajo `prefix`"""
+    from .drive_utils import get_gcs_client, BUCKET_NAME
+
+    if not dry_run:
+        ensure_photo_index_table()
+
+    client = get_gcs_client()
+    batch = []
+    total = 0
+    for blob in client.list_blobs(BUCKET_NAME, prefix=f"{prefix.rstrip('/')}/"):
+        entry = parse_blob_name(blob.name)
+        if entry is None:
+            continue
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            total += len(batch) if dry_run else index_photos(batch)
+            batch = []
+    if batch:
+        total += len(batch) if dry_run else index_photos(batch)
+
+    print(f"{'🔎 [dry-run]' if dry_run else '✅'} {total} foto(s) indexadas bajo {prefix}/")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice de fotos de reportes")
+    parser.add_argument("--backfill", action="store_true", help="Indexa los blobs existentes en GCS")
+    parser.add_argument("--prefix", action="append", help="Carpeta raíz a indexar (repetible)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo cuenta, no escribe en la base de datos")
+    args = parser.parse_args()
+
+    if args.backfill:
+        for prefix in args.prefix or ["mantenimiento", "Secadoras"]:
+            backfill_photo_index(prefix, dry_run=args.dry_run)
+    else:
+        parser.print_help()
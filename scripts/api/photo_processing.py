@@ -0,0 +1,159 @@
+"""
+Upload-time photo pipeline: spool, downscale, re-encode and upload on a worker pool.
+
+Phone photos arrive at full resolution (often 4000px+ with EXIF). Before they reach
+GCS they are downsized to PHOTO_MAX_DIMENSION, re-encoded to PHOTO_FORMAT and stripped
+of metadata (orientation is applied to the pixels first). Uploaded files are streamed
+to temporary files instead of being read into memory, and the processing + GCS upload
+runs on a thread pool. The request awaits that job (upload_planned) without blocking
+the event loop, so the client only gets success once the photos are in GCS.
+
+Environment:
+    PHOTO_MAX_DIMENSION    Longest side in px after downscaling (default: 1920)
+    PHOTO_FORMAT           JPEG or WEBP (default: JPEG)
+    PHOTO_QUALITY          Encoder quality 1-95 (default: 82)
+    PHOTO_UPLOAD_WORKERS   Worker threads for processing/uploading (default: 4)
+"""
+import asyncio
+import io
+import os
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Tuple, Union
+
+PHOTO_MAX_DIMENSION = int(os.getenv("PHOTO_MAX_DIMENSION", "1920"))
+PHOTO_FORMAT = os.getenv("PHOTO_FORMAT", "JPEG").upper()
+PHOTO_QUALITY = int(os.getenv("PHOTO_QUALITY", "82"))
+PHOTO_UPLOAD_WORKERS = int(os.getenv("PHOTO_UPLOAD_WORKERS", "4"))
+
+OUTPUT_FORMATS = {
+    "JPEG": ("image/jpeg", ".jpg"),
+    "WEBP": ("image/webp", ".webp"),
+}
+
+# Formats that are passed through untouched (animation would be lost)
+PASSTHROUGH_MIME_TYPES = {"image/gif", "image/svg+xml"}
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+_executor = ThreadPoolExecutor(max_workers=PHOTO_UPLOAD_WORKERS, thread_name_prefix="photo-upload")
+
+
+def is_optimizable(mime_type: str) -> bool:
+    """Whether a file of this MIME type is re-encoded by the pipeline."""
+    return (
+        PHOTO_FORMAT in OUTPUT_FORMATS
+        and bool(mime_type)
+        and mime_type.startswith("image/")
+        and mime_type not in PASSTHROUGH_MIME_TYPES
+    )
+
+
+def output_extension(mime_type: str) -> Union[str, None]:
+    """Extension the stored file will have, or None if the original is kept."""
+    return OUTPUT_FORMATS[PHOTO_FORMAT][1] if is_optimizable(mime_type) else None
+
+
+def read_source(source: Union[bytes, str]) -> bytes:
+    """Read a photo given as raw bytes or as the path of a spooled file."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def optimize_photo(source: Union[bytes, str], mime_type: str) -> Tuple[bytes, str]:
+    """
+    Downscale and re-encode a photo, dropping EXIF/ICC metadata.
+
+    Args:
+        source: Photo content (bytes) or path of a spooled file
+        mime_type: MIME type reported by the client
+
+    Returns:
+        (content, mime_type) — the original is returned if it can't be decoded
+    """
+    if not is_optimizable(mime_type):
+        return read_source(source), mime_type
+
+    try:
+        from PIL import Image, ImageOps
+
+        out_mime, _ = OUTPUT_FORMATS[PHOTO_FORMAT]
+        fp = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+        with Image.open(fp) as img:
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((PHOTO_MAX_DIMENSION, PHOTO_MAX_DIMENSION))
+            if PHOTO_FORMAT == "JPEG" and img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            buffer = io.BytesIO()
+            # No exif/icc_profile arguments: the re-encoded file carries no metadata
+            if PHOTO_FORMAT == "JPEG":
+                img.save(buffer, format="JPEG", quality=PHOTO_QUALITY, optimize=True, progressive=True)
+            else:
+                img.save(buffer, format=PHOTO_FORMAT, quality=PHOTO_QUALITY, method=4)
+        return buffer.getvalue(), out_mime
+    except Exception as error:
+        print(f"⚠️ Could not optimize photo, uploading original: {error}")
+        return read_source(source), mime_type
+
+
+async def spool_upload(upload) -> str:
+    """Stream an UploadFile to a temporary file in chunks and return its path."""
+    suffix = os.path.splitext(upload.filename or "")[1]
+    tmp = tempfile.NamedTemporaryFile(prefix="vto-photo-", suffix=suffix, delete=False)
+    try:
+        while True:
+            chunk = await upload.read(SPOOL_CHUNK_SIZE)
+            if not chunk:
+                break
+            tmp.write(chunk)
+    except BaseException:
+        tmp.close()
+        discard_spooled([tmp.name])
+        raise
+    tmp.close()
+    return tmp.name
+
+
+def discard_spooled(paths) -> None:
+    """Delete spooled temporary files."""
+    for path in paths:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def submit(fn, *args, **kwargs) -> Future:
+    """Run `fn` on the photo worker pool."""
+    return _executor.submit(fn, *args, **kwargs)
+
+
+def upload_in_background(plan: dict, spooled_paths) -> Future:
+    """
+    Optimize and upload a plan from drive_utils.plan_maintenance_uploads on the
+    worker pool, deleting the spooled files afterwards.
+    """
+    from .drive_utils import upload_planned_photos
+
+    def _job() -> dict:
+        try:
+            result = upload_planned_photos(plan)
+            if not result.get("success"):
+                print(f"❌ Background photo upload failed for folio {plan['folio']}: {result.get('error')}")
+            return result
+        finally:
+            discard_spooled(spooled_paths)
+
+    return submit(_job)
+
+
+async def upload_planned(plan: dict, spooled_paths) -> dict:
+    """
+    Run upload_in_background and wait for it without blocking the event loop.
+
+    Returns:
+        Result of drive_utils.upload_planned_photos ({"success": False, "error": ...} on failure)
+    """
+    return await asyncio.wrap_future(upload_in_background(plan, spooled_paths))
@@ -5,14 +5,10 @@ from fastapi import APIRouter, Query
 from fastapi.responses import StreamingResponse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import timedelta
 from typing import List, Tuple
 import io
 
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-from pmdarima import auto_arima
-
 from .db_utils import obtener_compresores, obtener_kwh_fp, COLORES
 
 
@@ -35,6 +31,10 @@ def generate_predictions_fast(series: pd.Series, days: int = 3) -> Tuple[List[fl
         return predictions, "Promedio (poca variación)"
 
     try:
+        # Deferred so statsmodels/pmdarima load on the first forecast, not at API startup
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        from pmdarima import auto_arima
+
         series_clean = series[series > 0].copy()
         if len(series_clean) < 7:
             promedio = np.mean(hist_valores)
@@ -170,6 +170,8 @@ def consumption_prediction_plot(
         if num_compresores > 8:
             altura_base = 8
 
+        # Deferred so matplotlib loads on the first plot request, not at API startup
+        import matplotlib.pyplot as plt
         plt.switch_backend('Agg')
         fig, ax = plt.subplots(figsize=(ancho, altura_base))
 
@@ -7,10 +7,10 @@ from pydantic import BaseModel
 from typing import Optional, List
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import io
 
 from .db_utils import obtener_medidores_presion, obtener_datos_presion, get_db_connection
+from .reference_cache import RTU, get_rtu_config, invalidate as invalidate_reference
 
 
 pressure = APIRouter(prefix="/pressure", tags=["📈 Presión"])
@@ -28,15 +28,7 @@ class PressureConfigModel(BaseModel):
 def get_pressure_config_endpoint(rtu_id: int):
     """Obtiene la configuración operacional de un dispositivo RTU"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT presion_max, presion_min, presion_alerta, v_tanque FROM RTU_device WHERE RTU_id = %s",
-            (rtu_id,)
-        )
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        row = get_rtu_config(rtu_id)
         if not row:
             raise HTTPException(status_code=404, detail="Dispositivo no encontrado")
         return {"success": True, "data": {
@@ -73,6 +65,7 @@ def update_pressure_config(rtu_id: int, config: PressureConfigModel):
             conn.close()
             raise HTTPException(status_code=404, detail="Dispositivo no encontrado")
         conn.commit()
+        invalidate_reference(RTU)
         cursor.close()
         conn.close()
         return {"success": True, "message": "Configuración actualizada correctamente", "data": config.model_dump()}
@@ -215,6 +208,8 @@ def pressure_analysis_plot(
         top_eventos = eventos_criticos[:3]
 
         # Crear gráfica
+        # Deferred so matplotlib loads on the first plot request, not at API startup
+        import matplotlib.pyplot as plt
         plt.switch_backend('Agg')
         fig, ax = plt.subplots(figsize=(15, 6))
 
@@ -529,6 +524,7 @@ def create_rtu_device(rtu_data: RTUCreateModel):
         ))
 
         conn.commit()
+        invalidate_reference(RTU)
         cursor.close()
         conn.close()
 
@@ -619,6 +615,7 @@ def update_rtu_device(rtu_id: int, rtu_data: RTUCreateModel):
             ))
 
         conn.commit()
+        invalidate_reference(RTU)
         cursor.close()
         conn.close()
 
@@ -653,6 +650,7 @@ def delete_rtu_device(rtu_id: int):
         cursor.execute("DELETE FROM RTU_device WHERE RTU_id = %s", (rtu_id,))
 
         conn.commit()
+        invalidate_reference(RTU)
         cursor.close()
         conn.close()
 
@@ -0,0 +1,284 @@
+"""
+Perfilador de consultas y procedimientos almacenados.
+
+Cada execute/callproc hecho con una conexión de db_utils.get_db_connection pasa
+por aquí al terminar (incluyendo el tiempo de sus fetch). Las sentencias se
+agrupan por huella (texto normalizado, sin literales) y se acumula conteo,
+tiempo total/máximo y filas. Las que superan SLOW_QUERY_MS se imprimen con sus
+filas, la función del API que las llamó y sus parámetros.
+
+Los parámetros traen datos de clientes (correos, nombres, RFC, folios), así que
+por defecto solo se registran sus tipos y una huella (sha256 corta) para ver si
+se repiten. Con QUERY_PROFILE_PARAMS=1 se imprimen y se guardan en el log tal
+cual; GET /metrics/queries nunca los devuelve.
+
+El reporte ordenado se consulta en GET /metrics/queries, se guarda al apagar el
+API si QUERY_PROFILE_REPORT está definido, o se genera desde consola a partir
+del log de lentas:
+
+    python -m scripts.api.query_profiler --log slow_queries.jsonl --sort total
+
+Environment:
+    QUERY_PROFILE_ENABLED  0 para desactivar el perfilador (default: 1)
+    SLOW_QUERY_MS          Umbral para registrar una sentencia lenta (default: 500)
+    QUERY_PROFILE_LOG      Archivo JSONL donde se agregan las sentencias lentas (opcional)
+    QUERY_PROFILE_REPORT   Archivo donde se escribe el reporte al apagar el API (opcional)
+    QUERY_PROFILE_PARAMS   1 para registrar los parámetros sin ocultar en consola y log (default: 0)
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+QUERY_PROFILE_ENABLED = os.getenv("QUERY_PROFILE_ENABLED", "1") != "0"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+QUERY_PROFILE_LOG = os.getenv("QUERY_PROFILE_LOG")
+QUERY_PROFILE_REPORT = os.getenv("QUERY_PROFILE_REPORT")
+QUERY_PROFILE_PARAMS = os.getenv("QUERY_PROFILE_PARAMS", "0") == "1"
+
+SORT_KEYS = ("total", "max", "avg", "count", "slow", "rows")
+
+_MAX_TEXT = 2000
+_MAX_PARAMS = 300
+
+_COMMENTS = re.compile(r"/\*.*?\*/|--[^\n]*|#[^\n]*", re.S)
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(kind: str, statement: str) -> str:
+    """Forma normalizada de una sentencia: literales y placeholders como '?'"""
+    if kind == "procedure":
+        return f"CALL {statement}"
+    text = _COMMENTS.sub(" ", statement)
+    text = _STRINGS.sub("?", text)
+    text = _PLACEHOLDERS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _IN_LISTS.sub("(?+)", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def _caller() -> str:
+    """Primera función fuera de la capa de base de datos (archivo:línea función)"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.endswith(("db_utils.py", "query_profiler.py")):
+            return f"{os.path.basename(filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+def _short(value, limit: int) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def _redact(params) -> str:
+    """Tipos de los parámetros y una huella del conjunto, sin sus valores"""
+    if params is None:
+        return "None"
+    if isinstance(params, str):
+        # executemany pasa "<N filas>", no valores
+        return params
+    values = list(params.values()) if isinstance(params, dict) else list(params)
+    types = ", ".join(type(v).__name__ for v in values)
+    digest = hashlib.sha256(repr(params).encode("utf-8", errors="replace")).hexdigest()[:8]
+    return f"({types}) #{digest}"
+
+
+def _params_text(params) -> str:
+    return _short(params, _MAX_PARAMS) if QUERY_PROFILE_PARAMS else _short(_redact(params), _MAX_PARAMS)
+
+
+class _Aggregate:
+    __slots__ = ("kind", "fingerprint", "count", "total", "max", "rows", "slow", "example", "callers")
+
+    def __init__(self, kind: str, fp: str):
+        self.kind = kind
+        self.fingerprint = fp
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.slow = 0
+        self.example = None
+        self.callers: Dict[str, int] = {}
+
+    def as_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 1),
+            "avg_ms": round(self.total * 1000 / self.count, 1) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 1),
+            "rows": self.rows,
+            "slow": self.slow,
+            "example": self.example,
+            "callers": dict(sorted(self.callers.items(), key=lambda item: item[1], reverse=True)),
+        }
+
+
+_stats: Dict[str, _Aggregate] = {}
+_lock = threading.Lock()
+
+
+class StatementTimer:
+    """Tiempo y filas de una sentencia, desde su execute/callproc hasta el último fetch"""
+
+    __slots__ = ("kind", "statement", "params", "elapsed", "rows")
+
+    def __init__(self, kind: str, statement, params):
+        self.kind = kind
+        self.statement = statement
+        self.params = params
+        self.elapsed = 0.0
+        self.rows = 0
+
+    def finish(self) -> None:
+        if QUERY_PROFILE_ENABLED:
+            record_statement(self.kind, self.statement, self.params, self.elapsed, self.rows)
+
+
+def record_statement(kind: str, statement, params, elapsed: float, rows: int) -> None:
+    """Acumula una sentencia y registra su detalle si fue lenta"""
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode("utf-8", errors="replace")
+    statement = str(statement)
+    fp = fingerprint(kind, statement)
+    slow = elapsed * 1000 >= SLOW_QUERY_MS
+    caller = _caller() if slow else None
+
+    with _lock:
+        agg = _stats.get(fp)
+        if agg is None:
+            agg = _stats[fp] = _Aggregate(kind, fp)
+        agg.count += 1
+        agg.total += elapsed
+        agg.max = max(agg.max, elapsed)
+        agg.rows += max(rows, 0)
+        if slow:
+            agg.slow += 1
+            agg.callers[caller] = agg.callers.get(caller, 0) + 1
+            if agg.example is None or elapsed >= agg.max:
+                # Lo que devuelve GET /metrics/queries: nunca los valores de los parámetros
+                agg.example = {"params": _short(_redact(params), _MAX_PARAMS), "ms": round(elapsed * 1000, 1), "caller": caller}
+
+    if not slow:
+        return
+    text = _short(_SPACES.sub(" ", statement).strip(), _MAX_TEXT)
+    print(f"🐢 {kind} lenta {elapsed * 1000:.0f} ms, {rows} filas, {caller}: {text} params={_params_text(params)}")
+    if QUERY_PROFILE_LOG:
+        entry = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "kind": kind,
+            "fingerprint": fp,
+            "statement": text,
+            "params": _params_text(params),
+            "ms": round(elapsed * 1000, 1),
+            "rows": rows,
+            "caller": caller,
+        }
+        try:
+            with _lock, open(QUERY_PROFILE_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"⚠️ No se pudo escribir el log de consultas lentas: {e}")
+
+
+def _sort_value(entry: dict, sort: str) -> float:
+    return {
+        "total": entry["total_ms"],
+        "max": entry["max_ms"],
+        "avg": entry["avg_ms"],
+        "count": entry["count"],
+        "slow": entry["slow"],
+        "rows": entry["rows"],
+    }[sort]
+
+
+def get_report(sort: str = "total", limit: Optional[int] = 50) -> List[dict]:
+    """Sentencias agregadas por huella, de mayor a menor según `sort`"""
+    if sort not in SORT_KEYS:
+        raise ValueError(f"sort debe ser uno de {', '.join(SORT_KEYS)}")
+    with _lock:
+        entries = [agg.as_dict() for agg in _stats.values()]
+    entries.sort(key=lambda entry: _sort_value(entry, sort), reverse=True)
+    return entries[:limit] if limit else entries
+
+
+def format_report(entries: List[dict]) -> str:
+    """Reporte de texto: una fila por huella"""
+    lines = [f"{'total ms':>11} {'count':>7} {'avg ms':>9} {'max ms':>9} {'rows':>9} {'slow':>5}  sentencia"]
+    for entry in entries:
+        lines.append(
+            f"{entry['total_ms']:>11.1f} {entry['count']:>7} {entry['avg_ms']:>9.1f} {entry['max_ms']:>9.1f} "
+            f"{entry['rows']:>9} {entry['slow']:>5}  {_short(entry['fingerprint'], 160)}"
+        )
+        for caller, count in list(entry["callers"].items())[:3]:
+            lines.append(f"{'':>55}↳ {caller} ({count} lentas)")
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Borra lo acumulado"""
+    with _lock:
+        _stats.clear()
+
+
+def dump_report(path: str = None, sort: str = "total") -> None:
+    """Escribe el reporte completo en `path` (por defecto QUERY_PROFILE_REPORT)"""
+    path = path or QUERY_PROFILE_REPORT
+    if not path:
+        return
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# Perfil de consultas {datetime.now().isoformat(timespec='seconds')} (orden: {sort})\n")
+            f.write(format_report(get_report(sort, limit=None)))
+        print(f"📝 Perfil de consultas guardado en {path}")
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar el perfil de consultas: {e}")
+
+
+def _report_from_log(path: str, sort: str, limit: int) -> str:
+    """Reconstruye el reporte a partir del log JSONL de sentencias lentas"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            elapsed = entry["ms"] / 1000
+            with _lock:
+                agg = _stats.get(entry["fingerprint"])
+                if agg is None:
+                    agg = _stats[entry["fingerprint"]] = _Aggregate(entry["kind"], entry["fingerprint"])
+                agg.count += 1
+                agg.slow += 1
+                agg.total += elapsed
+                agg.rows += max(entry.get("rows") or 0, 0)
+                agg.max = max(agg.max, elapsed)
+                caller = entry.get("caller") or "?"
+                agg.callers[caller] = agg.callers.get(caller, 0) + 1
+    return format_report(get_report(sort, limit))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reporte de sentencias lentas a partir del log JSONL")
+    parser.add_argument("--log", default=QUERY_PROFILE_LOG, help="Log generado con QUERY_PROFILE_LOG")
+    parser.add_argument("--sort", default="total", choices=SORT_KEYS)
+    parser.add_argument("--limit", type=int, default=30)
+    args = parser.parse_args()
+
+    if not args.log or not os.path.exists(args.log):
+        parser.error("indica un log existente con --log o QUERY_PROFILE_LOG")
+    print(_report_from_log(args.log, args.sort, args.limit), end="")
@@ -0,0 +1,209 @@
+"""
+Caché en memoria de datos de referencia (tablas chicas que casi no cambian).
+
+Los reportes y la presión consultan en cada petición el costo por kWh del
+cliente, hp/voltaje del compresor, los tipos de mantenimiento, los módulos web
+y la calibración de los RTU. Aquí se guardan por tabla con su propio TTL; los
+routers que escriben en esas tablas llaman a invalidate(tabla) después del
+commit, así que dentro del mismo worker los cambios se ven de inmediato y en
+los demás a más tardar al vencer el TTL.
+
+Accesores:
+    get_costo_kwh(id_cliente)                 float (0.17 si no hay dato)
+    get_compresor_specs(id_cliente, linea)    CompresorSpecs o None
+    get_mantenimientos_tipo(tipo_compresor)   lista de filas de mantenimientos_tipo
+    get_nombre_mantenimiento(id_mantenimiento)
+    get_modulos_web(numero_cliente)           fila de modulos_web o None
+    get_rtu_config(rtu_id)                    configuración de RTU_device o None
+    get_rtu_sensores(rtu_id)                  {canal: calibración} de RTU_sensores
+
+Los accesores aceptan un `cursor` ya abierto para que un fallo de caché no abra
+otra conexión.
+
+Environment:
+    REF_CACHE_TTL_<TABLA>  Segundos por tabla (p. ej. REF_CACHE_TTL_CLIENTES=600)
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional
+
+from .db_utils import get_db_connection
+
+DEFAULT_COSTO_KWH = 0.17
+
+CLIENTES = "clientes"
+COMPRESORES = "compresores"
+MANTENIMIENTOS_TIPO = "mantenimientos_tipo"
+MODULOS_WEB = "modulos_web"
+RTU = "rtu"
+
+# TTL por tabla en segundos
+DEFAULT_TTLS = {
+    CLIENTES: 600,
+    COMPRESORES: 600,
+    MANTENIMIENTOS_TIPO: 3600,
+    MODULOS_WEB: 120,
+    RTU: 300,
+}
+
+
+class CompresorSpecs(NamedTuple):
+    hp: Optional[float]
+    voltaje: Optional[float]
+    segundos_por_registro: Optional[int]
+    load_no_load: Optional[float]
+
+
+_MISSING = object()
+
+
+class TableCache:
+    """Valores por clave de una tabla, con el mismo TTL para todos"""
+
+    def __init__(self, table: str, ttl: int):
+        self.table = table
+        self.ttl = ttl
+        self._values: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, load: Callable[[], object]):
+        with self._lock:
+            cached = self._values.get(key, _MISSING)
+        if cached is not _MISSING and cached[1] > time.monotonic():
+            return cached[0]
+        value = load()
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + self.ttl)
+        return value
+
+    def invalidate(self, key: Hashable = _MISSING) -> None:
+        with self._lock:
+            if key is _MISSING:
+                self._values.clear()
+            else:
+                self._values.pop(key, None)
+
+
+_caches = {
+    table: TableCache(table, int(os.getenv(f"REF_CACHE_TTL_{table.upper()}", str(ttl))))
+    for table, ttl in DEFAULT_TTLS.items()
+}
+
+
+def invalidate(table: str, key: Hashable = _MISSING) -> None:
+    """Descarta lo guardado de una tabla (toda, o solo `key`) tras escribir en ella"""
+    _caches[table].invalidate(key)
+
+
+def invalidate_all() -> None:
+    for cache in _caches.values():
+        cache.invalidate()
+
+
+def _query(sql: str, params: tuple, cursor=None) -> List[dict]:
+    """Filas como dicts, con el cursor dado o con una conexión propia"""
+    own = cursor is None
+    if own:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        if rows and not isinstance(rows[0], dict):
+            columns = [column[0] for column in cursor.description]
+            rows = [dict(zip(columns, row)) for row in rows]
+        return rows
+    finally:
+        if own:
+            cursor.close()
+            conn.close()
+
+
+def get_costo_kwh(id_cliente: int, cursor=None) -> float:
+    """USD por kWh del cliente"""
+    def load():
+        rows = _query("SELECT CostokWh FROM clientes WHERE id_cliente = %s", (id_cliente,), cursor)
+        costo = rows[0]["CostokWh"] if rows else None
+        return float(costo) if costo is not None else DEFAULT_COSTO_KWH
+
+    return _caches[CLIENTES].get(("costo_kwh", id_cliente), load)
+
+
+def get_compresor_specs(id_cliente: int, linea: str, cursor=None) -> Optional[CompresorSpecs]:
+    """hp, voltaje, segundosPorRegistro y LOAD_NO_LOAD del compresor de esa línea"""
+    def load():
+        rows = _query(
+            """SELECT hp, voltaje, segundosPorRegistro, LOAD_NO_LOAD
+               FROM compresores WHERE id_cliente = %s AND linea = %s LIMIT 1""",
+            (id_cliente, linea),
+            cursor,
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        return CompresorSpecs(row["hp"], row["voltaje"], row["segundosPorRegistro"], row["LOAD_NO_LOAD"])
+
+    return _caches[COMPRESORES].get(("specs", id_cliente, linea), load)
+
+
+def get_mantenimientos_tipo(tipo_compresor: str, cursor=None) -> List[dict]:
+    """Tipos de mantenimiento definidos para 'piston' o 'tornillo' (copia, se puede modificar)"""
+    rows = _caches[MANTENIMIENTOS_TIPO].get(
+        ("tipo", tipo_compresor),
+        lambda: _query("SELECT * FROM mantenimientos_tipo WHERE tipo_compresor = %s", (tipo_compresor,), cursor),
+    )
+    return [dict(row) for row in rows]
+
+
+def get_nombre_mantenimiento(id_mantenimiento: int, cursor=None) -> Optional[str]:
+    """nombre_tipo de un mantenimiento"""
+    def load():
+        rows = _query(
+            "SELECT nombre_tipo FROM mantenimientos_tipo WHERE id_mantenimiento = %s", (id_mantenimiento,), cursor
+        )
+        return rows[0]["nombre_tipo"] if rows else None
+
+    return _caches[MANTENIMIENTOS_TIPO].get(("nombre", id_mantenimiento), load)
+
+
+def get_modulos_web(numero_cliente: int, cursor=None) -> Optional[dict]:
+    """Módulos habilitados del cliente (fila de modulos_web)"""
+    def load():
+        rows = _query(
+            """SELECT mantenimiento, reporteDia, reporteSemana, presion, prediccion, kwh
+               FROM modulos_web WHERE numero_cliente = %s""",
+            (numero_cliente,),
+            cursor,
+        )
+        return rows[0] if rows else None
+
+    row = _caches[MODULOS_WEB].get(numero_cliente, load)
+    return dict(row) if row is not None else None
+
+
+def get_rtu_config(rtu_id: int, cursor=None) -> Optional[dict]:
+    """Configuración operacional de un RTU (valores NULL tal cual)"""
+    def load():
+        rows = _query(
+            """SELECT RTU_id, numero_serie_topico, numero_cliente, alias,
+                      presion_max, presion_min, presion_alerta, v_tanque
+               FROM RTU_device WHERE RTU_id = %s""",
+            (rtu_id,),
+            cursor,
+        )
+        return rows[0] if rows else None
+
+    row = _caches[RTU].get(("device", rtu_id), load)
+    return dict(row) if row is not None else None
+
+
+def get_rtu_sensores(rtu_id: int, cursor=None) -> Dict[int, dict]:
+    """Calibración de los sensores del RTU por canal C (Vmin, Vmax, Lmin, Lmax)"""
+    def load():
+        rows = _query(
+            "SELECT C, Vmin, Vmax, Lmin, Lmax FROM RTU_sensores WHERE RTU_id = %s ORDER BY C", (rtu_id,), cursor
+        )
+        return {row["C"]: row for row in rows}
+
+    return dict(_caches[RTU].get(("sensores", rtu_id), load))
@@ -9,6 +9,12 @@ from datetime import datetime, timedelta
 import pandas as pd
 from statistics import mean, pstdev
 
+from .daily_rollup import semana_general
+from .db_utils import get_db_connection, leer_columnas
+from .reference_cache import get_compresor_specs, get_costo_kwh
+from .json_response import arrays_response, series_response
+from .reports_static import PHASE_COLUMNS
+
 """
 * @Observations:
 * 1. To run the API, use the command:
@@ -43,12 +49,7 @@ DB_DATABASE = os.getenv("DB_DATABASE")
 def get_pie_data_proc(id_cliente: int = Query(..., description="ID del cliente"), linea: str = Query(..., description="Línea del cliente")):
     try:
         # Connect to DB
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Llamar al procedimiento con id_cliente en vez de 7,7
@@ -89,16 +90,12 @@ def get_pie_data_proc(id_cliente: int = Query(..., description="ID del cliente")
         return {"error": str(err)}
 
 @report.get("/line-data-proc", tags=["📅 Reportes Diarios"])
-def get_line_data(id_cliente: int = Query(..., description="ID del cliente"), linea: str = Query(..., description="Línea del cliente")):
+def get_line_data(id_cliente: int = Query(..., description="ID del cliente"), linea: str = Query(..., description="Línea del cliente"),
+                  columnas: bool = Query(False, description='Devuelve {"time": [...], ...} en lugar de una lista de objetos')):
     try:
         
         # Conectar a la base de datos
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Ejecutar SP con la fecha proporcionada
@@ -132,10 +129,7 @@ def get_line_data(id_cliente: int = Query(..., description="ID del cliente"), li
             if (entry["time"] - start_time) >= timedelta(seconds=30):
                 if temp_data:
                     avg_corriente = np.round(np.mean([item["corriente"] for item in temp_data]), 2)
-                    grouped_data.append({
-                        "time": start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                        "corriente": avg_corriente
-                    })
+                    grouped_data.append((start_time.strftime('%Y-%m-%d %H:%M:%S'), avg_corriente))
                 # Resetear el grupo y actualizar el tiempo de inicio
                 temp_data = [entry]
                 start_time = entry["time"]
@@ -145,13 +139,10 @@ def get_line_data(id_cliente: int = Query(..., description="ID del cliente"), li
         # Para el último grupo
         if temp_data:
             avg_corriente = np.round(np.mean([item["corriente"] for item in temp_data]), 2)
-            grouped_data.append({
-                "time": start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                "corriente": avg_corriente
-            })
+            grouped_data.append((start_time.strftime('%Y-%m-%d %H:%M:%S'), avg_corriente))
 
         # Devolver los datos agrupados
-        return JSONResponse(content={"data": grouped_data})
+        return series_response(grouped_data, ["time", "corriente"], columnas)
 
     except Exception as e:
         return JSONResponse(content={"error": str(e)})
@@ -160,12 +151,7 @@ def get_line_data(id_cliente: int = Query(..., description="ID del cliente"), li
 def get_daily_report(id_cliente: int = Query(..., description="ID del cliente"),
                      linea: str = Query(..., description="Línea del cliente")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Llamar procedimiento almacenado DFDFTest
@@ -192,25 +178,11 @@ def get_daily_report(id_cliente: int = Query(..., description="ID del cliente"),
         while cursor.nextset():
             pass
 
-        # Consultar hp nominal y voltaje para ese cliente y línea
-        cursor.execute(
-            "SELECT hp, voltaje FROM compresores WHERE id_cliente = %s AND linea = %s LIMIT 1",
-            (id_cliente, linea)
-        )
-        data = cursor.fetchone()
-        
-        while cursor.nextset():
-            pass
-        
-        cursor.execute(
-            "SELECT CostokWh FROM clientes WHERE id_cliente = %s",
-            (id_cliente,)
-        )
-        usd_por_kwh = cursor.fetchone()
-        
-        hp_nominal = data[0] if data else 0
+        # hp nominal del compresor y costo por kWh del cliente (caché de referencia)
+        specs = get_compresor_specs(id_cliente, linea, cursor)
+        hp_nominal = specs.hp if specs and specs.hp is not None else 0
 
-        usd_por_kwh = usd_por_kwh[0] if usd_por_kwh else 0.17
+        usd_por_kwh = get_costo_kwh(id_cliente, cursor)
         costo_usd = round(float(kWh) * usd_por_kwh, 2)
 
         # Comentario ciclos
@@ -258,10 +230,7 @@ def get_daily_report(id_cliente: int = Query(..., description="ID del cliente"),
 @report.get("/pie-data-proc-day", tags=["🗓️ Selector de Fechas"])
 def get_pie_data_proc(id_cliente: int = Query(...), linea: str = Query(...), date: str = Query(...)):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST, user=DB_USER,
-            password=DB_PASSWORD, database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Ejecutar DFDFTest
@@ -313,13 +282,11 @@ def get_pie_data_proc(id_cliente: int = Query(...), linea: str = Query(...), dat
         return {"error": str(err)}
 
 @report.get("/line-data-proc-day", tags=["🗓️ Selector de Fechas"])
-def get_line_data(id_cliente: int = Query(...), linea: str = Query(...), date: str = Query(...)):
+def get_line_data(id_cliente: int = Query(...), linea: str = Query(...), date: str = Query(...),
+                  columnas: bool = Query(False, description='Devuelve {"time": [...], ...} en lugar de una lista de objetos')):
 
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST, user=DB_USER,
-            password=DB_PASSWORD, database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Ejecutar DFDFTest
@@ -359,10 +326,7 @@ def get_line_data(id_cliente: int = Query(...), linea: str = Query(...), date: s
         for entry in data:
             if (entry["time"] - start_time) >= timedelta(seconds=30):
                 avg_corr = round(np.mean([t["corriente"] for t in temp_data]), 2)
-                grouped_data.append({
-                    "time": start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                    "corriente": avg_corr
-                })
+                grouped_data.append((start_time.strftime('%Y-%m-%d %H:%M:%S'), avg_corr))
                 temp_data = [entry]
                 start_time = entry["time"]
             else:
@@ -370,12 +334,9 @@ def get_line_data(id_cliente: int = Query(...), linea: str = Query(...), date: s
 
         if temp_data:
             avg_corr = round(np.mean([t["corriente"] for t in temp_data]), 2)
-            grouped_data.append({
-                "time": start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                "corriente": avg_corr
-            })
+            grouped_data.append((start_time.strftime('%Y-%m-%d %H:%M:%S'), avg_corr))
 
-        return {"data": grouped_data}
+        return series_response(grouped_data, ["time", "corriente"], columnas)
 
     except Exception as e:
         return {"error": str(e)}
@@ -384,12 +345,7 @@ def get_line_data(id_cliente: int = Query(...), linea: str = Query(...), date: s
 @report.get("/day-report-data", tags=["🗓️ Selector de Fechas"])
 def get_day_report(id_cliente: int = Query(..., description="ID del cliente"), linea: str = Query(..., description="Línea del cliente"), date: str = Query(..., description="Fecha en formato YYYY-MM-DD")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Llamar procedimiento almacenado DFDFTest
@@ -416,13 +372,9 @@ def get_day_report(id_cliente: int = Query(..., description="ID del cliente"), l
         while cursor.nextset():
             pass
 
-        # Consultar hp nominal y voltaje para ese cliente y línea
-        cursor.execute(
-            "SELECT hp, voltaje FROM compresores WHERE id_cliente = %s AND linea = %s LIMIT 1",
-            (id_cliente, linea)
-        )
-        data = cursor.fetchone()
-        hp_nominal = data[0] if data else 0
+        # hp nominal del compresor (caché de referencia)
+        specs = get_compresor_specs(id_cliente, linea, cursor)
+        hp_nominal = specs.hp if specs and specs.hp is not None else 0
 
         usd_por_kwh = 0.17
         costo_usd = round(float(kWh) * usd_por_kwh, 2)
@@ -473,12 +425,7 @@ def get_day_report(id_cliente: int = Query(..., description="ID del cliente"), l
 def get_pie_data_proc_weekly(id_cliente: int = Query(..., description="ID del cliente"), linea: str = Query(..., description="Línea del cliente")):
     try:
         # Connect to DB
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -521,12 +468,7 @@ def get_pie_data_proc_weekly(id_cliente: int = Query(..., description="ID del cl
 def get_shifts(id_cliente: int = Query(..., description="ID del cliente"), linea: str = Query(..., description="Línea del cliente")):
     try:
         # Connect to DB
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -560,40 +502,18 @@ def get_shifts(id_cliente: int = Query(..., description="ID del cliente"), linea
 def get_weekly_summary_general(id_cliente: int = Query(..., description="ID del cliente"), linea: str = Query(..., description="Línea del cliente")):
     try:
         # Conectar a base de datos
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Ejecutar procedimiento
-        cursor.execute("CALL semanaGeneralFP(%s,%s, %s)", (id_cliente, id_cliente, linea))
-        results = cursor.fetchall()
-        
-        # Consumir todos los result sets pendientes (importante cuando se usan procedimientos almacenados)
-        while cursor.nextset():
-            pass
-
-        cursor.execute("SELECT CostokWh FROM clientes WHERE id_cliente = %s", (id_cliente,))
-        costo_kwh_result = cursor.fetchone()
-
-        # Columnas esperadas
-        columns = [
-            "semana", "fecha", "kWh", "horas_trabajadas", "kWh_load", "horas_load",
-            "kWh_noload", "horas_noload", "hp_equivalente", "conteo_ciclos", "promedio_ciclos_por_hora"
-        ]
+        data = semana_general(cursor, id_cliente, linea)
+        usd_por_kwh = get_costo_kwh(id_cliente, cursor)
 
         cursor.close()
         conn.close()
 
-        if not results:
+        if not data:
             return {"error": "Sin datos en semanaGeneralFP"}
 
-        # Mapear resultados a dict
-        data = [dict(zip(columns, row)) for row in results]
-
         # Filtrar semana actual (semana == 0 y con kWh > 0)
         semana_actual = [d for d in data if d["semana"] == 0 and d["kWh"] > 0]
         detalle_semana = [d for d in data if d["semana"] == 0]  # Incluye días sin consumo también
@@ -605,7 +525,6 @@ def get_weekly_summary_general(id_cliente: int = Query(..., description="ID del
 
         # Calcular métricas semana actual
         total_kWh_semana_actual = sum(d["kWh"] for d in semana_actual)
-        usd_por_kwh = float(costo_kwh_result[0]) if costo_kwh_result else 0.17
         costo_semana_actual = costo_energia_usd(total_kWh_semana_actual, usd_por_kwh)
         horas_trabajadas_semana_actual = sum(d["horas_trabajadas"] for d in semana_actual)
         promedio_ciclos_semana_actual = sum(d["promedio_ciclos_por_hora"] for d in semana_actual) / len(semana_actual)
@@ -616,7 +535,7 @@ def get_weekly_summary_general(id_cliente: int = Query(..., description="ID del
             kWh_anteriores = sum(d["kWh"] for d in semanas_anteriores) / len(semanas_anteriores)
             horas_trabajadas_anteriores = sum(d["horas_trabajadas"] for d in semanas_anteriores) / len(semanas_anteriores)
             promedio_kWh_anteriores = sum(d["kWh"] for d in semanas_anteriores) / len(semanas_anteriores)
-            promedio_costo_anteriores = costo_energia_usd(promedio_kWh_anteriores, float(costo_kwh_result[0]) if costo_kwh_result else 0.17)
+            promedio_costo_anteriores = costo_energia_usd(promedio_kWh_anteriores, usd_por_kwh)
             promedio_ciclos_anteriores = sum(d["promedio_ciclos_por_hora"] for d in semanas_anteriores) / len(semanas_anteriores)
             promedio_hp_anteriores = sum(d["hp_equivalente"] for d in semanas_anteriores) / len(semanas_anteriores)
             promedio_horas_trabajadas = sum(d["horas_trabajadas"] for d in semanas_anteriores) / len(semanas_anteriores)
@@ -786,12 +705,7 @@ def get_weekly_summary_general(id_cliente: int = Query(..., description="ID del
 def get_pie_data_proc_date_week(id_cliente: int = Query(..., description="ID del cliente"), linea: str = Query(..., description="Linea del cliente"), fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD")):
     try:
         # Connect to DB
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -834,12 +748,7 @@ def get_pie_data_proc_date_week(id_cliente: int = Query(..., description="ID del
 def get_shifts_by_week(id_cliente: int = Query(..., description="ID del cliente"), linea: str = Query(..., description="Línea del cliente"), fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD")):
     try:
         # Connect to DB
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -873,37 +782,18 @@ def get_shifts_by_week(id_cliente: int = Query(..., description="ID del cliente"
 def get_week_summary_general(id_cliente: int = Query(..., description="ID del cliente"), linea: str = Query(..., description="Línea del cliente"), fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD")):
     try:
         # Conectar a base de datos
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Ejecutar procedimiento y traer datos
-        cursor.execute("CALL selectSemanaGeneralFP(%s,%s, %s, %s)", (id_cliente, id_cliente, linea, fecha))
-        results = cursor.fetchall()
-
-        while cursor.nextset():
-            pass
-
-        cursor.execute("SELECT CostokWh FROM clientes WHERE id_cliente = %s", (id_cliente,))
-        costo_kwh_result = cursor.fetchone()
-
-        columns = [
-            "semana", "fecha", "kWh", "horas_trabajadas", "kWh_load", "horas_load",
-            "kWh_noload", "horas_noload", "hp_equivalente", "conteo_ciclos", "promedio_ciclos_por_hora"
-        ]
+        data = semana_general(cursor, id_cliente, linea, fecha)
+        usd_por_kwh = get_costo_kwh(id_cliente, cursor)
 
         cursor.close()
         conn.close()
 
-        if not results:
+        if not data:
             return {"error": "Sin datos en semanaGeneralFP"}
 
-        data = [dict(zip(columns, row)) for row in results]
-
         # Encontrar el máximo valor de semana que representa la semana "actual" o la más reciente
         max_semana = max(d["semana"] for d in data)
 
@@ -922,7 +812,6 @@ def get_week_summary_general(id_cliente: int = Query(..., description="ID del cl
 
         # Calcular métricas semana actual
         total_kWh_semana_actual = sum(d["kWh"] for d in semana_actual)
-        usd_por_kwh = float(costo_kwh_result[0]) if costo_kwh_result else 0.17
         costo_semana_actual = costo_energia_usd(total_kWh_semana_actual, usd_por_kwh)
         horas_trabajadas_semana_actual = sum(d["horas_trabajadas"] for d in semana_actual)
         promedio_ciclos_semana_actual = sum(d["promedio_ciclos_por_hora"] for d in semana_actual) / len(semana_actual)
@@ -933,7 +822,7 @@ def get_week_summary_general(id_cliente: int = Query(..., description="ID del cl
             kWh_anteriores = sum(d["kWh"] for d in semanas_anteriores) / len(semanas_anteriores)
             horas_trabajadas_anteriores = sum(d["horas_trabajadas"] for d in semanas_anteriores) / len(semanas_anteriores)
             promedio_kWh_anteriores = sum(d["kWh"] for d in semanas_anteriores) / len(semanas_anteriores)
-            promedio_costo_anteriores = costo_energia_usd(promedio_kWh_anteriores, float(costo_kwh_result[0]) if costo_kwh_result else 0.17)
+            promedio_costo_anteriores = costo_energia_usd(promedio_kWh_anteriores, usd_por_kwh)
             promedio_ciclos_anteriores = sum(d["promedio_ciclos_por_hora"] for d in semanas_anteriores) / len(semanas_anteriores)
             promedio_hp_anteriores = sum(d["hp_equivalente"] for d in semanas_anteriores) / len(semanas_anteriores)
             promedio_horas_trabajadas = sum(d["horas_trabajadas"] for d in semanas_anteriores) / len(semanas_anteriores)
@@ -1104,12 +993,7 @@ def get_week_summary_general(id_cliente: int = Query(..., description="ID del cl
 def get_kwh_mensual_por_dia(año: int = Query(..., description="Año"),
                             mes: int = Query(..., description="Mes")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Ejecutar procedimiento almacenado
@@ -1146,42 +1030,28 @@ def get_kwh_mensual_por_dia(año: int = Query(..., description="Año"),
 
 
 @report.get("/kwh-diario-fases", tags=["📊 KWh Diario por Fases"])
-def get_kwh_diario_fases(fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD")):
+def get_kwh_diario_fases(
+    fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    columnas: bool = Query(False, description='Devuelve {"time": [...], ...} en lugar de una lista de objetos')
+):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Ejecutar procedimiento almacenado
+        # Ejecutar procedimiento almacenado (en streaming a arreglos por columna)
         cursor.execute(
             "CALL kwh_diario_fases(%s)",
             (fecha,)
         )
-
-        results = cursor.fetchall()
-
-        # Consumir resultsets pendientes
-        while cursor.nextset():
-            pass
+        arrays = leer_columnas(cursor, PHASE_COLUMNS["kwh_diario_fases"])
 
         cursor.close()
         conn.close()
 
-        if not results:
-            return {"data": []}
-
-        # Mapear resultados
-        columns = ["time", "kWa", "kWb", "kWc"]
-        data = [dict(zip(columns, row)) for row in results]
+        if not len(arrays["time"]):
+            return arrays_response(arrays, columnas)
 
-        return {
-            "data": data,
-            "fecha": fecha
-        }
+        return arrays_response(arrays, columnas, fecha=fecha)
 
     except mysql.connector.Error as err:
         return {"error": str(err)}
@@ -1190,42 +1060,28 @@ def get_kwh_diario_fases(fecha: str = Query(..., description="Fecha en formato Y
 
 
 @report.get("/amperaje-diario-fases", tags=["📊 Amperaje Diario por Fases"])
-def get_amperaje_diario_fases(fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD")):
+def get_amperaje_diario_fases(
+    fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    columnas: bool = Query(False, description='Devuelve {"time": [...], ...} en lugar de una lista de objetos')
+):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Ejecutar procedimiento almacenado
+        # Ejecutar procedimiento almacenado (en streaming a arreglos por columna)
         cursor.execute(
             "CALL amperaje_diario_fases(%s)",
             (fecha,)
         )
-
-        results = cursor.fetchall()
-
-        # Consumir resultsets pendientes
-        while cursor.nextset():
-            pass
+        arrays = leer_columnas(cursor, PHASE_COLUMNS["amperaje_diario_fases"])
 
         cursor.close()
         conn.close()
 
-        if not results:
-            return {"data": []}
-
-        # Mapear resultados
-        columns = ["time", "ia", "ib", "ic"]
-        data = [dict(zip(columns, row)) for row in results]
+        if not len(arrays["time"]):
+            return arrays_response(arrays, columnas)
 
-        return {
-            "data": data,
-            "fecha": fecha
-        }
+        return arrays_response(arrays, columnas, fecha=fecha)
 
     except mysql.connector.Error as err:
         return {"error": str(err)}
@@ -1234,42 +1090,28 @@ def get_amperaje_diario_fases(fecha: str = Query(..., description="Fecha en form
 
 
 @report.get("/voltaje-diario-fases", tags=["📊 Voltaje Diario por Fases"])
-def get_voltaje_diario_fases(fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD")):
+def get_voltaje_diario_fases(
+    fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    columnas: bool = Query(False, description='Devuelve {"time": [...], ...} en lugar de una lista de objetos')
+):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Ejecutar procedimiento almacenado
+        # Ejecutar procedimiento almacenado (en streaming a arreglos por columna)
         cursor.execute(
             "CALL voltaje_diario_fases(%s)",
             (fecha,)
         )
-
-        results = cursor.fetchall()
-
-        # Consumir resultsets pendientes
-        while cursor.nextset():
-            pass
+        arrays = leer_columnas(cursor, PHASE_COLUMNS["voltaje_diario_fases"])
 
         cursor.close()
         conn.close()
 
-        if not results:
-            return {"data": []}
-
-        # Mapear resultados
-        columns = ["time", "ua", "ub", "uc"]
-        data = [dict(zip(columns, row)) for row in results]
+        if not len(arrays["time"]):
+            return arrays_response(arrays, columnas)
 
-        return {
-            "data": data,
-            "fecha": fecha
-        }
+        return arrays_response(arrays, columnas, fecha=fecha)
 
     except mysql.connector.Error as err:
         return {"error": str(err)}
@@ -1282,12 +1124,7 @@ def get_voltaje_diario_fases(fecha: str = Query(..., description="Fecha en forma
 def get_client_data(id_cliente: int = Query(..., description="ID del cliente")):
     try:
         # Connect to the database
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Fetch data from the clientes table for id_cliente 7
@@ -1315,12 +1152,7 @@ def get_client_data(id_cliente: int = Query(..., description="ID del cliente")):
 def get_compressor_data(id_cliente: int = Query(..., description="ID del cliente"), linea: str = Query(..., description="Línea del cliente")):
     try:
         # Connect to the database
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Fetch data from the compressor table for id_cliente 7
@@ -1348,12 +1180,7 @@ def get_compressor_data(id_cliente: int = Query(..., description="ID del cliente
 def get_clients_data():
     try:
         # Conectar a la base de datos
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Obtener clientes con envío diario
@@ -1397,12 +1224,7 @@ def get_clients_data():
 def get_all_clients_data():
     try:
         # Conectar a la base de datos
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Obtener clientes con envío diario
@@ -1,5 +1,5 @@
-from fastapi import FastAPI, Path, HTTPException, APIRouter, Request, UploadFile, File, Form
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import FastAPI, Path, HTTPException, APIRouter, Request, UploadFile, File, Form, Depends
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from pydantic import BaseModel
 from typing import Optional, List
 from decimal import Decimal
@@ -9,11 +9,18 @@ import os
 import io
 from dotenv import load_dotenv
 from datetime import datetime
+from email.utils import formatdate
 import json
 
 from .clases import Modulos, PreMantenimientoRequest, PostMantenimientoRequest
-from .drive_utils import upload_maintenance_photos, list_gcs_photos_by_folio, get_gcs_client, BUCKET_NAME
+from .db_utils import get_db_connection
+from .reference_cache import get_mantenimientos_tipo
+from .pagination import PageParams, page_params, build_query, count_rows, split_page, page_response
+from .drive_utils import plan_maintenance_uploads, planned_files, list_gcs_photos_by_folio, BUCKET_NAME
 from .pdf_playwright import generate_pdf_from_react
+from .pdf_cache import get_or_render_pdf, invalidate_report_pdf, KIND_MTTO
+from .photo_processing import spool_upload, discard_spooled, upload_planned
+from .photo_cache import open_cached_photo, iter_file, parse_range, THUMBNAIL_SIZES
 
 load_dotenv()
 DB_HOST = os.getenv("DB_HOST")
@@ -21,8 +28,13 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_DATABASE = os.getenv("DB_DATABASE")
 
+PHOTO_CACHE_CONTROL = os.getenv("PHOTO_CACHE_CONTROL", "private, max-age=3600")
+
 reportes_mtto = APIRouter(prefix="/reporte_mtto", tags=["Reportes de Mantenimiento"])
 
+# Orden de la paginación por cursor de GET /reportes_mtto/historial (más recientes primero)
+HISTORY_PAGE_KEYS = [("o.fecha_creacion", "DESC"), ("o.folio", "DESC")]
+
 
 def _foto_url(request: Request, blob_name: str) -> str:
     base = str(request.base_url).rstrip("/")
@@ -30,27 +42,58 @@ def _foto_url(request: Request, blob_name: str) -> str:
 
 
 @reportes_mtto.get("/foto")
-def get_foto(blob: str, request: Request):
-    """Proxy endpoint: descarga una foto de GCS y la sirve al cliente."""
+def get_foto(blob: str, request: Request, size: Optional[str] = None):
+    """
+    Proxy endpoint: sirve una foto de GCS desde la caché local en disco.
+
+    Soporta validación HTTP (ETag / Last-Modified / If-None-Match), peticiones Range
+    y miniaturas de tamaño fijo (`size=sm|md`) para la cuadrícula del reporte.
+    """
     try:
-        client = get_gcs_client()
-        gcs_blob = client.bucket(BUCKET_NAME).blob(blob)
-        content = gcs_blob.download_as_bytes()
-        content_type = gcs_blob.content_type or "image/jpeg"
-        return StreamingResponse(io.BytesIO(content), media_type=content_type)
+        f, meta = open_cached_photo(blob, size)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid size. Use one of: {', '.join(THUMBNAIL_SIZES)}")
     except Exception as err:
         raise HTTPException(status_code=404, detail=f"Photo not found: {str(err)}")
 
+    headers = {
+        "ETag": meta["etag"],
+        "Last-Modified": formatdate(meta["last_modified"], usegmt=True),
+        "Cache-Control": PHOTO_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or meta["etag"] in [t.strip() for t in if_none_match.split(",")]):
+        f.close()
+        return Response(status_code=304, headers=headers)
+
+    total = meta["size"]
+    try:
+        byte_range = parse_range(request.headers.get("range"), total)
+    except ValueError:
+        f.close()
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{total}"})
+
+    if byte_range is None:
+        headers["Content-Length"] = str(total)
+        return StreamingResponse(iter_file(f), media_type=meta["content_type"], headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{total}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        iter_file(f, start, end),
+        status_code=206,
+        media_type=meta["content_type"],
+        headers=headers,
+    )
+
 
 @reportes_mtto.get("/status")
 def get_reporte_status():
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE,
-            host=DB_HOST
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute(
@@ -86,12 +129,7 @@ def get_reporte_status():
 @reportes_mtto.get("/pre-mtto/{folio}")
 def get_pre_answers(folio: str = Path(..., description="Folio del reporte")):
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE,
-            host=DB_HOST
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute(
@@ -122,12 +160,7 @@ def save_pre_mantenimiento(data: PreMantenimientoRequest):
     Save pre-maintenance data for a compressor report
     """
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE,
-            host=DB_HOST
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Check if pre-maintenance record exists for this folio
@@ -203,6 +236,7 @@ def save_pre_mantenimiento(data: PreMantenimientoRequest):
         conn.commit()
         cursor.close()
         conn.close()
+        invalidate_report_pdf(data.folio)
 
         return {
             "success": True,
@@ -258,54 +292,59 @@ async def upload_photos(
         print(f"  - Parent folder: {parent_folder}")
         print(f"  - Files count: {len(files)}")
         
-        # Prepare photos for upload
+        # Stream each upload to a temporary file instead of reading it into memory
         photos_by_category = {category: []}
-        
-        for idx, file in enumerate(files):
-            # Read file content
-            content = await file.read()
-            
-            # Determine MIME type
-            mime_type = file.content_type or 'image/jpeg'
-            
-            print(f"  - File {idx + 1}: {file.filename} ({len(content)} bytes, MIME: {mime_type})")
-            
-            photos_by_category[category].append((
-                file.filename,
-                content,
-                mime_type
-            ))
-        
-        print(f"🚀 [DEBUG] Calling upload_maintenance_photos...")
-        # Upload to Google Drive
-        result = upload_maintenance_photos(
-            client_name=client_name,
-            folio=folio,
-            photos_by_category=photos_by_category,
-            parent_folder=parent_folder
-        )
-        
-        print(f"📋 [DEBUG] Upload result: {result}")
-        
-        if result.get("success"):
-            print(f"✅ [DEBUG] Upload succeeded!")
-            uploaded_with_urls = {
-                cat: [{**f, "public_url": _foto_url(request, f["blob_name"])} for f in files]
-                for cat, files in result["uploaded_files"].items()
-            }
-            return {
-                "success": True,
-                "message": f"Successfully uploaded {len(files)} photo(s) to Google Cloud Storage",
-                "uploaded_files": uploaded_with_urls,
-                "gcs_prefix": result["gcs_prefix"]
-            }
-        else:
-            print(f"❌ [DEBUG] Upload failed: {result.get('error')}")
+        spooled_paths = []
+
+        try:
+            for idx, file in enumerate(files):
+                path = await spool_upload(file)
+                spooled_paths.append(path)
+
+                # Determine MIME type
+                mime_type = file.content_type or 'image/jpeg'
+
+                print(f"  - File {idx + 1}: {file.filename} ({os.path.getsize(path)} bytes, MIME: {mime_type})")
+
+                photos_by_category[category].append((
+                    file.filename,
+                    path,
+                    mime_type
+                ))
+        except Exception:
+            # Files spooled before the failing one would otherwise stay in the temp dir
+            discard_spooled(spooled_paths)
+            raise
+
+        # Names are resolved now; resizing, re-encoding and the GCS upload run on the worker pool (awaited)
+        try:
+            plan = plan_maintenance_uploads(
+                client_name=client_name,
+                folio=folio,
+                photos_by_category=photos_by_category,
+                parent_folder=parent_folder
+            )
+        except Exception:
+            discard_spooled(spooled_paths)
+            raise
+        result = await upload_planned(plan, spooled_paths)
+        if not result.get("success"):
             return {
                 "success": False,
-                "error": result.get("error", "Unknown error")
+                "error": f"Error uploading photos: {result.get('error')}"
             }
-            
+
+        uploaded_with_urls = {
+            cat: [{**f, "public_url": _foto_url(request, f["blob_name"])} for f in planned]
+            for cat, planned in planned_files(plan).items()
+        }
+        return {
+            "success": True,
+            "message": f"Uploaded {len(files)} photo(s) to Google Cloud Storage",
+            "uploaded_files": uploaded_with_urls,
+            "gcs_prefix": plan["gcs_prefix"]
+        }
+
     except Exception as err:
         print(f"❌ [EXCEPTION] Error uploading photos: {str(err)}")
         import traceback
@@ -326,12 +365,7 @@ def save_post_mantenimiento(data: PostMantenimientoRequest):
     """
     conn = None
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE,
-            host=DB_HOST
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Check if post-maintenance record exists for this folio
@@ -400,6 +434,7 @@ def save_post_mantenimiento(data: PostMantenimientoRequest):
 
         conn.commit()
         cursor.close()
+        invalidate_report_pdf(data.folio)
 
         return {
             "success": True,
@@ -435,12 +470,7 @@ def finalizar_reporte(folio: str = Path(..., description="Folio del reporte")):
     """
     conn = None
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE,
-            host=DB_HOST
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Update orden_servicio status to 'terminado'
@@ -504,11 +534,7 @@ def finalizar_reporte(folio: str = Path(..., description="Folio del reporte")):
             }
 
             # 2. Get ALL maintenance types defined for this compressor type
-            cursor.execute(
-                "SELECT * FROM mantenimientos_tipo WHERE tipo_compresor = %s",
-                (tipo_compresor,)
-            )
-            all_tipos = cursor.fetchall()
+            all_tipos = get_mantenimientos_tipo(tipo_compresor, cursor)
 
             # 3. Get which id_mantenimiento records already exist for this compressor
             cursor.execute(
@@ -587,6 +613,7 @@ def finalizar_reporte(folio: str = Path(..., description="Folio del reporte")):
 
         conn.commit()
         cursor.close()
+        invalidate_report_pdf(folio)
 
         return {
             "success": True,
@@ -619,12 +646,7 @@ def get_post_mantenimiento(folio: str = Path(..., description="Folio del reporte
     Get post-maintenance data by folio.
     """
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE,
-            host=DB_HOST
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute(
@@ -645,21 +667,17 @@ def get_post_mantenimiento(folio: str = Path(..., description="Folio del reporte
 
 
 @reportes_mtto.get("/historial")
-def get_report_history():
+def get_report_history(page: PageParams = Depends(page_params)):
     """
     Get full report history joining ordenes_servicio with report status.
-    Returns all completed and in-progress reports.
+    Returns all completed and in-progress reports, newest first
+    (paginated with ?limit=&cursor=, see pagination.py).
     """
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE,
-            host=DB_HOST
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
-        cursor.execute("""
+        query, params = build_query("""
             SELECT
                 o.folio,
                 o.nombre_cliente,
@@ -681,15 +699,18 @@ def get_report_history():
                 rs.post_mantenimiento,
                 rs.enviado
             FROM ordenes_servicio o
-            LEFT JOIN reportes_status rs ON o.folio = rs.folio
-            ORDER BY o.fecha_creacion DESC
-        """)
+            LEFT JOIN reportes_status rs ON o.folio = rs.folio""",
+            [], [], HISTORY_PAGE_KEYS, page, keep_order=True
+        )
+        cursor.execute(query, tuple(params))
 
         reportes = cursor.fetchall()
+        total = count_rows(cursor, "FROM ordenes_servicio", [], []) if page.include_total else None
         cursor.close()
         conn.close()
 
-        return {"success": True, "data": reportes}
+        reportes, next_cursor = split_page(reportes, page, lambda row: (row["fecha_creacion"], row["folio"]))
+        return page_response(reportes, page, next_cursor, total, success=True)
     except mysql.connector.Error as err:
         return {"success": False, "error": str(err)}
 
@@ -701,12 +722,7 @@ def get_full_report(request: Request, folio: str = Path(..., description="Folio
     Includes photos from Google Drive if available.
     """
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE,
-            host=DB_HOST
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Get orden info
@@ -786,8 +802,10 @@ async def download_report_pdf(folio: str = Path(..., description="Folio del repo
         # Get the frontend URL from environment or use default
         frontend_url = os.getenv("FRONTEND_URL", "https://dashboard.ventologix.com")
 
-        # Generate PDF using Playwright
-        pdf_bytes = await generate_pdf_from_react(folio, frontend_url)
+        # Finalized reports are rendered once and then served from the PDF cache
+        pdf_bytes = await get_or_render_pdf(
+            KIND_MTTO, folio, lambda: generate_pdf_from_react(folio, frontend_url)
+        )
 
         # Return PDF as downloadable file
         clean_folio = folio.replace("/", "-").replace("\\", "-")
@@ -823,12 +841,7 @@ async def download_report_pdf_old(folio: str = Path(..., description="Folio del
     import base64
 
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE,
-            host=DB_HOST
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute("SELECT * FROM ordenes_servicio WHERE folio = %s", (folio,))
@@ -1168,8 +1181,10 @@ async def download_report_pdf_react(folio: str = Path(..., description="Folio de
         # Get the frontend URL from environment or use default
         frontend_url = os.getenv("FRONTEND_URL", "https://dashboard.ventologix.com")
 
-        # Generate PDF using Playwright
-        pdf_bytes = await generate_pdf_from_react(folio, frontend_url)
+        # Finalized reports are rendered once and then served from the PDF cache
+        pdf_bytes = await get_or_render_pdf(
+            KIND_MTTO, folio, lambda: generate_pdf_from_react(folio, frontend_url)
+        )
 
         # Return PDF as downloadable file
         clean_folio = folio.replace("/", "-").replace("\\", "-")
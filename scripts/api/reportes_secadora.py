@@ -1,14 +1,16 @@
 from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form, Body
 from fastapi.responses import JSONResponse, StreamingResponse
 from typing import Optional, List
-import mysql.connector
 import os
 import io
 from dotenv import load_dotenv
 from datetime import datetime, date
 
-from .drive_utils import upload_maintenance_photos, get_gcs_client, BUCKET_NAME
+from .db_utils import get_db_connection
+from .drive_utils import plan_maintenance_uploads, list_gcs_photos_by_folio
+from .photo_processing import spool_upload, discard_spooled, upload_planned
 from .pdf_playwright import generate_pdf_from_react
+from .pdf_cache import get_or_render_pdf, invalidate_report_pdf, KIND_SECADORA
 
 load_dotenv()
 DB_HOST = os.getenv("DB_HOST")
@@ -21,15 +23,6 @@ reportes_secadora = APIRouter(prefix="/reporte_secadora", tags=["Reportes de Sec
 DRYER_VIEW_PATH = "/features/compressor-maintenance/reports/view-dryer"
 
 
-def _get_conn():
-    return mysql.connector.connect(
-        host=DB_HOST,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_DATABASE,
-    )
-
-
 def _serialize_row(row: dict) -> dict:
     """Convert non-JSON-serializable types in a DB row."""
     for k, v in row.items():
@@ -39,29 +32,13 @@ def _serialize_row(row: dict) -> dict:
 
 
 def _list_secadora_photos(client_name: str, folio: str, request: Request) -> dict:
-    """List photos from GCS organized by category under Secadoras/ prefix."""
-    try:
-        client = get_gcs_client()
-        clean_client = client_name.strip().replace("/", "-")
-        clean_folio = folio.strip().replace("/", "-")
-        target_segment = f"/{clean_client}/{clean_folio}/"
-        blobs = client.list_blobs(BUCKET_NAME, prefix="Secadoras/")
-        by_category = {}
-        base = str(request.base_url).rstrip("/")
-        for blob in blobs:
-            if target_segment not in blob.name:
-                continue
-            after_folio = blob.name.split(target_segment, 1)[1]
-            parts = after_folio.split("/", 1)
-            if len(parts) < 2 or not parts[1]:
-                continue
-            category = parts[0]
-            url = f"{base}/reporte_mtto/foto?blob={blob.name}"
-            by_category.setdefault(category, []).append(url)
-        return by_category
-    except Exception as e:
-        print(f"Warning: could not list GCS photos for secadora: {e}")
-        return {}
+    """List photos organized by category under Secadoras/ prefix (via the photo index)."""
+    base = str(request.base_url).rstrip("/")
+    photos = list_gcs_photos_by_folio(client_name, folio, parent_folder="Secadoras")
+    return {
+        category: [f"{base}/reporte_mtto/foto?blob={blob_name}" for blob_name in blobs]
+        for category, blobs in photos["by_category"].items()
+    }
 
 
 # ── GET /listar ──────────────────────────────────────────────────────────────
@@ -69,7 +46,7 @@ def _list_secadora_photos(client_name: str, folio: str, request: Request) -> dic
 @reportes_secadora.get("/listar")
 def listar_reportes_secadora():
     """List all dryer reports (summary for the listing page)."""
-    conn = _get_conn()
+    conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
         cursor.execute(
@@ -141,11 +118,12 @@ async def guardar_reporte_secadora(
     fotos_REFRIGERACION: List[UploadFile] = File(default=[]),
     fotos_OTROS: List[UploadFile] = File(default=[]),
 ):
-    conn = _get_conn()
+    conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        # Upload photos to GCS
+        # Spool photos to disk; resizing and the GCS upload run on the worker pool
         photos_by_category = {}
+        spooled_paths = []
         raw_photos = {
             "PLACAS_EQUIPO": fotos_PLACAS_EQUIPO,
             "DISPLAY_HORAS": fotos_DISPLAY_HORAS,
@@ -157,22 +135,14 @@ async def guardar_reporte_secadora(
             if file_list:
                 photos_by_category[category] = []
                 for f in file_list:
-                    content = await f.read()
+                    path = await spool_upload(f)
+                    spooled_paths.append(path)
                     photos_by_category[category].append((
                         f.filename,
-                        content,
+                        path,
                         f.content_type or "image/jpeg",
                     ))
 
-        fotos_urls = {}
-        if photos_by_category:
-            fotos_urls = upload_maintenance_photos(
-                client_name=cliente or "sin_cliente",
-                folio=folio,
-                photos_by_category=photos_by_category,
-                parent_folder="Secadoras",
-            )
-
         # Upsert
         cursor.execute("SELECT id FROM reportes_secadora WHERE folio = %s", (folio,))
         existing = cursor.fetchone()
@@ -263,10 +233,30 @@ async def guardar_reporte_secadora(
             )
 
         conn.commit()
+        invalidate_report_pdf(folio, KIND_SECADORA)
+
+        # Photos are uploaded only once the report is saved
+        fotos_urls = {}
+        if photos_by_category:
+            plan = plan_maintenance_uploads(
+                client_name=cliente or "sin_cliente",
+                folio=folio,
+                photos_by_category=photos_by_category,
+                parent_folder="Secadoras",
+            )
+            paths, spooled_paths = spooled_paths, []
+            fotos_urls = await upload_planned(plan, paths)
+            if not fotos_urls.get("success"):
+                return JSONResponse(
+                    {"ok": False, "folio": folio, "error": f"Report saved but photos failed to upload: {fotos_urls.get('error')}", "fotos": fotos_urls},
+                    status_code=502,
+                )
+
         return JSONResponse({"ok": True, "folio": folio, "fotos": fotos_urls})
 
     except Exception as e:
         conn.rollback()
+        discard_spooled(spooled_paths)
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         cursor.close()
@@ -277,7 +267,7 @@ async def guardar_reporte_secadora(
 
 @reportes_secadora.get("/reporte-completo/{folio}")
 def get_reporte_completo(folio: str, request: Request):
-    conn = _get_conn()
+    conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
         cursor.execute("SELECT * FROM reportes_secadora WHERE folio = %s", (folio,))
@@ -303,7 +293,7 @@ def firmar_reporte(body: dict = Body(...)):
     folio = body.get("folio")
     if not folio:
         raise HTTPException(status_code=400, detail="folio requerido")
-    conn = _get_conn()
+    conn = get_db_connection()
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -325,6 +315,7 @@ def firmar_reporte(body: dict = Body(...)):
         conn.commit()
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Reporte no encontrado")
+        invalidate_report_pdf(folio, KIND_SECADORA)
         return {"ok": True}
     except HTTPException:
         raise
@@ -340,7 +331,7 @@ def firmar_reporte(body: dict = Body(...)):
 
 @reportes_secadora.post("/finalizar-reporte/{folio}")
 def finalizar_reporte(folio: str):
-    conn = _get_conn()
+    conn = get_db_connection()
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -357,6 +348,7 @@ def finalizar_reporte(folio: str):
         )
 
         conn.commit()
+        invalidate_report_pdf(folio, KIND_SECADORA)
         return {"success": True}
     except Exception as e:
         conn.rollback()
@@ -371,8 +363,11 @@ def finalizar_reporte(folio: str):
 @reportes_secadora.get("/descargar-pdf/{folio}")
 async def descargar_pdf_secadora(folio: str):
     frontend_url = os.getenv("FRONTEND_URL", "https://dashboard.ventologix.com")
-    pdf_bytes = await generate_pdf_from_react(
-        folio, frontend_url, view_path=DRYER_VIEW_PATH
+    # Finalized reports are rendered once and then served from the PDF cache
+    pdf_bytes = await get_or_render_pdf(
+        KIND_SECADORA,
+        folio,
+        lambda: generate_pdf_from_react(folio, frontend_url, view_path=DRYER_VIEW_PATH),
     )
     clean_folio = folio.replace("/", "-").replace("\\", "-")
     return StreamingResponse(
@@ -388,7 +383,7 @@ async def descargar_pdf_secadora(folio: str):
 
 @reportes_secadora.get("/{folio}")
 def get_reporte_secadora(folio: str):
-    conn = _get_conn()
+    conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     try:
         cursor.execute("SELECT * FROM reportes_secadora WHERE folio = %s", (folio,))
@@ -0,0 +1,157 @@
+"""
+Endpoints por lote: resumen diario, resumen semanal y pie de varias líneas en una
+sola petición.
+
+El dashboard y la automatización nocturna piden estos datos una línea a la vez;
+un cliente con muchos compresores hace N peticiones seguidas. Aquí se reciben
+las líneas (`linea` repetido) o un `numero_cliente` y cada línea se calcula en
+paralelo con los mismos endpoints de reports_daily.py / reports_weekly.py, sobre
+conexiones del pool compartido (db_utils.pooled_connections).
+
+Respuesta:
+
+    {"data": {"A": <respuesta del endpoint de la línea A>, "B": ...}}
+
+Si `numero_cliente` tiene compresores con la misma línea en distintos
+id_cliente, la clave es "id_cliente:linea".
+
+Environment:
+    BATCH_REPORT_WORKERS  Líneas calculadas a la vez en todo el proceso (default: 4)
+"""
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Response
+
+from .db_utils import get_db_connection, pooled_connections
+from .json_response import FastJSONResponse
+from .reports_daily import get_daily_report, get_day_report, get_pie_data_proc, get_pie_data_proc_day
+from .reports_weekly import (
+    get_pie_data_proc_date_week,
+    get_pie_data_proc_weekly,
+    get_week_summary_general,
+    get_weekly_summary_general,
+)
+
+BATCH_REPORT_WORKERS = int(os.getenv("BATCH_REPORT_WORKERS", "4"))
+MAX_BATCH_LINES = 50
+
+_executor = ThreadPoolExecutor(max_workers=BATCH_REPORT_WORKERS, thread_name_prefix="batch-report")
+
+reports_batch = APIRouter(prefix="/report/batch", tags=["📦 Reportes por Lote"])
+
+
+def _resolve_lines(id_cliente: Optional[int], lineas: Optional[List[str]],
+                   numero_cliente: Optional[int]) -> List[Tuple[str, int, str]]:
+    """[(clave, id_cliente, linea)] a partir de id_cliente + lineas o de numero_cliente"""
+    if numero_cliente is not None:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT DISTINCT c.id_cliente, c.linea
+            FROM compresores c
+            JOIN clientes c2 ON c2.id_cliente = c.id_cliente
+            WHERE c2.numero_cliente = %s AND c.linea IS NOT NULL
+            ORDER BY c.id_cliente, c.linea
+        """, (numero_cliente,))
+        pairs = [(row[0], row[1]) for row in cursor.fetchall()]
+        cursor.close()
+        conn.close()
+        if not pairs:
+            raise HTTPException(status_code=404, detail="El cliente no tiene compresores")
+    elif id_cliente is not None and lineas:
+        pairs = [(id_cliente, linea) for linea in dict.fromkeys(lineas)]
+    else:
+        raise HTTPException(status_code=400, detail="Se requiere numero_cliente, o id_cliente con al menos una linea")
+
+    if len(pairs) > MAX_BATCH_LINES:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAX_BATCH_LINES} líneas por petición")
+
+    repeated = {linea for _, linea in pairs if sum(1 for _, other in pairs if other == linea) > 1}
+    return [
+        (f"{cid}:{linea}" if linea in repeated else linea, cid, linea)
+        for cid, linea in pairs
+    ]
+
+
+def _as_json(result):
+    """Los endpoints a veces devuelven un Response (JSONResponse/FastJSONResponse)"""
+    if isinstance(result, Response):
+        return json.loads(result.body)
+    return result
+
+
+def _run_line(endpoint: Callable, args: tuple):
+    with pooled_connections():
+        try:
+            return _as_json(endpoint(*args))
+        except HTTPException as e:
+            return {"error": e.detail}
+
+
+def _run_batch(endpoint: Callable, lines: List[Tuple[str, int, str]], *extra) -> FastJSONResponse:
+    # Cada tarea lleva una copia del contexto para que su tiempo en MySQL cuente en /metrics
+    futures = [
+        (key, _executor.submit(contextvars.copy_context().run, _run_line, endpoint, (cid, linea) + extra))
+        for key, cid, linea in lines
+    ]
+    return FastJSONResponse({"data": {key: future.result() for key, future in futures}})
+
+
+@reports_batch.get("/daily-report-data", tags=["📦 Reportes por Lote"])
+def get_daily_report_batch(
+    id_cliente: Optional[int] = Query(None, description="ID del cliente"),
+    linea: Optional[List[str]] = Query(None, description="Líneas (repetir el parámetro)"),
+    numero_cliente: Optional[int] = Query(None, description="Todas las líneas del cliente"),
+    fecha: Optional[str] = Query(None, description="YYYY-MM-DD; por defecto el día anterior"),
+):
+    """Resumen diario de varias líneas (como /report/daily-report-data o /report/day-report-data)"""
+    lines = _resolve_lines(id_cliente, linea, numero_cliente)
+    if fecha:
+        return _run_batch(get_day_report, lines, fecha)
+    return _run_batch(get_daily_report, lines)
+
+
+@reports_batch.get("/pie-data-proc", tags=["📦 Reportes por Lote"])
+def get_pie_data_proc_batch(
+    id_cliente: Optional[int] = Query(None, description="ID del cliente"),
+    linea: Optional[List[str]] = Query(None, description="Líneas (repetir el parámetro)"),
+    numero_cliente: Optional[int] = Query(None, description="Todas las líneas del cliente"),
+    fecha: Optional[str] = Query(None, description="YYYY-MM-DD; por defecto el día anterior"),
+):
+    """Pie LOAD/NOLOAD/OFF diario de varias líneas"""
+    lines = _resolve_lines(id_cliente, linea, numero_cliente)
+    if fecha:
+        return _run_batch(get_pie_data_proc_day, lines, fecha)
+    return _run_batch(get_pie_data_proc, lines)
+
+
+@reports_batch.get("/week/summary-general", tags=["📦 Reportes por Lote"])
+def get_weekly_summary_batch(
+    id_cliente: Optional[int] = Query(None, description="ID del cliente"),
+    linea: Optional[List[str]] = Query(None, description="Líneas (repetir el parámetro)"),
+    numero_cliente: Optional[int] = Query(None, description="Todas las líneas del cliente"),
+    fecha: Optional[str] = Query(None, description="YYYY-MM-DD de la semana; por defecto la semana anterior"),
+):
+    """Resumen semanal de varias líneas (como /report/week/summary-general o /report/dateWeek/summary-general)"""
+    lines = _resolve_lines(id_cliente, linea, numero_cliente)
+    if fecha:
+        return _run_batch(get_week_summary_general, lines, fecha)
+    return _run_batch(get_weekly_summary_general, lines)
+
+
+@reports_batch.get("/week/pie-data-proc", tags=["📦 Reportes por Lote"])
+def get_weekly_pie_batch(
+    id_cliente: Optional[int] = Query(None, description="ID del cliente"),
+    linea: Optional[List[str]] = Query(None, description="Líneas (repetir el parámetro)"),
+    numero_cliente: Optional[int] = Query(None, description="Todas las líneas del cliente"),
+    fecha: Optional[str] = Query(None, description="YYYY-MM-DD de la semana; por defecto la semana anterior"),
+):
+    """Pie LOAD/NOLOAD/OFF semanal de varias líneas"""
+    lines = _resolve_lines(id_cliente, linea, numero_cliente)
+    if fecha:
+        return _run_batch(get_pie_data_proc_date_week, lines, fecha)
+    return _run_batch(get_pie_data_proc_weekly, lines)
@@ -3,14 +3,28 @@ Endpoints de reportes diarios y selector de fechas
 """
 from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
-from datetime import timedelta
+from datetime import date, datetime, timedelta
+from typing import Optional
 import numpy as np
+import pytz
+from mysql.connector import errorcode
+from mysql.connector.errors import ProgrammingError
 
-from .db_utils import get_db_connection, percentage_load, percentage_noload, percentage_off
+from .db_utils import costo_energia_usd, get_db_connection, percentage_load, percentage_noload, percentage_off
+from .json_response import series_response
+from .reference_cache import get_compresor_specs, get_costo_kwh
 
 
 reports_daily = APIRouter(prefix="/report", tags=["📅 Reportes Diarios"])
 
+# hoy_resumen.fecha es el día de la lectura en hora de Monterrey (scripts/VM/intraday.py)
+MONTERREY_TZ = pytz.timezone("America/Monterrey")
+
+
+def hoy_monterrey() -> date:
+    """Fecha actual en Monterrey, sin importar la zona horaria del servidor"""
+    return datetime.now(MONTERREY_TZ).date()
+
 
 @reports_daily.get("/pie-data-proc", tags=["📅 Reportes Diarios"])
 def get_pie_data_proc(
@@ -58,7 +72,8 @@ def get_pie_data_proc(
 @reports_daily.get("/line-data-proc", tags=["📅 Reportes Diarios"])
 def get_line_data(
     id_cliente: int = Query(..., description="ID del cliente"),
-    linea: str = Query(..., description="Línea del cliente")
+    linea: str = Query(..., description="Línea del cliente"),
+    columnas: bool = Query(False, description='Devuelve {"time": [...], ...} en lugar de una lista de objetos')
 ):
     """Obtiene datos de línea de corriente para el día anterior"""
     try:
@@ -87,10 +102,7 @@ def get_line_data(
             if (entry["time"] - start_time) >= timedelta(seconds=30):
                 if temp_data:
                     avg_corriente = np.round(np.mean([item["corriente"] for item in temp_data]), 2)
-                    grouped_data.append({
-                        "time": start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                        "corriente": avg_corriente
-                    })
+                    grouped_data.append((start_time.strftime('%Y-%m-%d %H:%M:%S'), avg_corriente))
                 temp_data = [entry]
                 start_time = entry["time"]
             else:
@@ -98,12 +110,9 @@ def get_line_data(
 
         if temp_data:
             avg_corriente = np.round(np.mean([item["corriente"] for item in temp_data]), 2)
-            grouped_data.append({
-                "time": start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                "corriente": avg_corriente
-            })
+            grouped_data.append((start_time.strftime('%Y-%m-%d %H:%M:%S'), avg_corriente))
 
-        return JSONResponse(content={"data": grouped_data})
+        return series_response(grouped_data, ["time", "corriente"], columnas)
 
     except Exception as e:
         return JSONResponse(content={"error": str(e)})
@@ -137,23 +146,9 @@ def get_daily_report(
         while cursor.nextset():
             pass
 
-        cursor.execute(
-            "SELECT hp, voltaje FROM compresores WHERE id_cliente = %s AND linea = %s LIMIT 1",
-            (id_cliente, linea)
-        )
-        data = cursor.fetchone()
-
-        while cursor.nextset():
-            pass
-
-        cursor.execute(
-            "SELECT CostokWh FROM clientes WHERE id_cliente = %s",
-            (id_cliente,)
-        )
-        usd_por_kwh = cursor.fetchone()
-
-        hp_nominal = data[0] if data else 0
-        usd_por_kwh = usd_por_kwh[0] if usd_por_kwh else 0.17
+        specs = get_compresor_specs(id_cliente, linea, cursor)
+        hp_nominal = specs.hp if specs and specs.hp is not None else 0
+        usd_por_kwh = get_costo_kwh(id_cliente, cursor)
         costo_usd = round(float(kWh) * usd_por_kwh, 2)
 
         if 6 <= prom_ciclos_hora <= 15:
@@ -194,6 +189,106 @@ def get_daily_report(
         return {"error": f"Error inesperado: {str(e)}"}
 
 
+@reports_daily.get("/today-so-far", tags=["📅 Reportes Diarios"])
+def get_today_so_far(
+    id_cliente: int = Query(..., description="ID del cliente"),
+    linea: str = Query(..., description="Línea del cliente")
+):
+    """Acumulado del día en curso (hoy_resumen, que mantienen los listeners MQTT)"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        try:
+            cursor.execute("""
+                SELECT fecha, estado, ultimo_registro, inicio, fin, segundos_load, segundos_noload,
+                       segundos_off, kWh, ciclos, fecha_actualizacion
+                FROM hoy_resumen
+                WHERE id_cliente = %s AND linea = %s
+            """, (id_cliente, linea))
+        except ProgrammingError as err:
+            cursor.close()
+            conn.close()
+            if err.errno != errorcode.ER_NO_SUCH_TABLE:
+                raise
+            # Los listeners la crean al arrancar (o python intraday.py --init)
+            return JSONResponse(status_code=503, content={
+                "error": "hoy_resumen no existe todavía: arranca los listeners MQTT o corre intraday.py --init"
+            })
+        row = cursor.fetchone()
+
+        if not row or row["fecha"] != hoy_monterrey():
+            cursor.close()
+            conn.close()
+            return {"data": None, "message": "Sin datos de hoy"}
+
+        usd_por_kwh = get_costo_kwh(id_cliente, cursor)
+        cursor.close()
+        conn.close()
+
+        horas_load = row["segundos_load"] / 3600
+        horas_noload = row["segundos_noload"] / 3600
+        horas_off = row["segundos_off"] / 3600
+        horas_trab = horas_load + horas_noload
+        horas_total = horas_trab + horas_off
+        kWh = float(row["kWh"])
+
+        return {
+            "data": {
+                "fecha": row["fecha"].strftime("%Y-%m-%d"),
+                "estado_actual": row["estado"],
+                "ultimo_registro": str(row["ultimo_registro"]),
+                "actualizado": str(row["fecha_actualizacion"]),
+                "inicio_funcionamiento": str(row["inicio"]),
+                "fin_funcionamiento": str(row["fin"]),
+                "horas_trabajadas": round(horas_trab, 2),
+                "horas_load": round(horas_load, 2),
+                "horas_noload": round(horas_noload, 2),
+                "horas_off": round(horas_off, 2),
+                "kWh": round(kWh, 2),
+                "hp_equivalente": int(kWh / horas_trab / 0.746) if horas_trab else 0,
+                "ciclos": int(row["ciclos"]),
+                "promedio_ciclos_hora": round(row["ciclos"] / horas_trab, 2) if horas_trab else 0,
+                "costo_usd": costo_energia_usd(kWh, usd_por_kwh),
+                "LOAD": round(horas_load / horas_total * 100, 2) if horas_total else 0,
+                "NOLOAD": round(horas_noload / horas_total * 100, 2) if horas_total else 0,
+                "OFF": round(horas_off / horas_total * 100, 2) if horas_total else 0,
+            }
+        }
+
+    except Exception as err:
+        return {"error": str(err)}
+
+
+@reports_daily.get("/hot-window", tags=["📅 Reportes Diarios"])
+def get_hot_window(
+    id_cliente: int = Query(..., description="ID del cliente (device_id)"),
+    desde: Optional[datetime] = Query(None, description="Solo lecturas posteriores (para consultas incrementales)"),
+    columnas: bool = Query(False, description='Devuelve {"time": [...], ...} en lugar de una lista de objetos')
+):
+    """Lecturas crudas del día en curso (`hoy`, ventana caliente de scripts/VM/hot_window.py)"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        query = "SELECT time, ua, ub, uc, ia, ib, ic FROM hoy WHERE device_id = %s"
+        params = [id_cliente]
+        if desde is not None:
+            query += " AND time > %s"
+            params.append(desde)
+        cursor.execute(query + " ORDER BY time", params)
+        results = cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+        columns = ["time", "ua", "ub", "uc", "ia", "ib", "ic"]
+        return series_response(results, columns, columnas,
+                               ultimo=str(results[-1][0]) if results else None)
+
+    except Exception as err:
+        return JSONResponse(content={"error": str(err)})
+
+
 # Selector de Fechas
 @reports_daily.get("/pie-data-proc-day", tags=["🗓️ Selector de Fechas"])
 def get_pie_data_proc_day(
@@ -249,7 +344,8 @@ def get_pie_data_proc_day(
 def get_line_data_day(
     id_cliente: int = Query(...),
     linea: str = Query(...),
-    date: str = Query(...)
+    date: str = Query(...),
+    columnas: bool = Query(False, description='Devuelve {"time": [...], ...} en lugar de una lista de objetos')
 ):
     """Obtiene datos de línea de corriente para una fecha específica"""
     try:
@@ -284,10 +380,7 @@ def get_line_data_day(
         for entry in data:
             if (entry["time"] - start_time) >= timedelta(seconds=30):
                 avg_corr = round(np.mean([t["corriente"] for t in temp_data]), 2)
-                grouped_data.append({
-                    "time": start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                    "corriente": avg_corr
-                })
+                grouped_data.append((start_time.strftime('%Y-%m-%d %H:%M:%S'), avg_corr))
                 temp_data = [entry]
                 start_time = entry["time"]
             else:
@@ -295,12 +388,9 @@ def get_line_data_day(
 
         if temp_data:
             avg_corr = round(np.mean([t["corriente"] for t in temp_data]), 2)
-            grouped_data.append({
-                "time": start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                "corriente": avg_corr
-            })
+            grouped_data.append((start_time.strftime('%Y-%m-%d %H:%M:%S'), avg_corr))
 
-        return {"data": grouped_data}
+        return series_response(grouped_data, ["time", "corriente"], columnas)
 
     except Exception as e:
         return {"error": str(e)}
@@ -335,12 +425,8 @@ def get_day_report(
         while cursor.nextset():
             pass
 
-        cursor.execute(
-            "SELECT hp, voltaje FROM compresores WHERE id_cliente = %s AND linea = %s LIMIT 1",
-            (id_cliente, linea)
-        )
-        data = cursor.fetchone()
-        hp_nominal = data[0] if data else 0
+        specs = get_compresor_specs(id_cliente, linea, cursor)
+        hp_nominal = specs.hp if specs and specs.hp is not None else 0
 
         usd_por_kwh = 0.17
         costo_usd = round(float(kWh) * usd_por_kwh, 2)
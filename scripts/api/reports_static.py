@@ -1,13 +1,29 @@
 """
 Endpoints de datos estáticos y reportes de KWh por fases
 """
+from datetime import date
+from typing import List, Optional
+
 from fastapi import APIRouter, Query
 
-from .db_utils import get_db_connection
+from .daily_rollup import GRANULARIDADES, kwh_por_periodo
+from .db_utils import get_db_connection, leer_columnas
+from .json_response import arrays_response
 
 
 reports_static = APIRouter(prefix="/report", tags=["📋 Datos Estáticos"])
 
+# Límites de GET /report/kwh-rango (cada cliente y año es una consulta y una entrada de caché)
+KWH_RANGO_MAX_AÑOS = 5
+KWH_RANGO_MAX_CLIENTES = 50
+
+# Columnas de los procedimientos por fases; el tiempo se deja como lo entrega MySQL
+PHASE_COLUMNS = {
+    "kwh_diario_fases": [("time", "object"), ("kWa", "float64"), ("kWb", "float64"), ("kWc", "float64")],
+    "amperaje_diario_fases": [("time", "object"), ("ia", "float64"), ("ib", "float64"), ("ic", "float64")],
+    "voltaje_diario_fases": [("time", "object"), ("ua", "float64"), ("ub", "float64"), ("uc", "float64")],
+}
+
 
 # KWh y Fases endpoints
 @reports_static.get("/kwh-mensual-por-dia", tags=["📊 KWh Mensual"])
@@ -41,85 +57,115 @@ def get_kwh_mensual_por_dia(
         return {"error": f"Error inesperado: {str(e)}"}
 
 
+@reports_static.get("/kwh-rango", tags=["📊 KWh Mensual"])
+def get_kwh_rango(
+    desde: date = Query(..., description="Primer día (YYYY-MM-DD)"),
+    hasta: date = Query(..., description="Último día (YYYY-MM-DD, incluido)"),
+    id_cliente: List[int] = Query(..., description="Uno o más clientes (?id_cliente=7&id_cliente=8)"),
+    linea: Optional[str] = Query(None, description="Solo esta línea (default: todas)"),
+    granularidad: str = Query("dia", description="dia, semana o mes")
+):
+    """kWh por compresor y día / semana / mes de un rango arbitrario (desde daily_rollup)"""
+    if hasta < desde:
+        return {"error": "hasta debe ser igual o posterior a desde"}
+    if granularidad not in GRANULARIDADES:
+        return {"error": f"granularidad debe ser una de: {', '.join(GRANULARIDADES)}"}
+    if (hasta - desde).days > KWH_RANGO_MAX_AÑOS * 366:
+        return {"error": f"El rango no puede ser mayor a {KWH_RANGO_MAX_AÑOS} años"}
+    id_cliente = list(dict.fromkeys(id_cliente))
+    if len(id_cliente) > KWH_RANGO_MAX_CLIENTES:
+        return {"error": f"Máximo {KWH_RANGO_MAX_CLIENTES} clientes por consulta"}
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            data = kwh_por_periodo(cursor, id_cliente, desde, hasta, granularidad, linea)
+        finally:
+            cursor.close()
+            conn.close()
+
+        return {
+            "data": data,
+            "desde": desde,
+            "hasta": hasta,
+            "granularidad": granularidad,
+            "total_kWh": round(sum(row["kWh"] for row in data), 2),
+        }
+
+    except Exception as e:
+        return {"error": f"Error inesperado: {str(e)}"}
+
+
 @reports_static.get("/kwh-diario-fases", tags=["📊 KWh Diario por Fases"])
-def get_kwh_diario_fases(fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD")):
+def get_kwh_diario_fases(
+    fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    columnas: bool = Query(False, description='Devuelve {"time": [...], ...} en lugar de una lista de objetos')
+):
     """Obtiene consumo kWh por fases para una fecha"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute("CALL kwh_diario_fases(%s)", (fecha,))
-        results = cursor.fetchall()
-
-        while cursor.nextset():
-            pass
+        arrays = leer_columnas(cursor, PHASE_COLUMNS["kwh_diario_fases"])
 
         cursor.close()
         conn.close()
 
-        if not results:
-            return {"data": []}
+        if not len(arrays["time"]):
+            return arrays_response(arrays, columnas)
 
-        columns = ["time", "kWa", "kWb", "kWc"]
-        data = [dict(zip(columns, row)) for row in results]
-
-        return {"data": data, "fecha": fecha}
+        return arrays_response(arrays, columnas, fecha=fecha)
 
     except Exception as e:
         return {"error": f"Error inesperado: {str(e)}"}
 
 
 @reports_static.get("/amperaje-diario-fases", tags=["📊 Amperaje Diario por Fases"])
-def get_amperaje_diario_fases(fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD")):
+def get_amperaje_diario_fases(
+    fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    columnas: bool = Query(False, description='Devuelve {"time": [...], ...} en lugar de una lista de objetos')
+):
     """Obtiene amperaje por fases para una fecha"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute("CALL amperaje_diario_fases(%s)", (fecha,))
-        results = cursor.fetchall()
-
-        while cursor.nextset():
-            pass
+        arrays = leer_columnas(cursor, PHASE_COLUMNS["amperaje_diario_fases"])
 
         cursor.close()
         conn.close()
 
-        if not results:
-            return {"data": []}
-
-        columns = ["time", "ia", "ib", "ic"]
-        data = [dict(zip(columns, row)) for row in results]
+        if not len(arrays["time"]):
+            return arrays_response(arrays, columnas)
 
-        return {"data": data, "fecha": fecha}
+        return arrays_response(arrays, columnas, fecha=fecha)
 
     except Exception as e:
         return {"error": f"Error inesperado: {str(e)}"}
 
 
 @reports_static.get("/voltaje-diario-fases", tags=["📊 Voltaje Diario por Fases"])
-def get_voltaje_diario_fases(fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD")):
+def get_voltaje_diario_fases(
+    fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    columnas: bool = Query(False, description='Devuelve {"time": [...], ...} en lugar de una lista de objetos')
+):
     """Obtiene voltaje por fases para una fecha"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute("CALL voltaje_diario_fases(%s)", (fecha,))
-        results = cursor.fetchall()
-
-        while cursor.nextset():
-            pass
+        arrays = leer_columnas(cursor, PHASE_COLUMNS["voltaje_diario_fases"])
 
         cursor.close()
         conn.close()
 
-        if not results:
-            return {"data": []}
-
-        columns = ["time", "ua", "ub", "uc"]
-        data = [dict(zip(columns, row)) for row in results]
+        if not len(arrays["time"]):
+            return arrays_response(arrays, columnas)
 
-        return {"data": data, "fecha": fecha}
+        return arrays_response(arrays, columnas, fecha=fecha)
 
     except Exception as e:
         return {"error": f"Error inesperado: {str(e)}"}
@@ -5,7 +5,9 @@ from fastapi import APIRouter, Query
 import numpy as np
 from statistics import mean, pstdev
 
+from .daily_rollup import semana_general
 from .db_utils import get_db_connection, percentage_load, percentage_noload, percentage_off, costo_energia_usd
+from .reference_cache import get_costo_kwh
 
 
 reports_weekly = APIRouter(prefix="/report", tags=["📆 Reportes Semanales"])
@@ -97,28 +99,15 @@ def get_weekly_summary_general(
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute("CALL semanaGeneralFP(%s,%s, %s)", (id_cliente, id_cliente, linea))
-        results = cursor.fetchall()
-
-        while cursor.nextset():
-            pass
-
-        cursor.execute("SELECT CostokWh FROM clientes WHERE id_cliente = %s", (id_cliente,))
-        costo_kwh_result = cursor.fetchone()
-
-        columns = [
-            "semana", "fecha", "kWh", "horas_trabajadas", "kWh_load", "horas_load",
-            "kWh_noload", "horas_noload", "hp_equivalente", "conteo_ciclos", "promedio_ciclos_por_hora"
-        ]
+        data = semana_general(cursor, id_cliente, linea)
+        usd_por_kwh = get_costo_kwh(id_cliente, cursor)
 
         cursor.close()
         conn.close()
 
-        if not results:
+        if not data:
             return {"error": "Sin datos en semanaGeneralFP"}
 
-        data = [dict(zip(columns, row)) for row in results]
-
         semana_actual = [d for d in data if d["semana"] == 0 and d["kWh"] > 0]
         detalle_semana = [d for d in data if d["semana"] == 0]
         semanas_anteriores = [d for d in data if d["semana"] > 0 and d["kWh"] > 0]
@@ -127,7 +116,6 @@ def get_weekly_summary_general(
             return {"error": "No hay datos con consumo en la semana actual"}
 
         total_kWh_semana_actual = sum(d["kWh"] for d in semana_actual)
-        usd_por_kwh = float(costo_kwh_result[0]) if costo_kwh_result else 0.17
         costo_semana_actual = costo_energia_usd(total_kWh_semana_actual, usd_por_kwh)
         horas_trabajadas_semana_actual = sum(d["horas_trabajadas"] for d in semana_actual)
         promedio_ciclos_semana_actual = sum(d["promedio_ciclos_por_hora"] for d in semana_actual) / len(semana_actual)
@@ -377,28 +365,15 @@ def get_week_summary_general(
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute("CALL selectSemanaGeneralFP(%s,%s, %s, %s)", (id_cliente, id_cliente, linea, fecha))
-        results = cursor.fetchall()
-
-        while cursor.nextset():
-            pass
-
-        cursor.execute("SELECT CostokWh FROM clientes WHERE id_cliente = %s", (id_cliente,))
-        costo_kwh_result = cursor.fetchone()
-
-        columns = [
-            "semana", "fecha", "kWh", "horas_trabajadas", "kWh_load", "horas_load",
-            "kWh_noload", "horas_noload", "hp_equivalente", "conteo_ciclos", "promedio_ciclos_por_hora"
-        ]
+        data = semana_general(cursor, id_cliente, linea, fecha)
+        usd_por_kwh = get_costo_kwh(id_cliente, cursor)
 
         cursor.close()
         conn.close()
 
-        if not results:
+        if not data:
             return {"error": "Sin datos en semanaGeneralFP"}
 
-        data = [dict(zip(columns, row)) for row in results]
-
         max_semana = max(d["semana"] for d in data)
         for d in data:
             d["semana"] = d["semana"] - max_semana
@@ -411,7 +386,6 @@ def get_week_summary_general(
             return {"error": "No hay datos con consumo en la semana actual"}
 
         total_kWh_semana_actual = sum(d["kWh"] for d in semana_actual)
-        usd_por_kwh = float(costo_kwh_result[0]) if costo_kwh_result else 0.17
         costo_semana_actual = costo_energia_usd(total_kWh_semana_actual, usd_por_kwh)
         horas_trabajadas_semana_actual = sum(d["horas_trabajadas"] for d in semana_actual)
         promedio_ciclos_semana_actual = sum(d["promedio_ciclos_por_hora"] for d in semana_actual) / len(semana_actual)
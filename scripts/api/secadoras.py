@@ -4,6 +4,7 @@ import os
 from dotenv import load_dotenv
 
 from .clases import Secadora
+from .db_utils import get_db_connection
 
 load_dotenv()
 DB_HOST = os.getenv("DB_HOST")
@@ -14,20 +15,11 @@ DB_DATABASE = os.getenv("DB_DATABASE")
 secadoras = APIRouter(prefix="/secadoras", tags=["Secadoras"])
 
 
-def _get_conn():
-    return mysql.connector.connect(
-        host=DB_HOST,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_DATABASE,
-    )
-
-
 # GET /secadoras/ — todas las secadoras con nombre de cliente
 @secadoras.get("/")
 def get_all_secadoras():
     try:
-        conn = _get_conn()
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute(
             """SELECT s.*,
@@ -50,7 +42,7 @@ def get_all_secadoras():
 @secadoras.get("/search/{query}")
 def search_secadoras(query: str = Path(..., description="Alias, número de serie o nombre de cliente")):
     try:
-        conn = _get_conn()
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute(
             """SELECT s.id, s.tipo, s.alias, s.numero_serie, s.marca, s.anio,
@@ -77,7 +69,7 @@ def create_secadora(request: Secadora):
     conn = None
     cursor = None
     try:
-        conn = _get_conn()
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         if request.numero_serie:
@@ -127,7 +119,7 @@ def update_secadora(secadora_id: int = Path(..., description="ID de la secadora"
     conn = None
     cursor = None
     try:
-        conn = _get_conn()
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute("SELECT id FROM secadores WHERE id = %s", (secadora_id,))
@@ -171,7 +163,7 @@ def delete_secadora(secadora_id: int = Path(..., description="ID de la secadora"
     conn = None
     cursor = None
     try:
-        conn = _get_conn()
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         cursor.execute("DELETE FROM secadores WHERE id = %s", (secadora_id,))
@@ -0,0 +1,147 @@
+"""
+Caché por usuario de GET /web/usuarios/{email} con ETag.
+
+El frontend pide este endpoint en cada carga de página para resolver la sesión.
+Para los roles 0–2 la respuesta incluye todos los compresores del sistema, así
+que se guarda ya serializada por email durante SESSION_CACHE_TTL segundos. Cada
+respuesta lleva un ETag (hash del cuerpo); si el navegador lo manda de vuelta en
+If-None-Match y no cambió, se responde 304 sin cuerpo.
+
+Las escrituras que cambian el contenido invalidan la caché:
+    invalidate_usuario   usuarios_auth (email o id del usuario)
+    invalidate_cliente   modulos_web del cliente
+    invalidate_all       compresores o clientes (aparecen en la lista de los admins)
+
+Cada worker de uvicorn tiene su propia caché; el TTL corto acota cuánto puede
+tardar en verse un cambio hecho en otro worker.
+
+Environment:
+    SESSION_CACHE_TTL          Segundos que vive una entrada (default: 60)
+    SESSION_CACHE_MAX_ENTRIES  Usuarios en caché por worker (default: 1000)
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+
+from .json_response import dumps
+
+SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL", "60"))
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "1000"))
+
+# El navegador guarda la respuesta pero siempre revalida con If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+
+class _Entry:
+    __slots__ = ("body", "etag", "user_id", "numero_cliente", "expires")
+
+    def __init__(self, payload: dict, ttl: int):
+        self.body = dumps(payload)
+        self.etag = 'W/"' + hashlib.sha1(self.body).hexdigest() + '"'
+        self.user_id = payload.get("id")
+        self.numero_cliente = payload.get("numeroCliente")
+        self.expires = time.monotonic() + ttl
+
+
+class SessionCache:
+    """Respuestas serializadas por (ruta, email), con expiración y tope de entradas"""
+
+    def __init__(self, ttl: int = SESSION_CACHE_TTL, max_entries: int = SESSION_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, payload: dict) -> _Entry:
+        entry = _Entry(payload, self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, match: Callable[[tuple, _Entry], bool]) -> int:
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if match(key, entry)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+session_cache = SessionCache()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def cached_session_response(request: Request, route: str, email: str, build: Callable[[], dict]) -> Response:
+    """
+    Respuesta de la sesión desde caché, 304 si el ETag coincide.
+
+    Args:
+        request: Petición (para If-None-Match)
+        route: Nombre del endpoint; separa entradas de endpoints con distinto contenido
+        email: Email del usuario
+        build: Arma el payload cuando no hay entrada vigente
+    """
+    key = (route, email.strip().lower())
+    entry = session_cache.get(key)
+    if entry is None:
+        entry = session_cache.put(key, build())
+
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def invalidate_usuario(email: Optional[str] = None, user_id: Optional[int] = None) -> None:
+    """Quita la sesión de un usuario (por email y/o id de usuarios_auth)"""
+    email = email.strip().lower() if email else None
+    session_cache.invalidate(
+        lambda key, entry: (email is not None and key[1] == email)
+        or (user_id is not None and entry.user_id == user_id)
+    )
+
+
+def invalidate_cliente(numero_cliente: int) -> None:
+    """Quita las sesiones de los usuarios de un cliente (p. ej. cambiaron sus módulos)"""
+    session_cache.invalidate(lambda key, entry: entry.numero_cliente == numero_cliente)
+
+
+def invalidate_all() -> None:
+    """Quita todas las sesiones (altas, cambios o bajas de compresores o clientes)"""
+    session_cache.clear()
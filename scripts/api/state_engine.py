@@ -0,0 +1,305 @@
+"""
+Motor de estados del compresor (LOAD / NOLOAD / OFF) con NumPy.
+
+La clasificación y el conteo de ciclos vivían solo dentro de DFDFTest y los
+demás procedimientos. Aquí se calculan desde los arreglos de corriente de un
+compresor para poder usarlos en alertas, predicción o el resumen diario sin
+llamar a la base de datos:
+
+    estado      LOAD si corriente >= LOAD_NO_LOAD, NOLOAD si > umbral_off, si no OFF
+    duración    segundosPorRegistro por lectura
+    kWh         √3 · voltaje · corriente · FP · segundos / 3600 / 1000
+    ciclo       cada paso de NOLOAD a LOAD
+    hp equiv.   kWh / horas trabajadas / 0.746
+
+Las mismas reglas usa scripts/VM/intraday.py para el acumulado de hoy.
+
+Validación contra DFDFTest (mismas lecturas, compara estado por lectura y resumen):
+    python -m scripts.api.state_engine --validar --cliente 7 --linea A --fecha 2025-06-02 [--fecha ...]
+
+Benchmark sobre una semana sintética de lecturas cada 30 s:
+    python -m scripts.api.state_engine --benchmark [--dias 7] [--runs 20]
+"""
+import argparse
+import math
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .db_utils import FP
+
+OFF = 0
+NOLOAD = 1
+LOAD = 2
+STATE_NAMES = np.array(["OFF", "NOLOAD", "LOAD"])
+STATE_CODES = {"OFF": OFF, "NOLOAD": NOLOAD, "LOAD": LOAD}
+
+UMBRAL_OFF = 1.0
+SEGUNDOS_POR_REGISTRO = 30
+KW_POR_HP = 0.746
+
+
+class Thresholds(NamedTuple):
+    load_no_load: float
+    voltaje: float
+    segundos_por_registro: int = SEGUNDOS_POR_REGISTRO
+    umbral_off: float = UMBRAL_OFF
+
+    @classmethod
+    def from_specs(cls, specs) -> "Thresholds":
+        """Umbrales a partir de reference_cache.CompresorSpecs"""
+        return cls(
+            load_no_load=float(specs.load_no_load),
+            voltaje=float(specs.voltaje or 0),
+            segundos_por_registro=int(specs.segundos_por_registro or SEGUNDOS_POR_REGISTRO),
+        )
+
+
+class StateSummary(NamedTuple):
+    inicio: Optional[datetime]
+    fin: Optional[datetime]
+    horas_trabajadas: float
+    kWh: float
+    kWh_load: float
+    kWh_noload: float
+    horas_load: float
+    horas_noload: float
+    horas_off: float
+    hp_equivalente: float
+    ciclos: int
+    promedio_ciclos_hora: float
+
+
+def classify(corriente, thresholds: Thresholds) -> np.ndarray:
+    """Código de estado (OFF/NOLOAD/LOAD) por lectura; NaN cuenta como OFF"""
+    corriente = np.nan_to_num(np.asarray(corriente, dtype=np.float64), nan=0.0)
+    states = np.full(corriente.shape, NOLOAD, dtype=np.int8)
+    states[corriente <= thresholds.umbral_off] = OFF
+    states[corriente >= thresholds.load_no_load] = LOAD
+    return states
+
+
+def state_names(states: np.ndarray) -> np.ndarray:
+    return STATE_NAMES[states]
+
+
+def transitions(states: np.ndarray) -> np.ndarray:
+    """Índices de las lecturas cuyo estado es distinto al de la anterior"""
+    return np.flatnonzero(states[1:] != states[:-1]) + 1
+
+
+def count_cycles(states: np.ndarray) -> int:
+    """Pasos de NOLOAD a LOAD"""
+    return int(np.count_nonzero((states[:-1] == NOLOAD) & (states[1:] == LOAD)))
+
+
+def kwh(corriente, thresholds: Thresholds) -> np.ndarray:
+    """kWh de cada lectura"""
+    corriente = np.nan_to_num(np.asarray(corriente, dtype=np.float64), nan=0.0)
+    factor = math.sqrt(3) * thresholds.voltaje * FP * thresholds.segundos_por_registro / 3600 / 1000
+    return corriente * factor
+
+
+def summarize(times: Sequence, corriente, thresholds: Thresholds,
+              states: Optional[np.ndarray] = None) -> StateSummary:
+    """
+    Resumen de un periodo (normalmente un día) como el de DFDFTest.
+
+    Args:
+        times: Hora de cada lectura, en orden
+        corriente: Corriente de la línea en cada lectura
+        thresholds: Umbrales y datos del compresor
+        states: Estados ya calculados (por defecto classify(corriente))
+    """
+    if states is None:
+        states = classify(corriente, thresholds)
+    energia = kwh(corriente, thresholds)
+    horas_por_registro = thresholds.segundos_por_registro / 3600
+
+    registros = np.bincount(states, minlength=3)
+    horas_load = registros[LOAD] * horas_por_registro
+    horas_noload = registros[NOLOAD] * horas_por_registro
+    horas_trabajadas = horas_load + horas_noload
+    total_kwh = float(energia.sum())
+    ciclos = count_cycles(states)
+
+    encendido = np.flatnonzero(states != OFF)
+    inicio = times[encendido[0]] if encendido.size else None
+    fin = times[encendido[-1]] if encendido.size else None
+
+    return StateSummary(
+        inicio=inicio,
+        fin=fin,
+        horas_trabajadas=float(horas_trabajadas),
+        kWh=total_kwh,
+        kWh_load=float(energia[states == LOAD].sum()),
+        kWh_noload=float(energia[states == NOLOAD].sum()),
+        horas_load=float(horas_load),
+        horas_noload=float(horas_noload),
+        horas_off=float(registros[OFF] * horas_por_registro),
+        hp_equivalente=total_kwh / horas_trabajadas / KW_POR_HP if horas_trabajadas else 0.0,
+        ciclos=ciclos,
+        promedio_ciclos_hora=ciclos / horas_trabajadas if horas_trabajadas else 0.0,
+    )
+
+
+# ----- Validación contra DFDFTest -----
+
+# (campo del resumen de DFDFTest, posición en su fila)
+PROC_SUMMARY_FIELDS = (
+    ("horas_trabajadas", 3),
+    ("kWh", 4),
+    ("horas_load", 5),
+    ("horas_noload", 6),
+    ("hp_equivalente", 7),
+    ("ciclos", 8),
+    ("promedio_ciclos_hora", 9),
+)
+
+
+def validate_day(cursor, id_cliente: int, linea: str, fecha: str) -> Optional[dict]:
+    """
+    Corre el motor sobre las lecturas que devuelve DFDFTest y compara.
+
+    Returns:
+        {"registros", "coincidencia_estados" (%), "campos": {campo: (procedimiento, motor)}}
+        o None si el procedimiento no devolvió datos
+    """
+    from .reference_cache import get_compresor_specs
+
+    cursor.execute("CALL DFDFTest(%s, %s, %s, %s)", (id_cliente, id_cliente, linea, fecha))
+    rows = cursor.fetchall()
+    cursor.nextset()
+    summary = cursor.fetchone()
+    while cursor.nextset():
+        pass
+    if not rows or not summary:
+        return None
+
+    specs = get_compresor_specs(id_cliente, linea, cursor)
+    if specs is None or specs.load_no_load is None:
+        raise ValueError(f"El compresor {id_cliente}/{linea} no tiene LOAD_NO_LOAD")
+    thresholds = Thresholds.from_specs(specs)
+
+    times = [row[1] for row in rows]
+    corriente = np.array([row[2] or 0 for row in rows], dtype=np.float64)
+    esperado = np.array([STATE_CODES.get(row[3], -1) for row in rows], dtype=np.int8)
+    states = classify(corriente, thresholds)
+    result = summarize(times, corriente, thresholds, states)
+
+    return {
+        "registros": len(rows),
+        "coincidencia_estados": float(np.mean(states == esperado) * 100),
+        "campos": {
+            field: (float(summary[index] or 0), float(getattr(result, field)))
+            for field, index in PROC_SUMMARY_FIELDS
+        },
+    }
+
+
+def _print_validation(id_cliente: int, linea: str, fechas: Sequence[str]) -> None:
+    from .db_utils import get_db_connection
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        for fecha in fechas:
+            result = validate_day(cursor, id_cliente, linea, fecha)
+            if result is None:
+                print(f"\n📅 {fecha}: sin datos en DFDFTest")
+                continue
+            print(f"\n📅 {fecha}: {result['registros']} lecturas, "
+                  f"{result['coincidencia_estados']:.2f}% con el mismo estado")
+            print(f"  {'campo':<22} {'DFDFTest':>12} {'motor':>12} {'dif %':>8}")
+            for field, (esperado, obtenido) in result["campos"].items():
+                diff = (obtenido / esperado - 1) * 100 if esperado else 0.0
+                print(f"  {field:<22} {esperado:>12.2f} {obtenido:>12.2f} {diff:>+8.2f}")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# ----- Benchmark -----
+
+def synthetic_readings(dias: int = 7, segundos: int = SEGUNDOS_POR_REGISTRO, seed: int = 0):
+    """Lecturas con ciclos de carga/descarga, paros nocturnos y ruido"""
+    rng = np.random.default_rng(seed)
+    n = dias * 24 * 3600 // segundos
+    inicio = datetime(2025, 1, 6)
+    times = [inicio + timedelta(seconds=i * segundos) for i in range(n)]
+    hora = (np.arange(n) * segundos / 3600) % 24
+    carga = (np.arange(n) // 8) % 3 != 0
+    corriente = np.where(carga, 42.0, 18.0) + rng.normal(0, 2, n)
+    corriente[(hora < 6) | (hora >= 22)] = rng.uniform(0, 0.5, np.count_nonzero((hora < 6) | (hora >= 22)))
+    return times, corriente
+
+
+def _summarize_python(times, corriente, thresholds: Thresholds) -> tuple:
+    """Misma cuenta con un ciclo de Python, como referencia del benchmark"""
+    factor = math.sqrt(3) * thresholds.voltaje * FP * thresholds.segundos_por_registro / 3600 / 1000
+    registros = {"OFF": 0, "NOLOAD": 0, "LOAD": 0}
+    total_kwh = 0.0
+    ciclos = 0
+    anterior = None
+    for valor in corriente:
+        if valor >= thresholds.load_no_load:
+            estado = "LOAD"
+        elif valor > thresholds.umbral_off:
+            estado = "NOLOAD"
+        else:
+            estado = "OFF"
+        if estado == "LOAD" and anterior == "NOLOAD":
+            ciclos += 1
+        registros[estado] += 1
+        total_kwh += valor * factor
+        anterior = estado
+    return registros, total_kwh, ciclos
+
+
+def benchmark(dias: int = 7, runs: int = 20) -> None:
+    thresholds = Thresholds(load_no_load=30.0, voltaje=440.0)
+    times, corriente = synthetic_readings(dias)
+    lista = corriente.tolist()
+
+    def timed(fn) -> float:
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        return float(np.median(samples)) * 1000
+
+    numpy_ms = timed(lambda: summarize(times, corriente, thresholds))
+    python_ms = timed(lambda: _summarize_python(times, lista, thresholds))
+
+    result = summarize(times, corriente, thresholds)
+    registros, total_kwh, ciclos = _summarize_python(times, lista, thresholds)
+    assert ciclos == result.ciclos and math.isclose(total_kwh, result.kWh, rel_tol=1e-9)
+
+    print(f"📊 {len(lista)} lecturas ({dias} días cada {thresholds.segundos_por_registro} s), mediana de {runs} corridas")
+    print(f"  NumPy   {numpy_ms:>8.2f} ms")
+    print(f"  Python  {python_ms:>8.2f} ms  ({python_ms / numpy_ms:.1f}x)")
+    print(f"  {result.kWh:.1f} kWh, {result.ciclos} ciclos, {result.horas_trabajadas:.1f} h trabajadas")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Motor de estados LOAD/NOLOAD/OFF")
+    parser.add_argument("--validar", action="store_true", help="Compara contra DFDFTest")
+    parser.add_argument("--cliente", type=int, help="id_cliente a validar")
+    parser.add_argument("--linea", default="A")
+    parser.add_argument("--fecha", action="append", help="Día a validar YYYY-MM-DD (repetible)")
+    parser.add_argument("--benchmark", action="store_true", help="Mide el motor sobre datos sintéticos")
+    parser.add_argument("--dias", type=int, default=7)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.validar:
+        if args.cliente is None or not args.fecha:
+            parser.error("--validar requiere --cliente y al menos una --fecha")
+        _print_validation(args.cliente, args.linea, args.fecha)
+    if args.benchmark:
+        benchmark(args.dias, args.runs)
+    if not (args.validar or args.benchmark):
+        parser.print_help()
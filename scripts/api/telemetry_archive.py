@@ -0,0 +1,195 @@
+"""
+Archivo columnar (Parquet) de las lecturas crudas de días cerrados.
+
+Los análisis de varios meses (consumo anual, tendencias de presión) no pueden
+leer `pruebas` / `RTU_datos` completos sin cargar MySQL. Cada día cerrado se
+exporta a un archivo Parquet comprimido con zstd:
+
+    <TELEMETRY_ARCHIVE_DIR>/<tabla>/device=<id>/month=<YYYY-MM>/<YYYY-MM-DD>.parquet
+
+Se escribe un archivo por (dispositivo, día) aunque el día no tenga lecturas,
+así que la existencia del archivo indica que ese día ya está archivado.
+read_range() (y db_utils.leer_telemetria) arma un rango con los días archivados
+desde disco y el resto desde MySQL.
+
+Si `pyarrow` no está instalado el archivo se ignora y todo se lee de MySQL.
+
+Exportación (se puede ejecutar varias veces; reescribe los días):
+    python -m scripts.api.telemetry_archive --desde 2025-01-01 [--hasta 2025-06-30]
+        [--tabla pruebas] [--device 7]
+
+Environment:
+    TELEMETRY_ARCHIVE_DIR  Directorio del archivo (default: <repo>/.cache/telemetria)
+"""
+import argparse
+import os
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .db_utils import filtro_rango, get_db_connection, rango_periodo
+from .telemetry_partitions import TABLES, TelemetryTable
+
+try:
+    import pyarrow  # motor de pandas para Parquet
+except ImportError:
+    pyarrow = None
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent.parent
+ARCHIVE_DIR = Path(os.getenv("TELEMETRY_ARCHIVE_DIR", str(SCRIPT_DIR / ".cache" / "telemetria")))
+COMPRESSION = "zstd"
+
+# De dónde salen los dispositivos a exportar de cada tabla
+DEVICE_SQL = {
+    "pruebas": "SELECT DISTINCT id_cliente FROM dispositivo WHERE id_cliente IS NOT NULL ORDER BY id_cliente",
+    "RTU_datos": "SELECT RTU_id FROM RTU_device ORDER BY RTU_id",
+}
+
+
+def archive_enabled() -> bool:
+    return pyarrow is not None
+
+
+def day_path(table: TelemetryTable, device_id: int, day: date) -> Path:
+    return ARCHIVE_DIR / table.name / f"device={device_id}" / f"month={day:%Y-%m}" / f"{day:%Y-%m-%d}.parquet"
+
+
+def _days(desde: date, hasta: date) -> Iterable[date]:
+    """Días de [desde, hasta] (ambos incluidos)"""
+    for offset in range((hasta - desde).days + 1):
+        yield desde + timedelta(days=offset)
+
+
+def _to_frame(table: TelemetryTable, rows: Sequence) -> pd.DataFrame:
+    df = pd.DataFrame(list(rows), columns=[table.time_col, *table.value_cols])
+    df[table.time_col] = pd.to_datetime(df[table.time_col])
+    for column in table.value_cols:
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+    return df
+
+
+def _fetch_mysql(cursor, table: TelemetryTable, device_id: int, start: datetime, end: datetime) -> pd.DataFrame:
+    rango, params = filtro_rango(table.time_col, start, end)
+    cursor.execute(f"""
+        SELECT {table.time_col}, {", ".join(table.value_cols)}
+        FROM {table.name}
+        WHERE {table.device_col} = %s AND {rango}
+        ORDER BY {table.time_col}
+    """, (device_id, *params))
+    return _to_frame(table, cursor.fetchall())
+
+
+def export_day(cursor, table: TelemetryTable, device_id: int, day: date) -> int:
+    """Escribe el Parquet de un día (reemplazándolo si existía); devuelve cuántas lecturas tiene"""
+    df = _fetch_mysql(cursor, table, device_id, *rango_periodo("dia", day))
+    path = day_path(table, device_id, day)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    df.to_parquet(tmp, engine="pyarrow", compression=COMPRESSION, index=False)
+    os.replace(tmp, path)
+    return len(df)
+
+
+def export_range(desde: date, hasta: Optional[date] = None, tablas: Optional[List[str]] = None,
+                 device_id: Optional[int] = None) -> int:
+    """Exporta los días cerrados de [desde, hasta] (por defecto hasta ayer); devuelve el total de lecturas"""
+    if not archive_enabled():
+        raise RuntimeError("pyarrow no está instalado: pip install pyarrow")
+    hasta = min(hasta or date.today() - timedelta(days=1), date.today() - timedelta(days=1))
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    total = 0
+    try:
+        for table in (TABLES[name] for name in tablas or TABLES):
+            if device_id is not None:
+                devices = [device_id]
+            else:
+                cursor.execute(DEVICE_SQL[table.name])
+                devices = [row[0] for row in cursor.fetchall()]
+            lecturas = 0
+            for device in devices:
+                for day in _days(desde, hasta):
+                    lecturas += export_day(cursor, table, device, day)
+            total += lecturas
+            print(f"✅ {table.name}: {lecturas} lecturas de {len(devices)} dispositivo(s) entre {desde} y {hasta}")
+    finally:
+        cursor.close()
+        conn.close()
+    return total
+
+
+def _split(table: TelemetryTable, device_id: int, start: datetime,
+           end: datetime) -> Tuple[List[Path], List[Tuple[datetime, datetime]]]:
+    """Archivos del archivo y rangos [inicio, fin) que hay que pedir a MySQL"""
+    files = []
+    mysql_ranges = []
+    last = (end - timedelta(microseconds=1)).date()
+    for day in _days(start.date(), last):
+        path = day_path(table, device_id, day)
+        if archive_enabled() and path.exists():
+            files.append(path)
+            continue
+        day_start = max(start, datetime.combine(day, time()))
+        day_end = min(end, datetime.combine(day + timedelta(days=1), time()))
+        if mysql_ranges and mysql_ranges[-1][1] == day_start:
+            mysql_ranges[-1] = (mysql_ranges[-1][0], day_end)
+        else:
+            mysql_ranges.append((day_start, day_end))
+    return files, mysql_ranges
+
+
+def read_range(tabla: str, device_id: int, start: datetime, end: datetime, cursor=None) -> pd.DataFrame:
+    """
+    Lecturas de [start, end) de un dispositivo, ordenadas por tiempo.
+
+    Args:
+        tabla: "pruebas" o "RTU_datos"
+        device_id: device_id (pruebas) o RTU_id (RTU_datos)
+        start, end: Rango semiabierto
+        cursor: Cursor abierto para la parte que sale de MySQL (opcional)
+    """
+    table = TABLES[tabla]
+    if end <= start:
+        return _to_frame(table, [])
+    files, mysql_ranges = _split(table, device_id, start, end)
+
+    frames = []
+    for path in files:
+        df = pd.read_parquet(path, engine="pyarrow")
+        frames.append(df[(df[table.time_col] >= start) & (df[table.time_col] < end)])
+
+    if mysql_ranges:
+        own = cursor is None
+        if own:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+        try:
+            for range_start, range_end in mysql_ranges:
+                frames.append(_fetch_mysql(cursor, table, device_id, range_start, range_end))
+        finally:
+            if own:
+                cursor.close()
+                conn.close()
+
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return _to_frame(table, [])
+    return pd.concat(frames, ignore_index=True).sort_values(table.time_col, kind="stable").reset_index(drop=True)
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta días cerrados de pruebas / RTU_datos a Parquet")
+    parser.add_argument("--desde", type=_parse_date, required=True, help="Primer día (YYYY-MM-DD)")
+    parser.add_argument("--hasta", type=_parse_date, help="Último día (default: ayer)")
+    parser.add_argument("--tabla", action="append", choices=list(TABLES), help="Tabla (default: ambas)")
+    parser.add_argument("--device", type=int, help="Solo este device_id / RTU_id")
+    args = parser.parse_args()
+
+    export_range(args.desde, args.hasta, args.tabla, args.device)
@@ -0,0 +1,146 @@
+"""
+Índices compuestos de las lecturas crudas y revisión con EXPLAIN.
+
+Todas las consultas calientes sobre `pruebas` / `RTU_datos` filtran por
+dispositivo y un rango de tiempo (db_utils.rango_periodo / filtro_rango). Con el
+índice (device_id, time) / (RTU_id, Time) MySQL lee solo ese tramo; sin él
+recorre la tabla completa. Como el índice secundario de InnoDB incluye la llave
+primaria, además cubre las consultas que solo piden el tiempo (conteos, último
+registro).
+
+Migración (sin --apply solo muestra el SQL; ALGORITHM=INPLACE, LOCK=NONE no
+bloquea las inserciones de los listeners):
+    python -m scripts.api.telemetry_indexes --migrar [--apply]
+
+Revisión (para CI / después de cambiar consultas): corre EXPLAIN sobre las
+consultas calientes y termina con código 1 si alguna recorre la tabla completa:
+    python -m scripts.api.telemetry_indexes --check
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+from typing import Dict, List, NamedTuple, Tuple
+
+from .db_utils import filtro_rango, get_db_connection, rango_periodo
+from .telemetry_partitions import TABLES, TelemetryTable
+
+INDEXES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "pruebas": ("idx_pruebas_device_time", ("device_id", "time")),
+    "RTU_datos": ("idx_rtu_datos_rtu_time", ("RTU_id", "Time")),
+}
+
+
+class HotQuery(NamedTuple):
+    name: str
+    table: TelemetryTable
+    sql: str
+    params: tuple
+
+
+def _index_prefixes(cursor, table: TelemetryTable) -> List[Tuple[str, ...]]:
+    """Columnas (en minúsculas) de cada índice existente de la tabla"""
+    cursor.execute("""
+        SELECT INDEX_NAME, COLUMN_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """, (table.name,))
+    indexes: Dict[str, List[str]] = {}
+    for index_name, column in cursor.fetchall():
+        indexes.setdefault(index_name, []).append(column.lower())
+    return [tuple(columns) for columns in indexes.values()]
+
+
+def plan_indexes(cursor, table: TelemetryTable) -> List[str]:
+    """ALTER para crear el índice (dispositivo, tiempo) si ningún índice empieza con esas columnas"""
+    index_name, columns = INDEXES[table.name]
+    wanted = tuple(c.lower() for c in columns)
+    if any(existing[:len(wanted)] == wanted for existing in _index_prefixes(cursor, table)):
+        return []
+    return [
+        f"ALTER TABLE {table.name} ADD INDEX {index_name} ({', '.join(columns)}), "
+        f"ALGORITHM=INPLACE, LOCK=NONE"
+    ]
+
+
+def hot_queries(cursor) -> List[HotQuery]:
+    """Consultas calientes con un dispositivo existente, ayer y la semana pasada"""
+    ayer = date.today() - timedelta(days=1)
+    queries = []
+    for table in TABLES.values():
+        cursor.execute(f"SELECT {table.device_col} FROM {table.name} LIMIT 1")
+        row = cursor.fetchone()
+        device_id = row[0] if row else 0
+        columns = ", ".join([table.time_col, *table.value_cols])
+
+        for periodo, fecha in (("dia", ayer), ("semana", ayer - timedelta(weeks=1))):
+            rango, params = filtro_rango(table.time_col, *rango_periodo(periodo, fecha))
+            queries.append(HotQuery(
+                f"{table.name} por {periodo}",
+                table,
+                f"SELECT {columns} FROM {table.name} WHERE {table.device_col} = %s AND {rango} "
+                f"ORDER BY {table.time_col}",
+                (device_id, *params),
+            ))
+        queries.append(HotQuery(
+            f"{table.name} último registro",
+            table,
+            f"SELECT MAX({table.time_col}) FROM {table.name} WHERE {table.device_col} = %s",
+            (device_id,),
+        ))
+    return queries
+
+
+def check(cursor) -> List[str]:
+    """EXPLAIN de cada consulta caliente; devuelve los problemas encontrados"""
+    problems = []
+    for query in hot_queries(cursor):
+        cursor.execute(f"EXPLAIN {query.sql}", query.params)
+        columns = [d[0].lower() for d in cursor.description]
+        plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for step in plan:
+            if step.get("table") != query.table.name:
+                continue
+            if step.get("type") == "ALL" or step.get("key") is None:
+                problems.append(f"{query.name}: recorre la tabla completa (type={step.get('type')}, key={step.get('key')})")
+            else:
+                print(f"✅ {query.name}: type={step['type']} key={step['key']} rows≈{step.get('rows')}")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índices (dispositivo, tiempo) de pruebas / RTU_datos")
+    parser.add_argument("--migrar", action="store_true", help="Crea los índices que falten")
+    parser.add_argument("--apply", action="store_true", help="Ejecuta (sin esto solo muestra el SQL)")
+    parser.add_argument("--check", action="store_true", help="EXPLAIN de las consultas calientes; código 1 si hay full scans")
+    args = parser.parse_args()
+
+    if not (args.migrar or args.check):
+        parser.print_help()
+        raise SystemExit(0)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    problems = []
+    try:
+        if args.migrar:
+            for table in TABLES.values():
+                statements = plan_indexes(cursor, table)
+                if not statements:
+                    print(f"✅ {table.name}: ya tiene índice {INDEXES[table.name][1]}")
+                for sql in statements:
+                    if args.apply:
+                        print(f"▶️  {sql}")
+                        cursor.execute(sql)
+                        conn.commit()
+                    else:
+                        print(f"{sql};")
+        if args.check:
+            problems = check(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,300 @@
+"""
+Particiones mensuales y retención de las lecturas crudas (`pruebas` y `RTU_datos`).
+
+Las dos tablas crecen sin límite y todos los reportes filtran por fecha. Esta
+herramienta:
+
+    1. Particiona cada tabla por RANGE (TO_DAYS(tiempo)) con una partición por
+       mes (p202501, p202502, ...) más pmax. Como MySQL exige que la columna de
+       partición esté en todas las llaves únicas, la llave primaria se amplía con
+       la columna de tiempo.
+    2. Mantiene creadas las particiones de los próximos meses (partiendo pmax).
+    3. Retención: los meses con más de N meses de antigüedad se resumen por hora
+       en `<tabla>_hora` (lecturas, promedio, mínimo y máximo de cada medición) y
+       después se borra la partición completa (DROP PARTITION, sin DELETE). La
+       partición solo se borra si el resumen tiene el mismo número de lecturas.
+
+Las consultas por día usan rangos `tiempo >= inicio AND tiempo < fin` para que
+MySQL pueda descartar particiones y usar el índice (no `DATE(tiempo) = ...`).
+
+Uso (sin --apply solo muestra el SQL que ejecutaría):
+    python -m scripts.api.telemetry_partitions --estado
+    python -m scripts.api.telemetry_partitions --particionar [--apply]
+    python -m scripts.api.telemetry_partitions --mantener [--meses-futuros 3] [--apply]
+    python -m scripts.api.telemetry_partitions --retencion 13 [--apply]
+
+--mantener y --retencion están pensados para un cron mensual.
+"""
+import argparse
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .db_utils import filtro_rango, get_db_connection, rango_periodo
+
+MESES_FUTUROS = 3
+
+
+class TelemetryTable(NamedTuple):
+    name: str
+    device_col: str
+    time_col: str
+    value_cols: Tuple[str, ...]
+
+    @property
+    def hourly_table(self) -> str:
+        return f"{self.name}_hora"
+
+
+TABLES: Dict[str, TelemetryTable] = {
+    "pruebas": TelemetryTable("pruebas", "device_id", "time", ("ua", "ub", "uc", "ia", "ib", "ic")),
+    "RTU_datos": TelemetryTable("RTU_datos", "RTU_id", "Time", ("S1", "S2", "S3")),
+}
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+
+def _to_days(day: date) -> int:
+    """TO_DAYS() de MySQL"""
+    return day.toordinal() + 365
+
+
+def _from_days(days: int) -> date:
+    return date.fromordinal(days - 365)
+
+
+def _partition_def(month: date) -> str:
+    return f"PARTITION {_partition_name(month)} VALUES LESS THAN ({_to_days(_add_months(month, 1))})"
+
+
+class Partition(NamedTuple):
+    name: str
+    month: Optional[date]  # None para pmax
+    rows: int
+
+
+def list_partitions(cursor, table: TelemetryTable) -> List[Partition]:
+    """Particiones de la tabla en orden; lista vacía si no está particionada"""
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table.name,))
+    partitions = []
+    for name, description, rows in cursor.fetchall():
+        if description == "MAXVALUE":
+            partitions.append(Partition(name, None, rows or 0))
+        else:
+            partitions.append(Partition(name, _add_months(_from_days(int(description)), -1), rows or 0))
+    return partitions
+
+
+def _key_changes(cursor, table: TelemetryTable) -> List[str]:
+    """ALTERs para que la llave primaria incluya la columna de tiempo"""
+    cursor.execute("""
+        SELECT INDEX_NAME, COLUMN_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND NON_UNIQUE = 0
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """, (table.name,))
+    unique_keys: Dict[str, List[str]] = {}
+    for index_name, column in cursor.fetchall():
+        unique_keys.setdefault(index_name, []).append(column)
+
+    changes = []
+    for index_name, columns in unique_keys.items():
+        if any(c.lower() == table.time_col.lower() for c in columns):
+            continue
+        if index_name != "PRIMARY":
+            raise RuntimeError(
+                f"{table.name}: la llave única {index_name} no incluye {table.time_col}; revisarla a mano"
+            )
+        changes.append(
+            f"ALTER TABLE {table.name} DROP PRIMARY KEY, "
+            f"ADD PRIMARY KEY ({', '.join(columns + [table.time_col])})"
+        )
+    return changes
+
+
+def plan_partitioning(cursor, table: TelemetryTable, meses_futuros: int = MESES_FUTUROS) -> List[str]:
+    """SQL para particionar por mes una tabla que aún no lo está"""
+    if list_partitions(cursor, table):
+        return []
+    cursor.execute("""
+        SELECT DATA_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table.name, table.time_col))
+    row = cursor.fetchone()
+    if not row or row[0].lower() != "datetime":
+        # TO_DAYS() no se permite sobre TIMESTAMP
+        raise RuntimeError(f"{table.name}.{table.time_col} debe ser DATETIME para particionar por TO_DAYS")
+    cursor.execute(f"SELECT MIN({table.time_col}) FROM {table.name}")
+    oldest = cursor.fetchone()[0]
+    this_month = _month_start(date.today())
+    first = _month_start(oldest.date() if oldest else this_month)
+    months = []
+    month = first
+    while month <= _add_months(this_month, meses_futuros):
+        months.append(month)
+        month = _add_months(month, 1)
+
+    definitions = ",\n    ".join([_partition_def(m) for m in months] + ["PARTITION pmax VALUES LESS THAN MAXVALUE"])
+    return _key_changes(cursor, table) + [
+        f"ALTER TABLE {table.name}\n"
+        f"PARTITION BY RANGE (TO_DAYS({table.time_col})) (\n    {definitions}\n)"
+    ]
+
+
+def plan_future_partitions(cursor, table: TelemetryTable, meses_futuros: int = MESES_FUTUROS) -> List[str]:
+    """SQL para crear (partiendo pmax) las particiones que falten hasta meses_futuros"""
+    partitions = list_partitions(cursor, table)
+    months = [p.month for p in partitions if p.month is not None]
+    if not months:
+        return []
+    target = _add_months(_month_start(date.today()), meses_futuros)
+    missing = []
+    month = _add_months(max(months), 1)
+    while month <= target:
+        missing.append(month)
+        month = _add_months(month, 1)
+    if not missing:
+        return []
+    definitions = ",\n    ".join([_partition_def(m) for m in missing] + ["PARTITION pmax VALUES LESS THAN MAXVALUE"])
+    return [f"ALTER TABLE {table.name} REORGANIZE PARTITION pmax INTO (\n    {definitions}\n)"]
+
+
+def hourly_ddl(table: TelemetryTable) -> str:
+    stats = ",\n        ".join(
+        f"{c}_prom DOUBLE NULL, {c}_min DOUBLE NULL, {c}_max DOUBLE NULL" for c in table.value_cols
+    )
+    return f"""
+    CREATE TABLE IF NOT EXISTS {table.hourly_table} (
+        {table.device_col} INT NOT NULL,
+        hora DATETIME NOT NULL,
+        lecturas INT NOT NULL,
+        {stats},
+        PRIMARY KEY ({table.device_col}, hora)
+    )"""
+
+
+def downsample_sql(table: TelemetryTable, month: date) -> str:
+    """INSERT ... SELECT idempotente del resumen por hora de un mes"""
+    value_cols = [f"{c}_{s}" for c in table.value_cols for s in ("prom", "min", "max")]
+    aggregates = ", ".join(
+        f"AVG({c}), MIN({c}), MAX({c})" for c in table.value_cols
+    )
+    columns = [table.device_col, "hora", "lecturas"] + value_cols
+    return f"""
+        INSERT INTO {table.hourly_table} ({", ".join(columns)})
+        SELECT {table.device_col}, DATE_FORMAT({table.time_col}, '%Y-%m-%d %H:00:00'), COUNT(*), {aggregates}
+        FROM {table.name} PARTITION ({_partition_name(month)})
+        GROUP BY {table.device_col}, DATE_FORMAT({table.time_col}, '%Y-%m-%d %H:00:00')
+        ON DUPLICATE KEY UPDATE {", ".join(f"{c} = VALUES({c})" for c in columns[2:])}
+    """
+
+
+def apply_retention(cursor, conn, table: TelemetryTable, meses: int, apply: bool) -> List[str]:
+    """
+    Resume por hora y borra las particiones de meses anteriores a hoy - `meses`.
+
+    Returns:
+        Particiones borradas (o que se borrarían sin `apply`)
+    """
+    limite = _add_months(_month_start(date.today()), -meses)
+    expiradas = [p for p in list_partitions(cursor, table) if p.month is not None and p.month < limite]
+    if not expiradas:
+        return []
+
+    if apply:
+        cursor.execute(hourly_ddl(table))
+    dropped = []
+    for partition in expiradas:
+        sql = downsample_sql(table, partition.month)
+        if not apply:
+            print(f"-- {table.name}.{partition.name} (~{partition.rows} filas)\n{sql.strip()};\n"
+                  f"ALTER TABLE {table.name} DROP PARTITION {partition.name};\n")
+            dropped.append(partition.name)
+            continue
+
+        cursor.execute(sql)
+        conn.commit()
+
+        # Solo se borra si el resumen cubre todas las lecturas de la partición
+        cursor.execute(f"SELECT COUNT(*) FROM {table.name} PARTITION ({partition.name})")
+        crudas = cursor.fetchone()[0]
+        rango, params = filtro_rango("hora", *rango_periodo("mes", partition.month))
+        cursor.execute(f"SELECT COALESCE(SUM(lecturas), 0) FROM {table.hourly_table} WHERE {rango}", params)
+        resumidas = int(cursor.fetchone()[0])
+        if resumidas != crudas:
+            print(f"⚠️  {table.name}.{partition.name}: {crudas} lecturas vs {resumidas} resumidas, no se borra")
+            continue
+
+        cursor.execute(f"ALTER TABLE {table.name} DROP PARTITION {partition.name}")
+        print(f"🗑️  {table.name}.{partition.name}: {crudas} lecturas resumidas en {table.hourly_table} y borradas")
+        dropped.append(partition.name)
+    return dropped
+
+
+def _run(cursor, conn, statements: List[str], apply: bool) -> None:
+    for sql in statements:
+        if apply:
+            print(f"▶️  {sql.splitlines()[0]} ...")
+            cursor.execute(sql)
+            conn.commit()
+        else:
+            print(f"{sql};\n")
+
+
+def _print_status(cursor, table: TelemetryTable) -> None:
+    partitions = list_partitions(cursor, table)
+    if not partitions:
+        print(f"📦 {table.name}: sin particiones")
+        return
+    print(f"📦 {table.name}: {len(partitions)} particiones")
+    for p in partitions:
+        print(f"  {p.name:<10} {p.month.strftime('%Y-%m') if p.month else 'MAXVALUE':<9} ~{p.rows} filas")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Particiones mensuales y retención de pruebas / RTU_datos")
+    parser.add_argument("--tabla", action="append", choices=list(TABLES), help="Tabla (default: ambas)")
+    parser.add_argument("--estado", action="store_true", help="Muestra las particiones actuales")
+    parser.add_argument("--particionar", action="store_true", help="Particiona por mes una tabla sin particiones")
+    parser.add_argument("--mantener", action="store_true", help="Crea las particiones de los próximos meses")
+    parser.add_argument("--meses-futuros", type=int, default=MESES_FUTUROS)
+    parser.add_argument("--retencion", type=int, metavar="MESES", help="Resume y borra meses más viejos que esto")
+    parser.add_argument("--apply", action="store_true", help="Ejecuta (sin esto solo muestra el SQL)")
+    args = parser.parse_args()
+
+    if not (args.estado or args.particionar or args.mantener or args.retencion):
+        parser.print_help()
+        raise SystemExit(0)
+    if args.retencion is not None and args.retencion < 1:
+        parser.error("--retencion debe ser al menos 1 mes")
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        for table in (TABLES[name] for name in args.tabla or TABLES):
+            if args.estado:
+                _print_status(cursor, table)
+            if args.particionar:
+                _run(cursor, conn, plan_partitioning(cursor, table, args.meses_futuros), args.apply)
+            if args.mantener:
+                _run(cursor, conn, plan_future_partitions(cursor, table, args.meses_futuros), args.apply)
+            if args.retencion:
+                apply_retention(cursor, conn, table, args.retencion, args.apply)
+    finally:
+        cursor.close()
+        conn.close()
@@ -8,6 +8,7 @@ from dotenv import load_dotenv
 from typing import List
 from pydantic import BaseModel, EmailStr
 from .db_utils import get_db_connection
+from .session_cache import invalidate_usuario
 
 load_dotenv()
 
@@ -133,6 +134,7 @@ def create_team_member(member: TeamMember):
         """, (member.correo, member.rol, member.nombre))
         
         conn.commit()
+        invalidate_usuario(email=member.correo)
         cursor.close()
         conn.close()
 
@@ -205,6 +207,8 @@ def update_team_member(team_id: int, member: TeamMember):
         """, (member.correo, member.rol, member.nombre))
 
         conn.commit()
+        invalidate_usuario(email=old_email)
+        invalidate_usuario(email=member.correo)
         cursor.close()
         conn.close()
 
@@ -255,6 +259,7 @@ def delete_team_member(team_id: int):
         )
 
         conn.commit()
+        invalidate_usuario(email=member_email)
         cursor.close()
         conn.close()
 
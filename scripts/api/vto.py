@@ -6,6 +6,7 @@ import os
 from dotenv import load_dotenv
 
 from .clases import Dispositivo
+from .db_utils import get_db_connection
 
 load_dotenv()
 DB_HOST = os.getenv("DB_HOST")
@@ -18,12 +19,7 @@ vto_web = APIRouter(prefix="/vto", tags=["VTO"])
 @vto_web.get("/")
 def get_dispositivos():
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            host=DB_HOST,
-            database=DB_DATABASE,
-            password=DB_PASSWORD
-        )
+        conn = get_db_connection()
 
         cursor = conn.cursor()
 
@@ -63,12 +59,7 @@ def get_dispositivos():
 @vto_web.get("/{dispositivo_id}")
 def get_dispositivo_by_id(dispositivo_id: int = Path(..., description="ID del dispositivo")):
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            host=DB_HOST,
-            database=DB_DATABASE,
-            password=DB_PASSWORD
-        )
+        conn = get_db_connection()
 
         cursor = conn.cursor()
 
@@ -107,12 +98,7 @@ def get_dispositivo_by_id(dispositivo_id: int = Path(..., description="ID del di
 @vto_web.post("/")
 def create_dispositivo(request: Dispositivo):
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            host=DB_HOST,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
 
         cursor = conn.cursor()
 
@@ -150,12 +136,7 @@ def create_dispositivo(request: Dispositivo):
 @vto_web.post("/bulk")
 def create_dispositivos_bulk(dispositivos: list[Dispositivo]):
     try:
-        conn = mysql.connector.connect(
-            user=DB_USER,
-            host=DB_HOST,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
 
         cursor = conn.cursor()
 
@@ -196,12 +177,7 @@ def create_dispositivos_bulk(dispositivos: list[Dispositivo]):
 @vto_web.put("/{dispositivo_id}")
 def update_dispositivo(dispositivo_id: int = Path(..., description="ID del dispositivo"), request: Dispositivo = None):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
 
         cursor = conn.cursor()
 
@@ -233,12 +209,7 @@ def update_dispositivo(dispositivo_id: int = Path(..., description="ID del dispo
 @vto_web.delete("/{dispositivo_id}")
 def delete_dispositivo(dispositivo_id: int = Path(..., description="ID del dispositivo")):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
 
         cursor = conn.cursor()
 
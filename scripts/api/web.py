@@ -1,12 +1,9 @@
-from fastapi import Query, HTTPException, APIRouter, Body
+from fastapi import Query, HTTPException, APIRouter, Body, Depends, Request
 from fastapi.responses import StreamingResponse
 
 import mysql.connector
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-from pmdarima import auto_arima
 from datetime import timedelta, date
 import os
 import dotenv as dotenv
@@ -16,8 +13,12 @@ from typing import List, Tuple, Optional
 from pydantic import BaseModel, EmailStr
 import sys
 from pathlib import Path
-from google.cloud import storage
-from google.oauth2 import service_account
+from .pdf_cache import invalidate_report_pdfs_for_serie
+from .db_utils import get_db_connection
+from .compressor_search import search_index
+from .session_cache import cached_session_response, invalidate_all
+from .reference_cache import COMPRESORES, get_mantenimientos_tipo, get_modulos_web, invalidate as invalidate_reference
+from .pagination import PageParams, page_params, build_query, count_rows, split_page, project, page_response
 
 # Agregar el directorio de scripts al path para importar maintenance_reports
 SCRIPT_DIR = Path(__file__).resolve().parent.parent
@@ -140,6 +141,9 @@ dotenv.load_dotenv()
 # Create FastAPI instance
 web = APIRouter(prefix="/web", tags=["🌐 Web API"])
 
+# Orden de la paginación por cursor de GET /web/registros-mantenimiento (más recientes primero)
+REGISTRO_PAGE_KEYS = [("timestamp", "DESC"), ("id", "DESC")]
+
 # Get database credentials from environment variables
 DB_HOST = os.getenv("DB_HOST")
 DB_USER = os.getenv("DB_USER")
@@ -154,16 +158,23 @@ logging.basicConfig(level=logging.INFO)
 
 # GET - Obtener usuario por email (para autenticación)
 @web.get("/usuarios/{email}", tags=["🔐 Autenticación"])
-def get_usuario_by_email(email: str):
+def get_usuario_by_email(email: str, request: Request):
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
-        cursor = conn.cursor(dictionary=True)
+        # Se sirve desde caché por usuario; 304 si el navegador ya tiene esta versión
+        return cached_session_response(request, "web", email, lambda: _load_usuario(email))
+    except HTTPException:
+        raise
+    except mysql.connector.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching usuario: {str(e)}")
 
+
+def _load_usuario(email: str) -> dict:
+    """Usuario, compresores según su rol y módulos habilitados"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
         # 1. OBTENER USUARIO
         cursor.execute(
             "SELECT id, email, numeroCliente, rol, name FROM usuarios_auth WHERE email = %s",
@@ -214,12 +225,7 @@ def get_usuario_by_email(email: str):
                 "kwh": True
             }
         else:
-            cursor.execute("""
-                SELECT mantenimiento, reporteDia, reporteSemana, presion, prediccion, kwh
-                FROM modulos_web
-                WHERE numero_cliente = %s
-            """, (numeroCliente,))
-            modulos_row = cursor.fetchone()
+            modulos_row = get_modulos_web(numeroCliente, cursor)
 
             modulos = {}
             if modulos_row:
@@ -232,9 +238,6 @@ def get_usuario_by_email(email: str):
                     "kwh": bool(modulos_row.get('kwh', False))
                 }
 
-        cursor.close()
-        conn.close()
-
         return {
             "id": user['id'],
             "email": user['email'],
@@ -244,11 +247,9 @@ def get_usuario_by_email(email: str):
             "compresores": compresores,
             "modulos": modulos
         }
-
-    except mysql.connector.Error as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching usuario: {str(e)}")
+    finally:
+        cursor.close()
+        conn.close()
 
 
 # GET - Obtener ingenieros filtrados por cliente
@@ -256,12 +257,7 @@ def get_usuario_by_email(email: str):
 def get_ingenieros(cliente: int = Query(..., description="Número de cliente")):
     """Obtiene todos los ingenieros de un cliente específico con sus compresores asignados"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Query que filtra por número de cliente y obtiene rol desde usuarios_auth
@@ -324,12 +320,7 @@ def get_ingenieros(cliente: int = Query(..., description="Número de cliente")):
 def get_compresores(cliente: int = Query(..., description="Número de cliente")):
     """Obtiene todos los compresores de un cliente específico"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute(
@@ -370,12 +361,7 @@ def create_ingeniero(
 ):
     """Crea un nuevo ingeniero con sus compresores asignados para un cliente específico"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Verificar si el email ya existe
@@ -455,12 +441,7 @@ def update_ingeniero(
 ):
     """Actualiza un ingeniero existente y sus compresores asignados"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Verificar si el ingeniero existe y pertenece al cliente
@@ -545,12 +526,7 @@ def delete_ingeniero(
 ):
     """Elimina un ingeniero y sus asignaciones de compresores"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Verificar si el ingeniero existe y pertenece al cliente
@@ -601,12 +577,7 @@ def update_email_preferences(
 ):
     """Actualiza las preferencias de email de un ingeniero"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Verificar si el ingeniero existe
@@ -650,12 +621,7 @@ def patch_email_preferences(
 ):
     """Actualiza las preferencias de email de un ingeniero (PATCH method)"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Verificar si el ingeniero existe
@@ -700,12 +666,7 @@ def patch_email_preferences(
 def get_engineer_compressors(email: str):
     """Obtiene los compresores asignados a un ingeniero específico"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         query = """
@@ -746,15 +707,11 @@ def get_engineer_compressors(email: str):
 
 # GET - Obtener registros de mantenimiento (opcionalmente por número de cliente)
 @web.get("/registros-mantenimiento", tags=["🔧 Mantenimiento"])
-def get_registros_mantenimiento(numero_cliente: Optional[int] = Query(None, description="Número del cliente")):
+def get_registros_mantenimiento(numero_cliente: Optional[int] = Query(None, description="Número del cliente"),
+                                page: PageParams = Depends(page_params)):
     """Obtiene los registros de mantenimiento. Si se proporciona `numero_cliente`, filtra por cliente; si no, devuelve todos los registros."""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         # Base de la consulta
         base_query = """
@@ -792,17 +749,20 @@ def get_registros_mantenimiento(numero_cliente: Optional[int] = Query(None, desc
             FROM registros_mantenimiento_tornillo
         """
 
+        where, params = [], []
         if numero_cliente is not None:
-            query = base_query + "\n WHERE numero_cliente = %s\n ORDER BY timestamp DESC"
-            cursor.execute(query, (numero_cliente,))
-        else:
-            query = base_query + "\n ORDER BY timestamp DESC"
-            cursor.execute(query)
+            where.append("numero_cliente = %s")
+            params.append(numero_cliente)
+        query, query_params = build_query(base_query, where, params, REGISTRO_PAGE_KEYS, page, keep_order=True)
+        cursor.execute(query, tuple(query_params))
         registros = cursor.fetchall()
+        total = count_rows(cursor, "FROM registros_mantenimiento_tornillo", where, params) if page.include_total else None
 
         cursor.close()
         conn.close()
 
+        registros, next_cursor = split_page(registros, page, lambda row: (row["timestamp"], row["id"]))
+
         # Formatear los registros para el frontend
         formatted_registros = []
         for registro in registros:
@@ -836,8 +796,13 @@ def get_registros_mantenimiento(numero_cliente: Optional[int] = Query(None, desc
             }
             formatted_registros.append(formatted_registro)
 
-        return formatted_registros
+        # Sin parámetros de paginación se conserva la respuesta original (lista)
+        if page.paginated:
+            return page_response(formatted_registros, page, next_cursor, total)
+        return project(formatted_registros, page)
 
+    except HTTPException:
+        raise
     except mysql.connector.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     except Exception as e:
@@ -919,6 +884,8 @@ def consumption_prediction_plot(
         kwh_anual = promedio_diario * 365
         costo_anual = kwh_anual * costoKwh
 
+        # Deferred so matplotlib loads on the first plot request, not at API startup
+        import matplotlib.pyplot as plt
         plt.switch_backend('Agg')  # Usar backend no-GUI
         fig, ax = plt.subplots(figsize=(12, 6))
         
@@ -971,12 +938,7 @@ def consumption_prediction_plot(
 def update_user_client_number(request: UpdateClientNumberRequest):
     """Actualiza el número de cliente de un usuario específico (solo para administradores)"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Verificar que el usuario existe
@@ -1034,16 +996,7 @@ def update_user_client_number(request: UpdateClientNumberRequest):
 def get_maintenance_types(tipo: str = Query(..., description="Tipo de compresor: piston o tornillo")):
     """Fetch maintenance types for compressors"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
-        cursor = conn.cursor(dictionary=True)
-
-        cursor.execute("SELECT * FROM mantenimientos_tipo WHERE tipo_compresor = %s", (tipo,))
-        maintenance_types = cursor.fetchall()
+        maintenance_types = get_mantenimientos_tipo(tipo)
 
         return {"maintenance_types": maintenance_types}
 
@@ -1051,19 +1004,12 @@ def get_maintenance_types(tipo: str = Query(..., description="Tipo de compresor:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching maintenance types: {str(e)}")
-    finally:
-        cursor.close()
 
 @web.post("/maintenance/add", tags=["🛠️ Mantenimiento de Compresores"])
 def add_maintenance(request: AddMaintenanceRequest):
     """Agregar un nuevo registro de mantenimiento"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Validar que el compresor existe
@@ -1121,12 +1067,7 @@ def get_maintenance_records(
 ):
     """Obtener todos los registros de mantenimiento, opcionalmente filtrados por cliente"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         if numero_cliente:
@@ -1181,12 +1122,7 @@ def get_maintenance_semaforo(id_compresor: int):
     import logging
     logging.basicConfig(level=logging.INFO)
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute(
@@ -1249,12 +1185,7 @@ def get_maintenance_semaforo(id_compresor: int):
 def get_maintenance_by_id(maintenance_id: int):
     """Obtener un registro de mantenimiento específico por ID"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute("""
@@ -1288,12 +1219,7 @@ def get_maintenance_by_id(maintenance_id: int):
 def update_maintenance(maintenance_id: int, request: UpdateMaintenanceRequest):
     """Actualizar un registro de mantenimiento existente"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Verificar que el mantenimiento existe
@@ -1366,12 +1292,7 @@ def update_maintenance(maintenance_id: int, request: UpdateMaintenanceRequest):
 def delete_maintenance(maintenance_id: int):
     """Eliminar un registro de mantenimiento"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Verificar que el mantenimiento existe
@@ -1411,12 +1332,7 @@ def delete_maintenance(maintenance_id: int):
 def get_maintenance_report_data_by_id(registro_id: str):
     """Obtener datos del reporte de mantenimiento por ID de registro específico"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Consultar registro específico por ID con datos del compresor
@@ -1509,12 +1425,7 @@ def get_maintenance_report_data_by_id(registro_id: str):
 def update_maintenance_report(registro_id: int, request: UpdateMaintenanceReportRequest):
     """Actualiza los datos de un reporte de mantenimiento existente"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         # Crear diccionario de mapeo inverso (nombre legible -> columna BD)
@@ -1621,6 +1532,12 @@ def update_maintenance_report(registro_id: int, request: UpdateMaintenanceReport
             cursor.execute(compressor_query, compressor_values)
             conn.commit()
 
+            # Los PDFs cacheados de las órdenes de este compresor muestran datos que acaban de cambiar
+            invalidate_report_pdfs_for_serie(request.numero_serie)
+            search_index.refresh_serie(request.numero_serie)
+            invalidate_all()
+            invalidate_reference(COMPRESORES)
+
         cursor.close()
         conn.close()
 
@@ -1639,12 +1556,7 @@ def update_maintenance_report(registro_id: int, request: UpdateMaintenanceReport
 def get_maintenance_report_data(numero_serie: str):
     """Obtener datos del reporte de mantenimiento por número de serie del día actual"""
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # Consultar registros de mantenimiento del día actual
@@ -1730,12 +1642,7 @@ def get_compressor_by_serial(numero_serie: str):
     Endpoint público para automation.py y reportes sin autenticación.
     """
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_DATABASE
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
         # Obtener toda la información del compresor
@@ -1815,9 +1722,7 @@ def evaluar_rangos_10psi_api(event, deficit_cfm, pres_min, pres_max, comp_flow_r
 
 def obtener_compresores(numero_cliente):
     """Consulta todos los compresores del cliente"""
-    conn = mysql.connector.connect(
-        host=DB_HOST, user=DB_USER, password=DB_PASSWORD, database=DB_DATABASE
-    )
+    conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute("""
         SELECT c.id_cliente, c.linea, c.Alias, c.segundosPorRegistro, c.voltaje, c2.CostokWh
@@ -1832,9 +1737,7 @@ def obtener_compresores(numero_cliente):
 
 def obtener_kwh_fp(id_cliente, linea, segundosPR, voltaje):
     """Consulta kWh para un compresor en fechas recientes (optimizado)"""
-    conn = mysql.connector.connect(
-        host=DB_HOST, user=DB_USER, password=DB_PASSWORD, database=DB_DATABASE
-    )
+    conn = get_db_connection()
     cursor = conn.cursor()
     fecha_fin = date.today() - timedelta(days=1)
     fecha_inicio = fecha_fin - timedelta(days=10)  # Reducido de 17 a 10 días
@@ -1872,6 +1775,10 @@ def generate_predictions_fast(series: pd.Series, days: int = 3) -> Tuple[List[fl
     
     # Usar SARIMAX solo si hay suficiente variación
     try:
+        # Deferred so statsmodels/pmdarima load on the first forecast, not at API startup
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        from pmdarima import auto_arima
+
         # Limpiar datos para modelo
         series_clean = series[series > 0].copy()
         if len(series_clean) < 7:
@@ -1935,6 +1842,9 @@ def get_drive_folder_images(prefix: str):
         return []
 
     try:
+        from google.cloud import storage
+        from google.oauth2 import service_account
+
         credentials = service_account.Credentials.from_service_account_file(GCS_KEY_FILE)
         client = storage.Client(credentials=credentials, project=credentials.project_id)
         clean_prefix = prefix.rstrip('/') + '/'
@@ -22,18 +22,74 @@ from scripts.api.prediction import prediction
 from scripts.api.maintenance_web import maintenance_web
 from scripts.api.reports_daily import reports_daily
 from scripts.api.reports_weekly import reports_weekly
+from scripts.api.reports_batch import reports_batch
 from scripts.api.reports_static import reports_static
 from scripts.api.dooble import dooble_router
 from scripts.api.reportes_secadora import reportes_secadora
 from scripts.api.notas_compresores import notas_compresores
 from scripts.api.secadoras import secadoras as secadoras_router
 from scripts.api.ventologix import ventologix
+from scripts.api.pdf_playwright import pdf_worker
+from scripts.api.metrics import metrics_router, track_request
+from scripts.api.compression import CompressionMiddleware
+from scripts.api.query_profiler import dump_report
+from scripts.api.compressor_search import search_index
+from scripts.api.photo_index import ensure_photo_index_table
+from scripts.api.pdf_cache import ensure_pdf_cache_table
 
 # Load environment variables
 load_dotenv()
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+def start_pdf_worker():
+    # Persistent Playwright worker for maintenance-report PDFs
+    try:
+        pdf_worker.start()
+    except OSError as e:
+        print(f"⚠️  Could not start PDF worker: {e}")
+
+
+@app.on_event("startup")
+def build_compressor_search_index():
+    # In-memory index for /compresores/compresor-cliente/{query}; retried on the first search if this fails
+    try:
+        total = search_index.rebuild()
+        print(f"🔎 Compressor search index: {total} compressors")
+    except Exception as e:
+        print(f"⚠️  Could not build compressor search index: {e}")
+
+
+@app.on_event("startup")
+def create_photo_index():
+    # fotos_reportes must exist before the first upload tries to index its photos
+    try:
+        ensure_photo_index_table()
+    except Exception as e:
+        print(f"⚠️  Could not create photo index table: {e}")
+
+
+@app.on_event("startup")
+def create_pdf_cache_table():
+    # Without pdf_cache_versiones every download re-renders and invalidations only warn
+    try:
+        ensure_pdf_cache_table()
+    except Exception as e:
+        print(f"⚠️  Could not create PDF cache table: {e}")
+
+
+@app.on_event("shutdown")
+def stop_pdf_worker():
+    pdf_worker.stop()
+
+
+@app.on_event("shutdown")
+def save_query_profile():
+    # Ranked statement report, only written when QUERY_PROFILE_REPORT is set
+    dump_report()
+
 ALLOWED_ORIGINS = [
     "https://dashboard.ventologix.com",
     "http://localhost",
@@ -69,6 +125,9 @@ async def restrict_public_access(request: Request, call_next):
     response = await call_next(request)
     return response
 
+# Request/DB timing for /metrics; registered after the access check so it wraps it
+app.middleware("http")(track_request)
+
 # Apply CORS middleware AFTER custom middleware
 app.add_middleware(
     CORSMiddleware,
@@ -78,6 +137,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for large JSON responses (outermost, so it compresses everything above)
+app.add_middleware(CompressionMiddleware)
+
 app.include_router(client)
 app.include_router(compresores)
 app.include_router(ordenes)
@@ -98,9 +160,11 @@ app.include_router(prediction)
 app.include_router(maintenance_web)
 app.include_router(reports_daily)
 app.include_router(reports_weekly)
+app.include_router(reports_batch)
 app.include_router(reports_static)
 app.include_router(dooble_router)
 app.include_router(reportes_secadora)
 app.include_router(notas_compresores)
 app.include_router(secadoras_router)
 app.include_router(ventologix)
+app.include_router(metrics_router)
@@ -0,0 +1,95 @@
+"""
+------------------------------------------------------------
+ Ventologix API compression benchmark
+ Description: Requests the large report endpoints from a running API once per
+ encoding (identity = before, gzip and br = after) and reports the payload size
+ on the wire and the end-to-end latency (request until the last byte is read).
+
+ Usage (API running locally, e.g. uvicorn scripts.api_server:app):
+    python scripts/compression_benchmark.py --cliente 7 --linea A --fecha 2025-06-02 --fecha 2025-06-09
+    python scripts/compression_benchmark.py --base-url http://127.0.0.1:8000 --runs 10 --csv bench.csv
+------------------------------------------------------------
+"""
+import argparse
+import csv
+import statistics
+import sys
+import time
+
+import requests
+
+ENCODINGS = ["identity", "gzip", "br"]
+
+# (name, path) — formatted with cliente, linea and fecha
+ENDPOINTS = [
+    ("kwh-diario-fases", "/report/kwh-diario-fases?fecha={fecha}"),
+    ("amperaje-diario-fases", "/report/amperaje-diario-fases?fecha={fecha}"),
+    ("voltaje-diario-fases", "/report/voltaje-diario-fases?fecha={fecha}"),
+    ("line-data-proc-day", "/report/line-data-proc-day?id_cliente={cliente}&linea={linea}&date={fecha}"),
+    ("day-report-data", "/report/day-report-data?id_cliente={cliente}&linea={linea}&date={fecha}"),
+    ("dateWeek/summary-general", "/report/dateWeek/summary-general?id_cliente={cliente}&linea={linea}&fecha={fecha}"),
+    ("pressure/stats", "/pressure/stats?numero_cliente={cliente}&fecha={fecha}"),
+]
+
+
+def fetch(url: str, encoding: str) -> tuple:
+    """(bytes on the wire, seconds until the body is fully read, status)"""
+    start = time.perf_counter()
+    with requests.get(url, headers={"Accept-Encoding": encoding}, stream=True, timeout=300) as response:
+        body = response.raw.read(decode_content=False)
+        elapsed = time.perf_counter() - start
+        served = response.headers.get("Content-Encoding", "identity")
+    if served != encoding and encoding != "identity":
+        print(f"⚠️  {url} answered {served} to Accept-Encoding {encoding}", file=sys.stderr)
+    return len(body), elapsed, response.status_code
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Payload size and latency with and without compression")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--cliente", required=True, help="id_cliente / numero_cliente used in the URLs")
+    parser.add_argument("--linea", default="A")
+    parser.add_argument("--fecha", action="append", required=True, help="Report day YYYY-MM-DD (repeatable)")
+    parser.add_argument("--runs", type=int, default=5, help="Requests per endpoint and encoding (default: 5)")
+    parser.add_argument("--csv", help="Also write the results to this CSV file")
+    args = parser.parse_args()
+
+    rows = []
+    for fecha in args.fecha:
+        print(f"\n📅 {fecha}")
+        print(f"  {'endpoint':<26} {'encoding':<9} {'bytes':>10} {'ratio':>6} {'median ms':>10} {'min ms':>8}")
+        for name, path in ENDPOINTS:
+            url = args.base_url.rstrip("/") + path.format(cliente=args.cliente, linea=args.linea, fecha=fecha)
+            baseline = None
+            for encoding in ENCODINGS:
+                samples = [fetch(url, encoding) for _ in range(args.runs)]
+                size = samples[-1][0]
+                status = samples[-1][2]
+                latencies = [elapsed for _, elapsed, _ in samples]
+                baseline = baseline or size
+                ratio = size / baseline if baseline else 1.0
+                median_ms = statistics.median(latencies) * 1000
+                print(f"  {name:<26} {encoding:<9} {size:>10} {ratio:>6.2f} {median_ms:>10.1f} {min(latencies) * 1000:>8.1f}"
+                      + ("" if status == 200 else f"  (HTTP {status})"))
+                rows.append({
+                    "fecha": fecha,
+                    "endpoint": name,
+                    "encoding": encoding,
+                    "status": status,
+                    "bytes": size,
+                    "ratio": f"{ratio:.4f}",
+                    "median_ms": f"{median_ms:.1f}",
+                    "min_ms": f"{min(latencies) * 1000:.1f}",
+                })
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\n📝 Saved to {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
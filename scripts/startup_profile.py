@@ -0,0 +1,166 @@
+"""
+------------------------------------------------------------
+ Ventologix API startup profiler
+ Description: Measures how long `scripts.api_server` takes to import (what uvicorn
+ pays on every cold start and --reload), reports the slowest imports using
+ `python -X importtime`, and appends the result to a CSV history so startup
+ time can be tracked over time.
+
+ Usage (from the repository root):
+    python scripts/startup_profile.py                 # profile + benchmark + history
+    python scripts/startup_profile.py --runs 5 --top 30
+    python scripts/startup_profile.py --max-regression 20   # exit 1 if >20% slower than history median
+------------------------------------------------------------
+"""
+import argparse
+import csv
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_HISTORY = REPO_ROOT / "scripts" / "benchmarks" / "startup_history.csv"
+TARGET_MODULE = "scripts.api_server"
+
+HISTORY_FIELDS = ["timestamp", "commit", "python", "runs", "median_s", "min_s", "importtime_s", "top_package"]
+
+
+def _run_import(extra_args=None) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *(extra_args or []), "-c", f"import {TARGET_MODULE}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+
+
+def benchmark(runs: int) -> list:
+    """Wall-clock seconds to start a fresh interpreter and import the API, per run."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = _run_import()
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {TARGET_MODULE} failed:\n{result.stderr}")
+        timings.append(elapsed)
+    return timings
+
+
+def import_profile() -> list:
+    """
+    Parse `python -X importtime` output.
+
+    Returns:
+        List of (module, depth, self_us, cumulative_us)
+    """
+    result = _run_import(["-X", "importtime"])
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {TARGET_MODULE} failed:\n{result.stderr}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Nesting is encoded as two extra spaces per level after the leading one
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def summarize_packages(rows: list) -> list:
+    """Total self time per top-level package, slowest first."""
+    totals = {}
+    for module, _, self_us, _ in rows:
+        package = module.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True
+        ).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def read_history(path: Path) -> list:
+    if not path.exists():
+        return []
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def append_history(path: Path, record: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    new_file = not path.exists()
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=HISTORY_FIELDS)
+        if new_file:
+            writer.writeheader()
+        writer.writerow(record)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Profile and benchmark API startup time")
+    parser.add_argument("--runs", type=int, default=3, help="Cold-start runs to time (default: 3)")
+    parser.add_argument("--top", type=int, default=20, help="Rows to show in the import report (default: 20)")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY, help="CSV file with past results")
+    parser.add_argument("--no-history", action="store_true", help="Do not append this run to the history")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Fail if the median is this %% slower than the history median")
+    args = parser.parse_args()
+
+    rows = import_profile()
+    total_us = sum(self_us for _, _, self_us, _ in rows)
+
+    print(f"\n📦 Slowest top-level packages (self time, total {total_us / 1e6:.2f}s)")
+    packages = summarize_packages(rows)
+    for package, self_us in packages[:args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  {package}")
+
+    print("\n🐢 Slowest imports (cumulative)")
+    for module, depth, _, cumulative_us in sorted(rows, key=lambda r: r[3], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {'  ' * depth}{module}")
+
+    timings = benchmark(args.runs)
+    median_s = statistics.median(timings)
+    print(f"\n⏱️  Cold start ({args.runs} runs): median {median_s:.3f}s, min {min(timings):.3f}s")
+
+    history = read_history(args.history)
+    previous = [float(r["median_s"]) for r in history]
+    status = 0
+    if previous:
+        baseline = statistics.median(previous)
+        change = (median_s - baseline) / baseline * 100 if baseline else 0.0
+        print(f"📈 History median {baseline:.3f}s over {len(previous)} run(s), last {previous[-1]:.3f}s → {change:+.1f}%")
+        if args.max_regression is not None and change > args.max_regression:
+            print(f"❌ Startup regressed more than {args.max_regression:.0f}%")
+            status = 1
+
+    if not args.no_history:
+        append_history(args.history, {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "runs": args.runs,
+            "median_s": f"{median_s:.4f}",
+            "min_s": f"{min(timings):.4f}",
+            "importtime_s": f"{total_us / 1e6:.4f}",
+            "top_package": packages[0][0] if packages else "",
+        })
+        print(f"📝 Saved to {os.path.relpath(args.history, REPO_ROOT)}")
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())